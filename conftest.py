@@ -10,6 +10,13 @@ from django_redis import get_redis_connection
 from oauth2_provider.models import AccessToken, Application
 from rest_framework.test import APIClient
 
+from organizations.cache import tenant_cache
+from plio.cache import (
+    cache_stats,
+    pending_invalidations,
+    response_cache,
+    version_cache,
+)
 from organizations.models import Organization
 from tests.actors import Actor
 from tests.factories import UserFactory
@@ -77,8 +84,18 @@ def clean_redis():
     # stale keys behind, and the recreated test database reuses low primary
     # keys, so a stale tenant cache entry could serve the next run's first read
     get_redis_connection("default").flushdb()
+    tenant_cache.clear()
+    response_cache.clear()
+    version_cache.clear()
+    cache_stats.clear()
+    pending_invalidations.clear()
     yield
     get_redis_connection("default").flushdb()
+    tenant_cache.clear()
+    response_cache.clear()
+    version_cache.clear()
+    cache_stats.clear()
+    pending_invalidations.clear()
     connection.set_schema_to_public()
 
 
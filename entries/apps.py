@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class EntriesConfig(AppConfig):
     name = "entries"
+
+    def ready(self):
+        import entries.signals  # noqa
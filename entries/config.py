@@ -14,3 +14,22 @@ event_type_choices = [
     ("video_seeked", "Video Seeked"),
     ("watching", "Watching"),
 ]
+
+# the largest number of events that can be sent to the batch endpoint at once
+EVENT_BATCH_MAX_SIZE = 500
+
+# how often, in seconds, the telemetry buffered by a session's websocket is
+# written to the database
+TELEMETRY_FLUSH_INTERVAL = 5
+
+# the number of buffered events of a session's websocket after which they are
+# written to the database without waiting for the next flush
+TELEMETRY_FLUSH_SIZE = 50
+
+# the largest number of events that can be sent in one message of a session's
+# websocket
+TELEMETRY_MESSAGE_MAX_EVENTS = 100
+
+# the number of times in a row that writing the telemetry of a session's
+# websocket can fail before the websocket is closed
+TELEMETRY_MAX_FLUSH_FAILURES = 3
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.db import connection, transaction
+from oauth2_provider.models import AccessToken
+
+from entries.config import (
+    TELEMETRY_FLUSH_INTERVAL,
+    TELEMETRY_FLUSH_SIZE,
+    TELEMETRY_MAX_FLUSH_FAILURES,
+    TELEMETRY_MESSAGE_MAX_EVENTS,
+)
+from entries.models import Event, Session
+from entries.resume import update_user_plio_state
+from entries.serializers import EventBatchItemSerializer, SessionTelemetrySerializer
+from organizations.cache import get_tenant
+from plio.settings import DEFAULT_TENANT_SHORTCODE
+
+logger = logging.getLogger(__name__)
+
+# the code a session's websocket is closed with when it cannot be authenticated
+UNAUTHORIZED_CLOSE_CODE = 4001
+
+# the code a session's websocket is closed with when its telemetry keeps
+# failing to be written
+INTERNAL_ERROR_CLOSE_CODE = 1011
+
+
+def get_telemetry_session(token: str, shortcode: str, session_id: int):
+    """
+    Returns the session to stream the telemetry of, and the organization it
+    belongs to, if the access token is valid and belongs to the session's user.
+    Returns `(None, None)` otherwise.
+
+    :param token: the access token sent in the first message of the websocket
+    :type token: str
+    :param shortcode: the shortcode of the organization of the session
+    :type shortcode: str
+    :param session_id: the id of the session
+    :type session_id: int
+    """
+    connection.set_schema_to_public()
+    access_token = AccessToken.objects.filter(token=token).first()
+    if access_token is None or not access_token.is_valid():
+        return None, None
+
+    organization = get_tenant(shortcode)
+    if organization is not None:
+        connection.set_tenant(organization)
+
+    session = Session.objects.filter(id=session_id, user_id=access_token.user_id)
+    return session.first(), organization
+
+
+def write_session_telemetry(organization, session_id: int, events: list, updates):
+    """
+    Writes the buffered telemetry of a session in one transaction: the events
+    with a single insert and the latest values of the updated session fields
+    with a single save.
+    """
+    if organization is not None:
+        connection.set_tenant(organization)
+    else:
+        connection.set_schema_to_public()
+
+    with transaction.atomic():
+        events = Event.objects.bulk_create(
+            [Event(session_id=session_id, **event) for event in events]
+        )
+        # `bulk_create` does not send `post_save`
+        update_user_plio_state([event.id for event in events])
+
+        if updates:
+            session = Session.objects.filter(id=session_id).first()
+            if session is None:
+                return
+            for field, value in updates.items():
+                setattr(session, field, value)
+            # saving sends `post_save`, which keeps the plio's metrics up to date
+            session.save(update_fields=[*updates, "updated_at"])
+
+
+class SessionConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Receives the telemetry of a single session while it is being played: its
+    events and the updates to its retention, watch time and whether the video
+    has been played, which would otherwise each be a REST request.
+
+    The telemetry is buffered and written to the database every
+    `TELEMETRY_FLUSH_INTERVAL` seconds, when `TELEMETRY_FLUSH_SIZE` events have
+    been buffered, and when the websocket is closed. A write that fails is
+    logged and tried again with the next flush, and the websocket is closed
+    once `TELEMETRY_MAX_FLUSH_FAILURES` writes in a row have failed.
+
+    Browsers cannot set headers on websockets, and the query string of the URL
+    ends up in the access logs, so the first message authenticates the
+    websocket instead of the headers used by the REST API:
+        {"token": <access token>, "organization": <organization shortcode>}
+    The websocket is closed if the token is not valid or the session does not
+    belong to its user.
+
+    Every later message is a JSON object with any of the keys:
+        events: a list of at most `TELEMETRY_MESSAGE_MAX_EVENTS` events, each
+            with the fields of an event but the session
+        session: the new values of any of the session's telemetry fields
+    Each message is answered with `{"status": "ok"}` or with the errors of the
+    message, in which case nothing from it is buffered.
+    """
+
+    async def connect(self):
+        self.session_id = self.scope["url_route"]["kwargs"]["session_id"]
+        self.organization = None
+        self.is_authenticated = False
+        self.events = []
+        self.session_updates = {}
+        self.flush_task = None
+        self.num_failed_flushes = 0
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if self.flush_task is None:
+            return
+        self.flush_task.cancel()
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception(
+                "Could not write the telemetry of session %s", self.session_id
+            )
+
+    async def authenticate(self, content):
+        """Authenticates the websocket with its first message"""
+        session = None
+        if isinstance(content, dict):
+            token = content.get("token")
+            shortcode = content.get("organization", DEFAULT_TENANT_SHORTCODE)
+            if isinstance(token, str) and isinstance(shortcode, str):
+                session, self.organization = await database_sync_to_async(
+                    get_telemetry_session
+                )(token, shortcode, self.session_id)
+
+        if session is None:
+            await self.send_json({"errors": ["invalid access token or session"]})
+            await self.close(code=UNAUTHORIZED_CLOSE_CODE)
+            return
+
+        self.is_authenticated = True
+        await self.send_json({"status": "ok"})
+        self.flush_task = asyncio.create_task(self.flush_periodically())
+
+    async def receive_json(self, content):
+        if not self.is_authenticated:
+            await self.authenticate(content)
+            return
+
+        if not isinstance(content, dict):
+            await self.send_json({"errors": ["a JSON object is expected"]})
+            return
+
+        events = content.get("events", [])
+        if not isinstance(events, list):
+            await self.send_json({"errors": {"events": ["a list is expected"]}})
+            return
+        if len(events) > TELEMETRY_MESSAGE_MAX_EVENTS:
+            await self.send_json(
+                {
+                    "errors": {
+                        "events": [
+                            f"at most {TELEMETRY_MESSAGE_MAX_EVENTS} events can be sent"
+                        ]
+                    }
+                }
+            )
+            return
+
+        serializers = [
+            EventBatchItemSerializer(data={**event, "session": self.session_id})
+            if isinstance(event, dict)
+            else EventBatchItemSerializer(data=event)
+            for event in events
+        ]
+        session_serializer = SessionTelemetrySerializer(
+            data=content.get("session", {}), partial=True
+        )
+
+        errors = {}
+        event_errors = [
+            serializer.errors if not serializer.is_valid() else {}
+            for serializer in serializers
+        ]
+        if any(event_errors):
+            errors["events"] = event_errors
+        if not session_serializer.is_valid():
+            errors["session"] = session_serializer.errors
+        if errors:
+            await self.send_json({"errors": errors})
+            return
+
+        for serializer in serializers:
+            event = dict(serializer.validated_data)
+            del event["session_id"]
+            self.events.append(event)
+        self.session_updates.update(session_serializer.validated_data)
+        await self.send_json({"status": "ok"})
+
+        if len(self.events) >= TELEMETRY_FLUSH_SIZE:
+            await self.flush_or_close()
+
+    async def flush_periodically(self):
+        while True:
+            await asyncio.sleep(TELEMETRY_FLUSH_INTERVAL)
+            if not await self.flush_or_close():
+                return
+
+    async def flush_or_close(self):
+        """
+        Flushes the buffered telemetry, logging the error if it fails, and
+        closes the websocket if too many flushes in a row have failed.
+        Returns whether the websocket is still open.
+        """
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception(
+                "Could not write the telemetry of session %s", self.session_id
+            )
+            self.num_failed_flushes += 1
+            if self.num_failed_flushes >= TELEMETRY_MAX_FLUSH_FAILURES:
+                await self.close(code=INTERNAL_ERROR_CLOSE_CODE)
+                return False
+        else:
+            self.num_failed_flushes = 0
+        return True
+
+    async def flush(self):
+        """Writes the buffered telemetry to the database and empties the buffer"""
+        if not self.events and not self.session_updates:
+            return
+
+        # a new buffer is started before writing, so that messages received
+        # during the write are kept for the next flush
+        events, self.events = self.events, []
+        updates, self.session_updates = self.session_updates, {}
+        try:
+            await database_sync_to_async(write_session_telemetry)(
+                self.organization, self.session_id, events, updates
+            )
+        except Exception:
+            # the telemetry is kept to be written with the next flush
+            self.events = events + self.events
+            self.session_updates = {**updates, **self.session_updates}
+            raise
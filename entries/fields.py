@@ -0,0 +1,34 @@
+from django.db import models
+
+from entries.retention import decode_retention, encode_retention
+
+
+class RetentionField(models.TextField):
+    """
+    Stores a retention string as compact bytes (see `entries.retention`).
+
+    Everything above the database (the model, serializers, admin) keeps seeing
+    the comma-separated string that the API exchanges, while raw queries read
+    the encoded bytes and can decode many of them at once.
+    """
+
+    description = "Retention of a session, stored as compact bytes"
+
+    def get_internal_type(self):
+        return "BinaryField"
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return decode_retention(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decode_retention(value)
+        return super().to_python(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value is None:
+            return value
+        return connection.Database.Binary(encode_retention(value))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_tenant_model, schema_context
+
+from entries.viewers import recount_unique_viewers
+from plio.models import Plio
+
+# number of plios whose viewers are recounted with each query
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Rebuilds and recounts the unique viewers of every plio from its sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--schema",
+            action="append",
+            dest="schemas",
+            help="Only recount the plios in this schema (can be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        schemas = options["schemas"]
+        if not schemas:
+            schemas = ["public"] + list(
+                get_tenant_model()
+                .objects.exclude(schema_name="public")
+                .values_list("schema_name", flat=True)
+            )
+
+        for schema in schemas:
+            with schema_context(schema):
+                plio_ids = list(
+                    Plio.all_objects.order_by("id").values_list("id", flat=True)
+                )
+                for start in range(0, len(plio_ids), BATCH_SIZE):
+                    recount_unique_viewers(plio_ids[start : start + BATCH_SIZE])
+                print(f"Recounted the viewers of {len(plio_ids)} plio(s) in {schema}")
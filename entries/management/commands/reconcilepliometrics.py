@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_tenant_model, schema_context
+
+from entries.metrics import rebuild_plio_metrics
+from plio.models import Plio
+
+
+class Command(BaseCommand):
+    help = "Recomputes the stored metrics of every plio from its sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--schema",
+            action="append",
+            dest="schemas",
+            help="Only reconcile the plios in this schema (can be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        schemas = options["schemas"]
+        if not schemas:
+            schemas = ["public"] + list(
+                get_tenant_model()
+                .objects.exclude(schema_name="public")
+                .values_list("schema_name", flat=True)
+            )
+
+        for schema in schemas:
+            with schema_context(schema):
+                plios = Plio.objects.select_related("video")
+                for plio in plios.iterator():
+                    rebuild_plio_metrics(plio)
+                print(f"Reconciled the metrics of {plios.count()} plio(s) in {schema}")
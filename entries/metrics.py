@@ -0,0 +1,190 @@
+import pandas as pd
+from django.db import connection, transaction
+from django.db.models import F
+
+from entries.models import PendingViewerMetrics, PlioMetrics, PlioViewerMetrics
+from plio.analytics import (
+    TOTAL_FIELDS,
+    VIEWER_FIELDS,
+    compute_metric_totals,
+    compute_viewer_metrics,
+    format_plio_metrics,
+)
+from plio.models import Question
+from plio.queries import (
+    get_plio_viewer_sessions_query,
+    get_plio_viewer_responses_query,
+)
+
+
+def get_video_duration(plio):
+    return plio.video.duration if plio.video_id else None
+
+
+def fetch_viewer_metrics(plio_id: int, video_duration, user_ids=None):
+    """
+    Computes the metrics of each viewer (or of the given viewers) of the plio
+    from their most recent session.
+    """
+    schema = connection.schema_name
+    with connection.cursor() as cursor:
+        cursor.execute(get_plio_viewer_sessions_query(plio_id, schema, user_ids))
+        sessions = cursor.fetchall()
+        responses = []
+        if sessions:
+            cursor.execute(get_plio_viewer_responses_query(plio_id, schema, user_ids))
+            responses = cursor.fetchall()
+
+    return compute_viewer_metrics(
+        sessions, responses, video_duration, get_num_questions(plio_id)
+    )
+
+
+def get_num_questions(plio_id: int):
+    """Number of non-survey questions in the plio"""
+    return Question.objects.filter(item__plio=plio_id, survey=False).count()
+
+
+@transaction.atomic
+def rebuild_plio_metrics(plio):
+    """
+    Recomputes the metrics of the plio from every viewer's most recent session
+    and replaces whatever was stored for the plio.
+    """
+    PlioMetrics.objects.get_or_create(plio=plio)
+    plio_metrics = PlioMetrics.objects.select_for_update().get(plio=plio)
+    # every viewer is recomputed below; deleting waits for the writes that are
+    # still queueing a viewer, so that their sessions are seen
+    PendingViewerMetrics.objects.filter(plio=plio).delete()
+
+    video_duration = get_video_duration(plio)
+    viewers = fetch_viewer_metrics(plio.id, video_duration)
+
+    PlioViewerMetrics.objects.filter(plio=plio).delete()
+    PlioViewerMetrics.objects.bulk_create(
+        [
+            PlioViewerMetrics(plio=plio, **viewer)
+            for viewer in viewers.to_dict("records")
+        ],
+        batch_size=1000,
+    )
+
+    for field, value in compute_metric_totals(viewers).items():
+        setattr(plio_metrics, field, value)
+    plio_metrics.video_duration = video_duration
+    plio_metrics.is_stale = False
+    plio_metrics.save()
+    return plio_metrics
+
+
+def queue_viewer_metrics_update(plio_id: int, user_id: int):
+    """
+    Records that the contribution of a viewer to the metrics of a plio has to be
+    brought up to date, which happens the next time the metrics are read (see
+    `apply_pending_viewer_metrics`). Repeated changes for the same viewer are
+    coalesced into one row, and no lock is taken on the totals of the plio.
+    """
+    # on a conflict the row is updated rather than left alone, so that it stays
+    # locked until the write that queued it commits (see
+    # `apply_pending_viewer_metrics`)
+    PendingViewerMetrics.objects.bulk_create(
+        [PendingViewerMetrics(plio_id=plio_id, user_id=user_id)],
+        update_conflicts=True,
+        unique_fields=["plio", "user"],
+        update_fields=["updated_at"],
+    )
+
+
+@transaction.atomic
+def apply_pending_viewer_metrics(plio_metrics):
+    """
+    Brings the stored metrics of a plio up to date with the most recent session
+    of each viewer queued for it by applying the change in those viewers'
+    contributions.
+
+    :param plio_metrics: the stored metrics of the plio, which must not be stale
+    :type plio_metrics: PlioMetrics
+    :return: the updated metrics
+    :rtype: PlioMetrics
+    """
+    plio_id = plio_metrics.plio_id
+    # only readers of the metrics of this plio wait on each other here
+    plio_metrics = PlioMetrics.objects.select_for_update().get(id=plio_metrics.id)
+
+    # locking the queued rows waits for the writes that are still queueing the
+    # same viewers, so the sessions fetched below include theirs
+    pending = PendingViewerMetrics.objects.select_for_update().filter(plio_id=plio_id)
+    pending = dict(pending.values_list("id", "user_id"))
+    if not pending:
+        return plio_metrics
+    PendingViewerMetrics.objects.filter(id__in=pending.keys()).delete()
+    user_ids = tuple(set(pending.values()))
+
+    viewer_metrics = PlioViewerMetrics.objects.filter(
+        plio_id=plio_id, user_id__in=user_ids
+    )
+    previous = pd.DataFrame(
+        list(viewer_metrics.values(*VIEWER_FIELDS)), columns=VIEWER_FIELDS
+    )
+    current = fetch_viewer_metrics(plio_id, plio_metrics.video_duration, user_ids)
+
+    old = compute_metric_totals(previous)
+    new = compute_metric_totals(current)
+    PlioMetrics.objects.filter(id=plio_metrics.id).update(
+        **{field: F(field) + (new[field] - old[field]) for field in TOTAL_FIELDS}
+    )
+
+    viewer_metrics.delete()
+    PlioViewerMetrics.objects.bulk_create(
+        [
+            PlioViewerMetrics(plio_id=plio_id, **viewer)
+            for viewer in current.to_dict("records")
+        ],
+        batch_size=1000,
+    )
+    plio_metrics.refresh_from_db()
+    return plio_metrics
+
+
+def mark_plio_metrics_stale(plio_ids):
+    """Makes the metrics of the given plios get rebuilt on their next read"""
+    PlioMetrics.objects.filter(plio_id__in=plio_ids).update(is_stale=True)
+
+
+def get_plio_metrics(plio):
+    """
+    Returns the stored metrics of the plio, building them first if they are
+    missing, stale or were computed against a different video duration, and
+    applying the changes of the viewers queued since they were last read.
+    """
+    plio_metrics = PlioMetrics.objects.filter(plio=plio).first()
+    if (
+        plio_metrics is None
+        or plio_metrics.is_stale
+        or plio_metrics.video_duration != get_video_duration(plio)
+    ):
+        return rebuild_plio_metrics(plio)
+    if PendingViewerMetrics.objects.filter(plio=plio).exists():
+        plio_metrics = apply_pending_viewer_metrics(plio_metrics)
+    return plio_metrics
+
+
+def serialize_plio_metrics(plio, plio_metrics, has_questions, has_survey_question):
+    """
+    Turns the stored totals of a plio into the response of the metrics endpoint.
+
+    :param plio: The plio the metrics belong to
+    :type plio: Plio
+    :param plio_metrics: The stored totals for the plio
+    :type plio_metrics: PlioMetrics
+    :param has_questions: whether the plio has any questions at all
+    :type has_questions: bool
+    :param has_survey_question: whether any of the plio's questions is a survey question
+    :type has_survey_question: bool
+    """
+    return format_plio_metrics(
+        {field: getattr(plio_metrics, field) for field in TOTAL_FIELDS},
+        get_video_duration(plio),
+        has_questions=has_questions,
+        has_survey_question=has_survey_question,
+    )
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.14 on 2026-10-17 21:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "entries",
+            "0029_event_deleted_by_cascade_session_deleted_by_cascade_and_more",
+        ),
+        ("plio", "0032_image_deleted_by_cascade_item_deleted_by_cascade_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlioMetrics",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("video_duration", models.FloatField(null=True)),
+                ("num_viewers", models.IntegerField(default=0)),
+                ("watch_time_sum", models.FloatField(default=0)),
+                ("num_valid_retention", models.IntegerField(default=0)),
+                ("num_one_minute_retained", models.IntegerField(default=0)),
+                ("num_responders", models.IntegerField(default=0)),
+                ("num_answered_sum", models.IntegerField(default=0)),
+                ("num_answering", models.IntegerField(default=0)),
+                ("accuracy_sum", models.FloatField(default=0)),
+                ("num_completed", models.IntegerField(default=0)),
+                ("is_stale", models.BooleanField(default=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "plio",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, to="plio.plio"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "plio_metrics",
+            },
+        ),
+        migrations.CreateModel(
+            name="PlioViewerMetrics",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("watch_time", models.FloatField(default=0)),
+                ("is_retention_valid", models.BooleanField(default=False)),
+                ("is_retained_one_minute", models.BooleanField(default=False)),
+                ("num_responses", models.IntegerField(default=0)),
+                ("num_answered", models.IntegerField(default=0)),
+                ("num_correct", models.IntegerField(default=0)),
+                ("is_completed", models.BooleanField(default=False)),
+                (
+                    "plio",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="plio.plio"
+                    ),
+                ),
+                (
+                    "session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="entries.session",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "plio_viewer_metrics",
+                "unique_together": {("plio", "user")},
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+import entries.fields
+
+# number of sessions converted at a time
+BATCH_SIZE = 2000
+
+
+def copy_retention(apps, source: str, target: str):
+    """
+    Copies the retention of every session (including the soft-deleted ones)
+    from one field to the other. Both fields hold the retention string, so the
+    encoding or decoding happens as the target field is saved.
+    """
+    Session = apps.get_model("entries", "Session")
+    sessions = Session.objects.only("id", source).order_by("id")
+
+    batch = []
+    for session in sessions.iterator(chunk_size=BATCH_SIZE):
+        setattr(session, target, getattr(session, source))
+        batch.append(session)
+        if len(batch) == BATCH_SIZE:
+            Session.objects.bulk_update(batch, [target])
+            batch = []
+    if batch:
+        Session.objects.bulk_update(batch, [target])
+
+
+def encode_retention(apps, schema_editor):
+    copy_retention(apps, "retention", "encoded_retention")
+
+
+def decode_retention(apps, schema_editor):
+    copy_retention(apps, "encoded_retention", "retention")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entries", "0030_plio_metrics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="session",
+            name="encoded_retention",
+            field=entries.fields.RetentionField(default=""),
+        ),
+        migrations.RunPython(encode_retention, decode_retention),
+        migrations.RemoveField(
+            model_name="session",
+            name="retention",
+        ),
+        migrations.RenameField(
+            model_name="session",
+            old_name="encoded_retention",
+            new_name="retention",
+        ),
+    ]
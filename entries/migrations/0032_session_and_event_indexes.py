@@ -0,0 +1,29 @@
+# Generated by Django 5.2.14 on 2026-10-17 21:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entries", "0031_session_compact_retention"),
+        ("experiments", "0013_experiment_deleted_by_cascade_and_more"),
+        ("plio", "0032_image_deleted_by_cascade_item_deleted_by_cascade_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["session", "-updated_at"], name="event_session_467486_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["plio", "user"], name="session_plio_id_0b52ac_idx"
+            ),
+        ),
+    ]
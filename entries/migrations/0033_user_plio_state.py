@@ -0,0 +1,98 @@
+# Generated by Django 5.2.14 on 2026-10-17 21:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# the most recent event of every user-plio pair, from its latest (non-deleted)
+# session with any (non-deleted) events
+BACKFILL_USER_PLIO_STATE = """
+    INSERT INTO user_plio_state (
+        user_id,
+        plio_id,
+        last_event_id,
+        last_event_session_id,
+        last_event_updated_at,
+        last_event_player_time,
+        updated_at
+    )
+    SELECT DISTINCT ON (session.user_id, session.plio_id)
+        session.user_id,
+        session.plio_id,
+        event.id,
+        event.session_id,
+        event.updated_at,
+        event.player_time,
+        NOW()
+    FROM event
+    INNER JOIN session ON session.id = event.session_id
+    WHERE event.deleted IS NULL AND session.deleted IS NULL
+    ORDER BY
+        session.user_id,
+        session.plio_id,
+        event.session_id DESC,
+        event.updated_at DESC,
+        event.id DESC
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entries", "0032_session_and_event_indexes"),
+        ("plio", "0032_image_deleted_by_cascade_item_deleted_by_cascade_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserPlioState",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_event_updated_at", models.DateTimeField()),
+                ("last_event_player_time", models.FloatField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "last_event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="entries.event"
+                    ),
+                ),
+                (
+                    "last_event_session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="entries.session",
+                    ),
+                ),
+                (
+                    "plio",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="plio.plio"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "user_plio_state",
+                "unique_together": {("user", "plio")},
+            },
+        ),
+        migrations.RunSQL(BACKFILL_USER_PLIO_STATE, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.14 on 2026-10-17 22:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entries", "0033_user_plio_state"),
+        ("plio", "0035_plio_search_trgm_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingViewerMetrics",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "plio",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="plio.plio"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "pending_viewer_metrics",
+                "unique_together": {("plio", "user")},
+            },
+        ),
+    ]
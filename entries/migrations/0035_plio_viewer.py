@@ -0,0 +1,58 @@
+# Generated by Django 5.2.14 on 2026-10-17 22:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# the users with a (non-deleted) session of each plio
+BACKFILL_PLIO_VIEWERS = """
+    INSERT INTO plio_viewer (plio_id, user_id)
+    SELECT DISTINCT plio_id, user_id
+    FROM session
+    WHERE deleted IS NULL
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entries", "0034_pending_viewer_metrics"),
+        ("plio", "0035_plio_search_trgm_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlioViewer",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "plio",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="plio.plio"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "plio_viewer",
+                "unique_together": {("plio", "user")},
+            },
+        ),
+        migrations.RunSQL(BACKFILL_PLIO_VIEWERS, migrations.RunSQL.noop),
+    ]
@@ -1,9 +1,14 @@
+from bisect import bisect_left
+from collections import defaultdict
+
 from django.conf import settings
 from django.db import models
+from django.db.models import F, Q
 from plio.models import Plio, Item
 from experiments.models import Experiment
 from safedelete.models import SafeDeleteModel, SOFT_DELETE_CASCADE
 from entries.config import event_type_choices
+from entries.fields import RetentionField
 
 
 class Session(SafeDeleteModel):
@@ -12,7 +17,7 @@ class Session(SafeDeleteModel):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING)
     plio = models.ForeignKey(Plio, on_delete=models.CASCADE)
     experiment = models.ForeignKey(Experiment, on_delete=models.DO_NOTHING, null=True)
-    retention = models.TextField(default="")
+    retention = RetentionField(default="")
     watch_time = models.FloatField(default=0)
     has_video_played = models.BooleanField(default=False)
     is_first = models.BooleanField(default=False)
@@ -22,6 +27,7 @@ class Session(SafeDeleteModel):
     class Meta:
         db_table = "session"
         ordering = ["-id"]
+        indexes = [models.Index(fields=["plio", "user"])]
 
     @property
     def last_session(self):
@@ -35,25 +41,89 @@ class Session(SafeDeleteModel):
 
     @property
     def last_global_event(self):
-        """Returns the most recent event tied to a particular user-plio pair"""
-        # find the most recent event for this session
-        current_last_event = self.event_set.first()
-        if current_last_event:
-            return current_last_event
-
-        # if there are no events in this session, find the most recent event in
-        # the past sessions
-
-        if not self.last_session:
-            # this is the first session for the user-plio pair - no last event
-            return None
-
-        # either return the most recent event tied to the last session or
-        # the last_event property of the last session in case no new events are
-        # tied to the last session
-        return (
-            self.last_session.event_set.first() or self.last_session.last_global_event
+        """
+        Returns the most recent event tied to a particular user-plio pair: the
+        latest event of this session or, if there is none, of the nearest
+        earlier session of the pair that has any events
+        """
+        # set when the last events of many sessions are prefetched together
+        if hasattr(self, "_last_global_event"):
+            return self._last_global_event
+
+        # the last event of the pair is the last event of this session too,
+        # unless it belongs to a later session
+        state = (
+            UserPlioState.objects.select_related("last_event")
+            .filter(plio_id=self.plio_id, user_id=self.user_id)
+            .first()
+        )
+        if state is not None and state.last_event_session_id <= self.id:
+            return state.last_event
+        return get_last_global_events([self])[self.id]
+
+
+def get_last_global_events(sessions):
+    """
+    Returns the `last_global_event` of each of the given sessions, keyed by
+    session id, using a single query for all of them.
+
+    The latest event of every session of the sessions' user-plio pairs is
+    fetched at once, after which each session takes its own latest event or
+    else the one of the nearest earlier session of its pair that has any.
+    Deleted sessions are never used as an earlier session.
+    """
+    if not sessions:
+        return {}
+
+    session_ids = [session.id for session in sessions]
+    events = list(
+        Event.objects.filter(
+            session__plio_id__in={session.plio_id for session in sessions},
+            session__user_id__in={session.user_id for session in sessions},
+            session_id__lte=max(session_ids),
+        )
+        .filter(Q(session__deleted__isnull=True) | Q(session_id__in=session_ids))
+        .annotate(
+            session_plio_id=F("session__plio_id"),
+            session_user_id=F("session__user_id"),
+            session_deleted=F("session__deleted"),
+        )
+        # the latest event of each session
+        .order_by("session_id", "-updated_at", "-id")
+        .distinct("session_id")
+    )
+    latest_events = {event.session_id: event for event in events}
+
+    # the ids of the (non-deleted) sessions with events of each user-plio pair,
+    # in increasing order
+    event_session_ids = defaultdict(list)
+    for event in events:
+        if event.session_deleted is None:
+            pair = (event.session_plio_id, event.session_user_id)
+            event_session_ids[pair].append(event.session_id)
+
+    last_events = {}
+    for session in sessions:
+        if session.id in latest_events:
+            last_events[session.id] = latest_events[session.id]
+            continue
+
+        earlier_session_ids = event_session_ids[(session.plio_id, session.user_id)]
+        index = bisect_left(earlier_session_ids, session.id)
+        last_events[session.id] = (
+            latest_events[earlier_session_ids[index - 1]] if index else None
         )
+    return last_events
+
+
+def prefetch_last_global_events(sessions):
+    """
+    Resolves the `last_global_event` of all of the given sessions with one
+    query, so that reading it does not query the database once per session.
+    """
+    last_events = get_last_global_events(sessions)
+    for session in sessions:
+        session._last_global_event = last_events[session.id]
 
 
 class SessionAnswer(SafeDeleteModel):
@@ -83,3 +153,111 @@ class Event(SafeDeleteModel):
     class Meta:
         db_table = "event"
         ordering = ["-updated_at"]
+        indexes = [models.Index(fields=["session", "-updated_at"])]
+
+
+class PlioViewerMetrics(models.Model):
+    """
+    What the most recent session of one viewer of a plio contributes to the
+    plio's metrics. Kept so that the plio's aggregate can be updated by the
+    difference whenever the viewer's session or answers change.
+    """
+
+    plio = models.ForeignKey(Plio, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING)
+    session = models.ForeignKey(Session, on_delete=models.DO_NOTHING)
+    watch_time = models.FloatField(default=0)
+    is_retention_valid = models.BooleanField(default=False)
+    is_retained_one_minute = models.BooleanField(default=False)
+    num_responses = models.IntegerField(default=0)
+    num_answered = models.IntegerField(default=0)
+    num_correct = models.IntegerField(default=0)
+    is_completed = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = "plio_viewer_metrics"
+        unique_together = ["plio", "user"]
+
+
+class PendingViewerMetrics(models.Model):
+    """
+    A viewer of a plio whose contribution to the plio's metrics is yet to be
+    brought up to date. Recorded as sessions and answers are written, and
+    applied the next time the plio's metrics are read, so that a write only
+    ever touches the row of its own viewer instead of the totals of the plio.
+    """
+
+    plio = models.ForeignKey(Plio, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "pending_viewer_metrics"
+        unique_together = ["plio", "user"]
+
+
+class PlioViewer(models.Model):
+    """
+    A user with a (non-deleted) session of a plio, counted once however many
+    sessions they have, so that `Plio.unique_viewers` is only incremented when
+    a new row is inserted (see `entries.viewers`).
+    """
+
+    plio = models.ForeignKey(Plio, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING)
+
+    class Meta:
+        db_table = "plio_viewer"
+        unique_together = ["plio", "user"]
+
+
+class PlioMetrics(models.Model):
+    """
+    Running totals over the most recent session of every viewer of a plio,
+    from which the metrics of the plio are read.
+    """
+
+    plio = models.OneToOneField(Plio, on_delete=models.CASCADE)
+    # the video duration the retention of each viewer was checked against
+    video_duration = models.FloatField(null=True)
+    num_viewers = models.IntegerField(default=0)
+    watch_time_sum = models.FloatField(default=0)
+    num_valid_retention = models.IntegerField(default=0)
+    num_one_minute_retained = models.IntegerField(default=0)
+    # viewers with at least one response to a non-survey question
+    num_responders = models.IntegerField(default=0)
+    num_answered_sum = models.IntegerField(default=0)
+    # viewers who answered at least one non-survey question
+    num_answering = models.IntegerField(default=0)
+    # sum of the fraction of answered questions that each viewer got right
+    accuracy_sum = models.FloatField(default=0)
+    num_completed = models.IntegerField(default=0)
+    # set when the plio's questions change; the totals are rebuilt on next read
+    is_stale = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "plio_metrics"
+
+
+class UserPlioState(models.Model):
+    """
+    The most recent event of a user-plio pair, i.e. where the user is to resume
+    the plio from. Kept up to date as events are written so that resuming a
+    plio does not need to look through the events of every earlier session.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING)
+    plio = models.ForeignKey(Plio, on_delete=models.CASCADE)
+    last_event = models.ForeignKey(Event, on_delete=models.CASCADE)
+    # copied from the last event, to compare it with newer events
+    last_event_session = models.ForeignKey(
+        Session, on_delete=models.CASCADE, related_name="+"
+    )
+    last_event_updated_at = models.DateTimeField()
+    last_event_player_time = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "user_plio_state"
+        unique_together = ["user", "plio"]
@@ -0,0 +1,54 @@
+from django.db import connection
+
+from entries.models import Event, UserPlioState
+from plio.queries import get_user_plio_state_update_query
+
+
+def update_user_plio_state(event_ids):
+    """
+    Moves the last event of the user-plio pairs of the given events to the most
+    recent of them, wherever it is more recent, using a single query.
+    """
+    if not event_ids:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            get_user_plio_state_update_query(event_ids, connection.schema_name)
+        )
+
+
+def rebuild_user_plio_state(plio_id: int, user_id: int):
+    """
+    Recomputes the last event of a user-plio pair from its events, removing the
+    pair's state if none of its sessions has any events left.
+    """
+    last_event = (
+        Event.objects.filter(
+            session__plio_id=plio_id,
+            session__user_id=user_id,
+            session__deleted__isnull=True,
+        )
+        .order_by("-session_id", "-updated_at", "-id")
+        .first()
+    )
+    if last_event is None:
+        UserPlioState.objects.filter(plio_id=plio_id, user_id=user_id).delete()
+        return
+
+    UserPlioState.objects.update_or_create(
+        plio_id=plio_id,
+        user_id=user_id,
+        defaults={
+            "last_event": last_event,
+            "last_event_session_id": last_event.session_id,
+            "last_event_updated_at": last_event.updated_at,
+            "last_event_player_time": last_event.player_time,
+        },
+    )
+
+
+def rebuild_user_plio_states(states):
+    """Rebuilds the given user-plio states, e.g. after their last event was deleted"""
+    for state in states.values("plio_id", "user_id"):
+        rebuild_user_plio_state(state["plio_id"], state["user_id"])
@@ -0,0 +1,194 @@
+"""
+Compact binary encoding of the retention of a session.
+
+The retention of a session holds how many times each second of the video has
+been watched. The API exchanges it as a comma-separated string ("0,1,1,NaN"),
+while the database stores it as bytes: a tag for the format in the first byte,
+followed by the values in that format. "NaN" values are stored as the largest
+value of the format's dtype.
+
+The encoding is lossless: a string that cannot be reproduced exactly from its
+values (e.g. "01,1" or anything that is not a list of counters) is stored as
+utf-8 text instead, so decoding always gives back the string that was stored.
+"""
+import numpy as np
+
+# formats of the encoded retention, stored in its first byte
+RETENTION_TEXT = 0
+# one unsigned byte per second
+RETENTION_UINT8 = 1
+# two little-endian bytes per second
+RETENTION_UINT16 = 2
+# (value, number of seconds) pairs of little-endian uint16, for runs of values
+RETENTION_RUNS = 3
+
+RETENTION_DTYPES = {
+    RETENTION_UINT8: np.dtype("u1"),
+    RETENTION_UINT16: np.dtype("<u2"),
+    RETENTION_RUNS: np.dtype("<u2"),
+}
+
+
+def get_missing_value(dtype: np.dtype):
+    """The value standing in for "NaN" in the given dtype"""
+    return np.iinfo(dtype).max
+
+
+def parse_counters(retention: str):
+    """
+    Returns the values of the retention string as an array of ints with -1 in
+    place of "NaN", or None if the string is not made up of counters that the
+    encoding can hold.
+    """
+    values = np.array(retention.split(","))
+    is_missing = values == "NaN"
+    if not np.char.isdigit(values[~is_missing]).all():
+        return None
+
+    counters = np.full(len(values), -1, dtype=np.int64)
+    try:
+        counters[~is_missing] = values[~is_missing].astype(np.int64)
+    except (ValueError, OverflowError):
+        return None
+    if counters.max(initial=-1) >= get_missing_value(
+        RETENTION_DTYPES[RETENTION_UINT16]
+    ):
+        return None
+    return counters
+
+
+def format_counters(counters: np.ndarray):
+    """The retention string for the given ints, with -1 in place of "NaN" """
+    values = counters.astype(str)
+    values[counters < 0] = "NaN"
+    return ",".join(values)
+
+
+def pack_counters(tag: int, counters: np.ndarray):
+    dtype = RETENTION_DTYPES[tag]
+    counters = np.where(counters < 0, get_missing_value(dtype), counters)
+    return bytes([tag]) + counters.astype(dtype).tobytes()
+
+
+def encode_retention(retention: str) -> bytes:
+    """
+    Returns the most compact encoding of the given retention string.
+
+    :param retention: comma-separated retention string, e.g. "0,1,0"
+    :type retention: str
+    """
+    if not retention:
+        return b""
+
+    counters = parse_counters(retention)
+    if counters is None or format_counters(counters) != retention:
+        return bytes([RETENTION_TEXT]) + retention.encode("utf-8")
+
+    if counters.max() < get_missing_value(RETENTION_DTYPES[RETENTION_UINT8]):
+        encodings = [pack_counters(RETENTION_UINT8, counters)]
+    else:
+        encodings = [pack_counters(RETENTION_UINT16, counters)]
+
+    # learners mostly watch long stretches of the video the same number of
+    # times, so the values usually come in a handful of runs
+    starts = np.flatnonzero(np.r_[True, counters[1:] != counters[:-1]])
+    lengths = np.diff(np.r_[starts, len(counters)])
+    if lengths.max() <= np.iinfo(RETENTION_DTYPES[RETENTION_RUNS]).max:
+        runs = np.column_stack([counters[starts], lengths]).ravel()
+        encodings.append(pack_counters(RETENTION_RUNS, runs))
+
+    return min(encodings, key=len)
+
+
+def get_retention_format(encoded: bytes):
+    """The format tag of the encoded retention, or None if it is empty"""
+    return encoded[0] if encoded else None
+
+
+def decode_retention(encoded: bytes) -> str:
+    """
+    Returns the retention string that was encoded with `encode_retention`.
+
+    :param encoded: the retention as stored in the database
+    :type encoded: bytes
+    """
+    encoded = bytes(encoded)
+    retention_format = get_retention_format(encoded)
+    if retention_format is None:
+        return ""
+    if retention_format == RETENTION_TEXT:
+        return encoded[1:].decode("utf-8")
+
+    values = decode_retention_values([encoded], retention_format)[0]
+    return format_counters(np.nan_to_num(values, nan=-1).astype(np.int64))
+
+
+def get_payload(encoded: list, retention_format: int):
+    """The values of all the given encoded retentions, one after the other"""
+    dtype = RETENTION_DTYPES[retention_format]
+    return np.frombuffer(b"".join(value[1:] for value in encoded), dtype=dtype)
+
+
+def decode_retention_runs(encoded: list):
+    """
+    Returns the runs of the given encoded retentions, all of which are stored
+    as runs, as three arrays: the value and the length of every run, one
+    retention after the other, and the number of runs of each retention.
+    """
+    runs = get_payload(encoded, RETENTION_RUNS)
+    num_runs = np.fromiter(
+        ((len(value) - 1) // 4 for value in encoded), dtype=np.int64, count=len(encoded)
+    )
+    return runs[::2], runs[1::2].astype(np.int64), num_runs
+
+
+def decode_retention_counters(encoded: list, retention_format: int):
+    """
+    Returns the values of the given encoded retentions, all of which are in the
+    given format and hold the same number of seconds, as a 2D array with one
+    row per retention. "NaN" values are left as the missing value of the dtype.
+    """
+    if retention_format == RETENTION_RUNS:
+        values, lengths, _ = decode_retention_runs(encoded)
+        counters = np.repeat(values, lengths)
+    else:
+        counters = get_payload(encoded, retention_format)
+    return counters.reshape(len(encoded), -1)
+
+
+def count_retention_values(encoded: list, retention_format: int):
+    """
+    Returns the number of seconds held by each of the given encoded retentions,
+    all of which are in the given (binary) format.
+    """
+    if not len(encoded):
+        return np.zeros(0, dtype=np.int64)
+
+    if retention_format == RETENTION_RUNS:
+        _, lengths, num_runs = decode_retention_runs(encoded)
+        starts = np.r_[0, np.cumsum(num_runs)[:-1]]
+        return np.add.reduceat(lengths, starts)
+
+    itemsize = RETENTION_DTYPES[retention_format].itemsize
+    return np.fromiter(
+        ((len(value) - 1) // itemsize for value in encoded),
+        dtype=np.int64,
+        count=len(encoded),
+    )
+
+
+def decode_retention_values(encoded: list, retention_format: int):
+    """
+    Decodes the given encoded retentions, all of which are in the given
+    (binary) format and hold the same number of seconds, into a 2D array of
+    floats with one row per retention and NaN in place of "NaN".
+
+    :param encoded: the retentions as stored in the database
+    :type encoded: list
+    :param retention_format: the format tag shared by all of the retentions
+    :type retention_format: int
+    """
+    counters = decode_retention_counters(encoded, retention_format)
+    numbers = counters.astype(float)
+    numbers[counters == get_missing_value(counters.dtype)] = np.nan
+    return numbers
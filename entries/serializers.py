@@ -1,12 +1,28 @@
+from django.db import models, transaction
 from rest_framework import serializers
+from entries.metrics import queue_viewer_metrics_update
 from plio.models import Item, Video
 from plio.serializers import PlioSerializer
-from entries.models import Session, SessionAnswer, Event
+from entries.models import (
+    Session,
+    SessionAnswer,
+    Event,
+    prefetch_last_global_events,
+)
 from experiments.serializers import ExperimentSerializer
 from users.serializers import UserSerializer
 from users.models import User
 
 
+class SessionListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        sessions = list(data.all() if isinstance(data, models.Manager) else data)
+        # resolve the last event of all the sessions together instead of once
+        # for every session
+        prefetch_last_global_events(sessions)
+        return super().to_representation(sessions)
+
+
 class SessionSerializer(serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(), default=serializers.CurrentUserDefault()
@@ -14,6 +30,7 @@ class SessionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Session
+        list_serializer_class = SessionListSerializer
         fields = [
             "id",
             "retention",
@@ -65,9 +82,14 @@ class SessionSerializer(serializers.ModelSerializer):
 
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         """
         Create and return a new `Session` instance, given the validated data.
+
+        The session and all of its session answers are created in a single
+        transaction, using the same number of queries irrespective of the
+        number of items in the plio.
         """
 
         # fetch all past sessions for this user-plio combination
@@ -77,7 +99,6 @@ class SessionSerializer(serializers.ModelSerializer):
             .first()
         )
         if last_session:
-            last_session_data = SessionSerializer(last_session).data
             # add values for missing keys from the most recent session
             keys_to_check = [
                 "retention",
@@ -87,33 +108,28 @@ class SessionSerializer(serializers.ModelSerializer):
             ]
             for key in keys_to_check:
                 if key not in validated_data:
-                    validated_data[key] = last_session_data[key]
+                    # foreign keys are copied by id, without fetching the object
+                    attname = Session._meta.get_field(key).attname
+                    validated_data[attname] = getattr(last_session, attname)
 
-        # get the newly created session object
-        session = Session.objects.create(**validated_data)
-
-        # will store the values for creating the session answers
-        session_answers = []
+        # get the newly created session object. The viewer is queued for an
+        # update of the plio's metrics once the answers are in (see below),
+        # not when the session is saved
+        session = Session(**validated_data)
+        session.skip_metrics_update = True
+        session.save(force_insert=True)
 
         if last_session:
             # copy last session answers
-            keys_to_copy = ["item", "answer"]
-            last_session_answers = last_session.sessionanswer_set.values(*keys_to_copy)
-
-            for session_answer in last_session_answers:
-                session_answer["session"] = session.id
-                session_answers.append(session_answer)
+            session_answers = list(
+                last_session.sessionanswer_set.values("item_id", "answer")
+            )
+            validate_session_answer_items(session_answers)
 
         else:
             # create new empty session answers
             items = Item.objects.filter(plio_id=validated_data["plio"].id).values("id")
-            for item in items:
-                session_answers.append(
-                    {
-                        "item": item["id"],
-                        "session": session.id,
-                    }
-                )
+            session_answers = [{"item_id": item["id"]} for item in items]
 
             # create new empty retention string
             video_duration = int(
@@ -122,10 +138,17 @@ class SessionSerializer(serializers.ModelSerializer):
             session.retention = ("0," * video_duration)[:-1]
 
         # create the session answers
-        for session_answer in session_answers:
-            serializer = SessionAnswerSerializer(data=session_answer)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
+        SessionAnswer.objects.bulk_create(
+            [
+                SessionAnswer(session=session, **session_answer)
+                for session_answer in session_answers
+            ]
+        )
+        # `bulk_create` does not send `post_save`, which queues the viewer for
+        # an update of the plio's metrics, so it is queued once for the session
+        # and all of its answers
+        queue_viewer_metrics_update(session.plio_id, session.user_id)
+        session.skip_metrics_update = False
 
         return session
 
@@ -137,11 +160,35 @@ class SessionSerializer(serializers.ModelSerializer):
             response["experiment"] = ExperimentSerializer(instance.experiment).data
         response["last_event"] = EventSerializer(instance.last_global_event).data
 
-        # fetch and return all session answers tied to this session
-        response["session_answers"] = instance.sessionanswer_set.values()
+        # return all session answers tied to this session, making use of the
+        # session answers if they have been prefetched
+        response["session_answers"] = [
+            {
+                field.attname: getattr(session_answer, field.attname)
+                for field in SessionAnswer._meta.concrete_fields
+            }
+            for session_answer in instance.sessionanswer_set.all()
+        ]
         return response
 
 
+def validate_session_answer_items(session_answers):
+    """
+    Checks in a single query that the items of all the given session answers
+    exist, raising the same error as `SessionAnswerSerializer` would for the
+    first one that does not.
+    """
+    item_ids = [session_answer["item_id"] for session_answer in session_answers]
+    existing_item_ids = set(
+        Item.objects.filter(id__in=item_ids).values_list("id", flat=True)
+    )
+    for item_id in item_ids:
+        if item_id not in existing_item_ids:
+            raise serializers.ValidationError(
+                {"item": [f'Invalid pk "{item_id}" - object does not exist.']}
+            )
+
+
 class SessionAnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = SessionAnswer
@@ -167,3 +214,34 @@ class EventSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
+
+
+class EventBatchItemSerializer(serializers.ModelSerializer):
+    """
+    Validates one of the events sent together to the batch endpoint. The
+    session is taken as a plain id, as the sessions of all the events are
+    checked together by the view.
+    """
+
+    session = serializers.IntegerField(source="session_id")
+
+    class Meta:
+        model = Event
+        fields = [
+            "type",
+            "player_time",
+            "details",
+            "session",
+        ]
+
+
+class SessionTelemetrySerializer(serializers.ModelSerializer):
+    """Validates the session fields that the player keeps updating while playing"""
+
+    class Meta:
+        model = Session
+        fields = [
+            "retention",
+            "watch_time",
+            "has_video_played",
+        ]
@@ -0,0 +1,85 @@
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from safedelete.signals import post_undelete
+
+from entries.metrics import mark_plio_metrics_stale, queue_viewer_metrics_update
+from entries.models import Event, Session, SessionAnswer, UserPlioState
+from entries.resume import (
+    rebuild_user_plio_state,
+    rebuild_user_plio_states,
+    update_user_plio_state,
+)
+from entries.viewers import add_unique_viewer, recount_unique_viewers
+from plio.models import Item, Question
+
+
+@receiver([post_save, post_delete], sender=Session)
+def session_update_metrics(sender, instance, **kwargs):
+    # set while a session is created along with its answers, which queue the
+    # viewer themselves
+    if getattr(instance, "skip_metrics_update", False):
+        return
+    queue_viewer_metrics_update(instance.plio_id, instance.user_id)
+
+
+@receiver(post_save, sender=Session)
+def session_update_user_plio_state(sender, instance, **kwargs):
+    # the events of a deleted session can no longer be resumed from
+    if instance.deleted is not None:
+        rebuild_user_plio_states(
+            UserPlioState.objects.filter(last_event_session_id=instance.id)
+        )
+
+
+@receiver(post_save, sender=Session)
+def session_update_unique_viewers(sender, instance, created, **kwargs):
+    if created:
+        add_unique_viewer(instance)
+    elif instance.deleted is not None:
+        # the user may have no other session of the plio
+        recount_unique_viewers([instance.plio_id])
+
+
+@receiver([post_undelete, post_delete], sender=Session)
+def session_recount_unique_viewers(sender, instance, **kwargs):
+    recount_unique_viewers([instance.plio_id])
+
+
+@receiver(post_undelete, sender=Session)
+def session_restore_user_plio_state(sender, instance, **kwargs):
+    # the events of a restored session may be more recent than the last event
+    rebuild_user_plio_state(instance.plio_id, instance.user_id)
+
+
+@receiver(post_save, sender=Event)
+def event_update_user_plio_state(sender, instance, **kwargs):
+    # soft deleting an event saves it too
+    if instance.deleted is None:
+        update_user_plio_state([instance.id])
+    else:
+        rebuild_user_plio_states(UserPlioState.objects.filter(last_event=instance))
+
+
+@receiver([post_save, post_delete], sender=SessionAnswer)
+def session_answer_update_metrics(sender, instance, **kwargs):
+    session = (
+        Session.all_objects.filter(id=instance.session_id)
+        .values("plio_id", "user_id")
+        .first()
+    )
+    if session is None:
+        return
+    queue_viewer_metrics_update(session["plio_id"], session["user_id"])
+
+
+@receiver([post_save, post_delete], sender=Item)
+def item_update_metrics(sender, instance, **kwargs):
+    # the questions of the plio changed, so every viewer's contribution may have too
+    mark_plio_metrics_stale([instance.plio_id])
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_update_metrics(sender, instance, **kwargs):
+    # a changed correct answer or survey flag changes how viewers are scored
+    plio_id = Item.all_objects.filter(id=instance.item_id).values("plio_id")
+    mark_plio_metrics_stale(plio_id)
@@ -1,10 +1,17 @@
 import json
+from types import SimpleNamespace
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django_redis import get_redis_connection
 from rest_framework import status
 
 from plio.tests import BaseTestCase
 from plio.models import Plio, Video, Item
-from entries.models import Session
+from entries.models import Session, SessionAnswer, Event
+from experiments.models import Experiment
+from entries.serializers import SessionSerializer
 
 
 class SessionTestCase(BaseTestCase):
@@ -177,6 +184,98 @@ class SessionTestCase(BaseTestCase):
         response = self.client.get(f"/api/v1/sessions/{session_id}/")
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_session_create_queries_do_not_depend_on_number_of_items(self):
+        """
+        Creating a session takes the same number of queries for a plio with a
+        few items as for one with many, whether it starts fresh or carries
+        over the answers of an older session
+        """
+        self.plio.status = "published"
+        self.plio.save()
+        large_plio = Plio.objects.create(
+            name="Plio 2", video=self.video, created_by=self.user, status="published"
+        )
+        for time in range(2):
+            Item.objects.create(type="question", plio=self.plio, time=time)
+        for time in range(12):
+            Item.objects.create(type="question", plio=large_plio, time=time)
+
+        def create_session(plio):
+            serializer = SessionSerializer(
+                data={"plio": plio.id, "user": self.user.id},
+                context={"view": SimpleNamespace(action="create")},
+            )
+            serializer.is_valid(raise_exception=True)
+            with CaptureQueriesContext(connection) as context:
+                session = serializer.save()
+            return session, len(context.captured_queries)
+
+        # fresh sessions
+        with CaptureQueriesContext(connection) as context:
+            session, small_fresh_queries = create_session(self.plio)
+        self.assertEqual(session.sessionanswer_set.count(), 2)
+        # the viewer is queued for a metrics update once, after the answers
+        metrics_updates = [
+            query
+            for query in context.captured_queries
+            if query["sql"].startswith('INSERT INTO "pending_viewer_metrics"')
+        ]
+        self.assertEqual(len(metrics_updates), 1)
+        session, large_fresh_queries = create_session(large_plio)
+        self.assertEqual(session.sessionanswer_set.count(), 12)
+        self.assertEqual(small_fresh_queries, large_fresh_queries)
+
+        # sessions carrying over the answers of the sessions above
+        session, small_carried_queries = create_session(self.plio)
+        self.assertEqual(session.sessionanswer_set.count(), 2)
+        session, large_carried_queries = create_session(large_plio)
+        self.assertEqual(session.sessionanswer_set.count(), 12)
+        self.assertEqual(small_carried_queries, large_carried_queries)
+
+    def test_listing_sessions_queries_do_not_depend_on_number_of_sessions(self):
+        """
+        Listing sessions takes the same number of queries for one session as
+        for many, with the last event of each session resolved together
+        """
+        self.plio.status = "published"
+        self.plio.save()
+        item = Item.objects.create(type="question", plio=self.plio, time=1)
+        experiment = Experiment.objects.create(
+            name="Experiment", description="", created_by=self.user
+        )
+
+        def add_session(**kwargs):
+            session = Session.objects.create(plio=self.plio, user=self.user, **kwargs)
+            SessionAnswer.objects.create(session=session, item=item)
+            return session
+
+        def list_sessions():
+            # start from an empty cache so that every response is built in full
+            get_redis_connection("default").flushdb()
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(reverse("sessions-list"))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return response.data, len(context.captured_queries)
+
+        first_session = add_session()
+        event = Event.objects.create(
+            session=first_session, type="played", player_time=1
+        )
+        sessions, num_queries = list_sessions()
+        self.assertEqual(sessions[0]["last_event"]["id"], event.id)
+
+        # more sessions, with an experiment and without any events of their own
+        add_session(experiment=experiment)
+        add_session()
+        sessions, num_queries_for_more_sessions = list_sessions()
+        self.assertEqual(len(sessions), 3)
+        self.assertEqual(num_queries_for_more_sessions, num_queries)
+
+        # the newer sessions resume from the event of the first session
+        for session in sessions:
+            self.assertEqual(session["last_event"]["id"], event.id)
+            self.assertEqual(len(session["session_answers"]), 1)
+
 
 class SessionAnswerTestCase(BaseTestCase):
     def setUp(self):
@@ -190,7 +289,73 @@ class SessionAnswerTestCase(BaseTestCase):
 class EventTestCase(BaseTestCase):
     def setUp(self):
         super().setUp()
+        # seed a video and a plio
+        self.video = Video.objects.create(
+            title="Video 1",
+            url="https://www.youtube.com/watch?v=vnISjBbrMUM",
+            duration=10,
+        )
+        self.plio = Plio.objects.create(
+            name="Plio", video=self.video, created_by=self.user
+        )
+        # seed a session for each user
+        self.session = Session.objects.create(plio=self.plio, user=self.user)
+        self.session_2 = Session.objects.create(plio=self.plio, user=self.user_2)
 
     def test_for_event(self):
         # write API calls here
         self.assertTrue(True)
+
+    def test_batch_creates_events_and_reports_the_status_of_each(self):
+        events = [
+            {"type": "played", "player_time": 1, "session": self.session.id},
+            # invalid type
+            {"type": "unknown", "player_time": 2, "session": self.session.id},
+            # session of another user
+            {"type": "paused", "player_time": 3, "session": self.session_2.id},
+            {"type": "paused", "player_time": 4, "session": self.session.id},
+        ]
+        response = self.client.post(reverse("events-batch"), events, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+
+        statuses = [result["status"] for result in response.data]
+        self.assertEqual(statuses, [201, 400, 400, 201])
+        self.assertIn("type", response.data[1]["errors"])
+        self.assertIn("session", response.data[2]["errors"])
+
+        created = Event.objects.filter(session=self.session).order_by("id")
+        self.assertEqual(
+            [event.id for event in created],
+            [response.data[0]["id"], response.data[3]["id"]],
+        )
+        self.assertEqual([event.player_time for event in created], [1, 4])
+        self.assertFalse(Event.objects.filter(session=self.session_2).exists())
+
+        # the session resumes from the last event of the batch
+        self.assertEqual(
+            Session.objects.get(id=self.session.id).last_global_event.id,
+            response.data[3]["id"],
+        )
+
+    def test_batch_queries_do_not_depend_on_number_of_events(self):
+        def post_batch(num_events):
+            events = [
+                {"type": "watching", "player_time": time, "session": self.session.id}
+                for time in range(num_events)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(
+                    reverse("events-batch"), events, format="json"
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(context.captured_queries)
+
+        self.assertEqual(post_batch(2), post_batch(20))
+
+    def test_batch_rejects_anything_but_a_list_of_events(self):
+        response = self.client.post(
+            reverse("events-batch"),
+            {"type": "played", "player_time": 1, "session": self.session.id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,53 @@
+from django.db import connection
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from entries.models import PlioViewer, Session
+from plio.models import Plio
+from plio.queries import get_plio_viewers_insert_query, get_unique_viewer_insert_query
+
+
+def add_unique_viewer(session):
+    """
+    Counts the user of a newly created session as a viewer of its plio, unless
+    they are one already, using a single query. The viewer is inserted into
+    `PlioViewer`, whose unique constraint lets only one of many concurrent
+    first sessions of the same user increment the count.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            get_unique_viewer_insert_query(
+                session.plio_id, session.user_id, connection.schema_name
+            )
+        )
+
+
+def recount_unique_viewers(plio_ids):
+    """
+    Rebuilds the viewers of the given plios from their sessions and recounts
+    them, for when a session is deleted or restored (or to correct any drift).
+
+    :param plio_ids: the ids of the plios, or a queryset of them
+    :type plio_ids: list
+    """
+    plio_ids = list(plio_ids)
+    if not plio_ids:
+        return
+
+    sessions = Session.objects.filter(
+        plio_id=OuterRef("plio_id"), user_id=OuterRef("user_id")
+    )
+    PlioViewer.objects.filter(plio_id__in=plio_ids).exclude(Exists(sessions)).delete()
+    with connection.cursor() as cursor:
+        cursor.execute(get_plio_viewers_insert_query(plio_ids, connection.schema_name))
+
+    num_viewers = (
+        PlioViewer.objects.filter(plio_id=OuterRef("id"))
+        .order_by()
+        .values("plio_id")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Plio.all_objects.filter(id__in=plio_ids).update(
+        unique_viewers=Coalesce(Subquery(num_viewers), 0)
+    )
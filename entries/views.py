@@ -1,9 +1,15 @@
-from rest_framework import viewsets
+from django.db import transaction
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from entries.config import EVENT_BATCH_MAX_SIZE
 from entries.models import Session, SessionAnswer, Event
+from entries.resume import update_user_plio_state
 from entries.serializers import (
     SessionSerializer,
     SessionAnswerSerializer,
     EventSerializer,
+    EventBatchItemSerializer,
 )
 
 
@@ -22,7 +28,19 @@ class SessionViewSet(viewsets.ModelViewSet):
     serializer_class = SessionSerializer
 
     def get_queryset(self):
-        queryset = Session.objects.filter(user=self.request.user)
+        # everything that a session's response is built from is fetched along
+        # with the sessions, using the same number of queries for any number
+        # of sessions
+        queryset = (
+            Session.objects.filter(user=self.request.user)
+            .select_related(
+                "plio__video",
+                "plio__created_by",
+                "user",
+                "experiment__created_by",
+            )
+            .prefetch_related("sessionanswer_set")
+        )
 
         # filter the sessions based on a particular plio uuid
         plio_uuid = self.request.query_params.get("plio")
@@ -60,7 +78,86 @@ class EventViewSet(viewsets.ModelViewSet):
     create: Create a event
     partial_update: Patch a event
     destroy: Soft delete a event
+    batch: Create many events at once
     """
 
     queryset = Event.objects.all()
     serializer_class = EventSerializer
+
+    @action(methods=["post"], detail=False)
+    def batch(self, request):
+        """
+        Creates a list of events, possibly of different sessions of the user, at
+        once. The status of each event is returned in the order of the request:
+        the id of the event if it was created, or the errors that prevented it.
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {"detail": "a list of events is expected"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > EVENT_BATCH_MAX_SIZE:
+            return Response(
+                {"detail": f"at most {EVENT_BATCH_MAX_SIZE} events can be sent"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializers = [EventBatchItemSerializer(data=event) for event in request.data]
+        valid_serializers = [
+            serializer for serializer in serializers if serializer.is_valid()
+        ]
+
+        # the events can only be created for the user's own sessions
+        user_session_ids = set(
+            Session.objects.filter(
+                id__in={
+                    serializer.validated_data["session_id"]
+                    for serializer in valid_serializers
+                },
+                user=request.user,
+            ).values_list("id", flat=True)
+        )
+
+        results = []
+        events = []
+        for serializer in serializers:
+            if serializer.errors:
+                results.append(
+                    {"status": status.HTTP_400_BAD_REQUEST, "errors": serializer.errors}
+                )
+                continue
+
+            session_id = serializer.validated_data["session_id"]
+            if session_id not in user_session_ids:
+                results.append(
+                    {
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "errors": {
+                            "session": [
+                                f'Invalid pk "{session_id}" - object does not exist.'
+                            ]
+                        },
+                    }
+                )
+                continue
+
+            event = Event(**serializer.validated_data)
+            events.append(event)
+            results.append({"status": status.HTTP_201_CREATED, "event": event})
+
+        with transaction.atomic():
+            Event.objects.bulk_create(events)
+            # `bulk_create` does not send `post_save`, so the resume pointers of
+            # the sessions are moved here, once for the whole batch
+            update_user_plio_state([event.id for event in events])
+
+        for result in results:
+            if "event" in result:
+                result["id"] = result.pop("event").id
+
+        return Response(
+            results,
+            status=status.HTTP_201_CREATED
+            if len(events) == len(results)
+            else status.HTTP_207_MULTI_STATUS,
+        )
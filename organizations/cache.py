@@ -0,0 +1,67 @@
+from django.core.cache import cache
+
+from organizations.models import Organization
+from plio.cache import (
+    LocalCache,
+    invalidate_cache_keys,
+    is_invalidation_pending,
+    register_local_cache,
+)
+
+# how long, in seconds, a resolved tenant is served from the cache. Processes
+# that do not hear about invalidations (see `plio.cache.use_local_cache`) only
+# drop their copy of a changed organization once this runs out
+TENANT_CACHE_TIMEOUT = 60
+
+# the number of organizations whose tenant each process keeps in memory
+TENANT_CACHE_MAX_SIZE = 1024
+
+# cached in place of a tenant for shortcodes that do not match any organization
+MISSING_TENANT = "missing"
+
+tenant_cache = LocalCache(TENANT_CACHE_MAX_SIZE, TENANT_CACHE_TIMEOUT)
+register_local_cache("tenant_", tenant_cache)
+
+
+def get_tenant_cache_key(shortcode: str):
+    return f"tenant_{shortcode}"
+
+
+def get_tenant(shortcode: str):
+    """
+    Returns the organization with the given shortcode, or None if there is
+    none. Looks in the memory of the current process first, then in Redis and
+    only then in the database, filling both caches on the way back.
+
+    :param shortcode: The shortcode of the organization
+    :type shortcode: str
+    """
+    cache_key = get_tenant_cache_key(shortcode)
+    # an organization changed by this thread is not cached until the change is
+    # flushed (see `plio.cache.is_invalidation_pending`)
+    if is_invalidation_pending(cache_key):
+        return Organization.objects.filter(shortcode=shortcode).first()
+
+    tenant = tenant_cache.get(cache_key)
+    if tenant is None:
+        # a tenant invalidated in the meantime is not kept in memory
+        generation = tenant_cache.generation
+        tenant = cache.get(cache_key)
+        if tenant is None:
+            tenant = (
+                Organization.objects.filter(shortcode=shortcode).first()
+                or MISSING_TENANT
+            )
+            cache.set(cache_key, tenant, TENANT_CACHE_TIMEOUT)
+        tenant_cache.set_many({cache_key: tenant}, generation)
+
+    return None if tenant == MISSING_TENANT else tenant
+
+
+def invalidate_tenant(organization):
+    """
+    Drops the cached tenant of the given organization from Redis and from the
+    memory of every process, along with the other invalidations of the change
+    (i.e. once its transaction commits, see `plio.cache.schedule_invalidations`)
+    """
+    invalidate_cache_keys([get_tenant_cache_key(organization.shortcode)])
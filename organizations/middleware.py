@@ -1,6 +1,6 @@
 from django.db import connection
 from django_tenants.middleware import TenantMainMiddleware
-from django_tenants.utils import get_tenant_model
+from organizations.cache import get_tenant
 from plio.settings import DEFAULT_TENANT_SHORTCODE
 
 
@@ -24,11 +24,12 @@ class OrganizationTenantMiddleware(TenantMainMiddleware):
         """
         Determines tenant by the value of the `ORGANIZATION` HTTP header.
         """
-        # retrieve tenant model configured in settings.py
-        tenant_model = get_tenant_model()
+        # reuse the tenant if it has already been resolved for this request
+        if hasattr(request, "tenant"):
+            return request.tenant
 
-        organization_shortcode = self.get_organization_shortcode(request)
-        return tenant_model.objects.filter(shortcode=organization_shortcode).first()
+        # the tenant is cached as it is needed by every request
+        return get_tenant(self.get_organization_shortcode(request))
 
     def get_schema(self, request):
         """
@@ -47,8 +48,10 @@ class OrganizationTenantMiddleware(TenantMainMiddleware):
         # Connection needs first to be at the public schema, as this is where the tenant metadata is stored.
         connection.set_schema_to_public()
 
-        # get the right tenant object based on request
+        # get the right tenant object based on request, keeping it on the
+        # request for views to reuse (None if the organization does not exist)
         tenant = self.get_tenant(request)
+        request.tenant = tenant
         if tenant:
             # set connection to tenant's schema
             connection.set_tenant(tenant)
@@ -1,13 +1,33 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save, post_delete
-from plio.cache import invalidate_cache_for_instances
+from django.db.models.signals import pre_save, pre_delete, post_save, post_delete
+from plio.cache import bump_version, collect_invalidations, get_user_version_key
+from organizations.cache import invalidate_tenant
 from organizations.models import Organization
+from users.models import OrganizationUser
 
 
-@receiver([post_save, post_delete], sender=Organization)
+@receiver([post_save, pre_delete], sender=Organization)
 def organization_update_cache(sender, instance, **kwargs):
-    # invalidate cache for users belonging to organization
-    from users.models import User
+    # the cache keys of users (and of the plios they created) include the
+    # version of the user, so only the keys of the organization's members move.
+    # the members are looked up before a deletion, which deletes them as well
+    user_ids = OrganizationUser.objects.filter(organization_id=instance.id)
+    with collect_invalidations():
+        for user_id in user_ids.values_list("user_id", flat=True).distinct():
+            bump_version(get_user_version_key(user_id))
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def organization_invalidate_tenant(sender, instance, **kwargs):
+    # requests resolve the organization's tenant from the cache
+    invalidate_tenant(instance)
+
 
-    users = User.objects.filter(organizations__id=instance.id)
-    invalidate_cache_for_instances(users)
+@receiver(pre_save, sender=Organization)
+def organization_invalidate_previous_tenant(sender, instance, **kwargs):
+    # a changed shortcode would leave the tenant cached under the previous one
+    if instance.pk is None:
+        return
+    previous = Organization.all_objects.filter(pk=instance.pk).first()
+    if previous is not None:
+        invalidate_tenant(previous)
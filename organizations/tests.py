@@ -81,15 +81,17 @@ class OrganizationTestCase(BaseTestCase):
             {"name": org_new_name},
         )
 
-        # user cache should be deleted after organization update
-        self.assertEqual(len(cache.keys(cache_key_name)), 0)
+        # user cache key should change after organization update
+        new_cache_key_name = get_cache_key(self.user)
+        self.assertNotEqual(new_cache_key_name, cache_key_name)
+        self.assertEqual(len(cache.keys(new_cache_key_name)), 0)
 
         # request user again so that we can check if the cache is updated
         self.client.get(reverse("users-detail", kwargs={"pk": self.user.id}))
 
         # verify cache data has now the updated value
         self.assertEqual(
-            cache.get(cache_key_name)["organizations"][0]["name"], org_new_name
+            cache.get(new_cache_key_name)["organizations"][0]["name"], org_new_name
         )
 
     def test_settings_support_only_patch_method(self):
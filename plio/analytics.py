@@ -0,0 +1,401 @@
+"""
+Computes the usage metrics of a plio from the most recent session of each of
+its viewers.
+
+Everything here works on whole columns at once with numpy/pandas and has no
+dependency on the database, so that the same code computes the contribution of
+a single viewer, rebuilds the metrics of a plio with many thousands of viewers
+and can be benchmarked in isolation (see `scripts/benchmark_metrics.py`).
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from entries.retention import (
+    RETENTION_DTYPES,
+    RETENTION_RUNS,
+    RETENTION_TEXT,
+    count_retention_values,
+    decode_retention_counters,
+    decode_retention_runs,
+    encode_retention,
+    get_missing_value,
+)
+
+# second of the video at which the one-minute retention is measured (0-indexed)
+ONE_MINUTE_INDEX = 59
+
+# number of retentions decoded together; bounds the memory used for plios
+# with a large number of viewers and long videos
+RETENTION_CHUNK_SIZE = 5000
+
+# question types whose answers are graded against the correct answer
+GRADED_QUESTION_TYPES = ["mcq", "checkbox"]
+
+# columns of the most recent session of each viewer
+SESSION_COLUMNS = ["session_id", "user_id", "watch_time", "retention"]
+
+# columns of each response to a non-survey question
+RESPONSE_COLUMNS = ["user_id", "answer", "question_type", "correct_answer"]
+
+# what is computed for each viewer
+VIEWER_FIELDS = [
+    "session_id",
+    "user_id",
+    "watch_time",
+    "is_retention_valid",
+    "is_retained_one_minute",
+    "num_responses",
+    "num_answered",
+    "num_correct",
+    "is_completed",
+]
+
+# the totals over all the viewers that the metrics are derived from
+TOTAL_FIELDS = [
+    "num_viewers",
+    "watch_time_sum",
+    "num_valid_retention",
+    "num_one_minute_retained",
+    "num_responders",
+    "num_answered_sum",
+    "num_answering",
+    "accuracy_sum",
+    "num_completed",
+]
+
+
+def is_one_minute_retention_applicable(video_duration):
+    return video_duration is not None and video_duration >= 60
+
+
+def parse_numbers(values):
+    """
+    Returns the numbers in the given comma-separated strings as one flat array
+    of floats, with NaN in place of the values that are not numbers.
+    """
+    joined = ",".join(values)
+    try:
+        # parsing the joined strings in one go is much faster, but stops at
+        # the first value that is not a number
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            return np.fromstring(joined, dtype=float, sep=",")
+    except DeprecationWarning:
+        values = pd.Series(joined.split(","))
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+
+
+def parse_retention(retention: pd.Series, num_values: int):
+    """
+    Returns the values of the given retention strings, all of which hold
+    `num_values` comma-separated values, as a 2D array of floats with one row
+    per string. Values that are not numbers are returned as NaN.
+    """
+    retention = retention.to_numpy()
+    numbers = np.full((len(retention), num_values), np.nan)
+
+    # most retention strings only hold single digits, in which case the digits
+    # sit at every other character and can be read without parsing
+    lengths = np.fromiter(map(len, retention), dtype=int, count=len(retention))
+    rows = np.flatnonzero(lengths == 2 * num_values - 1)
+    if len(rows):
+        # non-ascii characters become "?" so that every character is one byte
+        joined = ",".join(retention[rows]).encode("ascii", errors="replace")
+        digits = np.frombuffer(joined, dtype=np.uint8)[::2] - ord("0")
+        digits = digits.reshape(len(rows), num_values)
+        is_digits = (digits <= 9).all(axis=1)
+        numbers[rows[is_digits]] = digits[is_digits]
+        # the rest holds something other than digits, e.g. "NaN"
+        rows = np.setdiff1d(np.arange(len(retention)), rows[is_digits])
+    else:
+        rows = np.arange(len(retention))
+
+    if len(rows):
+        numbers[rows] = parse_numbers(retention[rows]).reshape(len(rows), num_values)
+    return numbers
+
+
+def compute_text_retention_metrics(retention: np.ndarray, num_values: int):
+    """
+    Returns whether each of the given retention strings, all of which hold
+    `num_values` values, is valid and whether it has any views after the first
+    minute.
+    """
+    # one row per viewer, one column per second of the video
+    numbers = parse_retention(pd.Series(retention), num_values)
+
+    # "NaN" and anything else that is not an integer invalidates the row
+    valid = (np.isfinite(numbers) & (numbers == np.floor(numbers))).all(axis=1)
+    retained = np.nansum(numbers[:, ONE_MINUTE_INDEX:], axis=1) > 0
+    return valid, retained
+
+
+def compute_encoded_retention_metrics(encoded: list, retention_format: int):
+    """
+    Returns whether each of the given encoded retentions, all of which are in
+    the given binary format and hold the same number of values, is valid and
+    whether it has any views after the first minute.
+
+    The encoded values are integers by construction, so only "NaN" values
+    invalidate a retention, and runs of values are never expanded into seconds.
+    """
+    missing = get_missing_value(RETENTION_DTYPES[retention_format])
+
+    if retention_format == RETENTION_RUNS:
+        values, lengths, num_runs = decode_retention_runs(encoded)
+        starts = np.r_[0, np.cumsum(num_runs)[:-1]]
+        # the second (counted from the start of its retention) each run ends at
+        ends = np.cumsum(lengths)
+        ends -= np.repeat(ends[starts] - lengths[starts], num_runs)
+
+        has_missing = np.add.reduceat((values == missing).astype(int), starts) > 0
+        is_watched = (values > 0) & (ends > ONE_MINUTE_INDEX)
+        retained = np.add.reduceat(is_watched.astype(int), starts) > 0
+    else:
+        # one row per viewer, one column per second of the video
+        counters = decode_retention_counters(encoded, retention_format)
+        has_missing = (counters == missing).any(axis=1)
+        retained = (counters[:, ONE_MINUTE_INDEX:] > 0).any(axis=1)
+
+    return ~has_missing, retained
+
+
+def compute_retention_metrics(retention: pd.Series, video_duration):
+    """
+    Returns two boolean arrays: whether each retention can be used for the
+    one-minute retention metric and whether the viewer was still watching after
+    the first minute.
+
+    A retention is only valid if it has one integer for every second of the
+    video, i.e. it is neither empty nor contains NaN values.
+
+    :param retention: the retention of each viewer as stored in the database
+        (see `entries.retention`) or as comma-separated strings, e.g. "0,1,0"
+    :type retention: pd.Series
+    :param video_duration: duration of the plio's video in seconds
+    :type video_duration: float
+    """
+    is_valid = np.zeros(len(retention), dtype=bool)
+    is_retained = np.zeros(len(retention), dtype=bool)
+    if not is_one_minute_retention_applicable(video_duration) or not len(retention):
+        return is_valid, is_retained
+
+    encoded = np.empty(len(retention), dtype=object)
+    encoded[:] = [
+        encode_retention(value) if isinstance(value, str) else bytes(value)
+        for value in retention
+    ]
+    # empty retentions have no format and are never valid
+    formats = np.fromiter(
+        (value[0] if value else -1 for value in encoded), dtype=int, count=len(encoded)
+    )
+
+    for retention_format in np.unique(formats[formats >= 0]):
+        rows = np.flatnonzero(formats == retention_format)
+        if retention_format == RETENTION_TEXT:
+            # retention that could not be stored as counters is parsed as text
+            text = np.array([value[1:].decode("utf-8") for value in encoded[rows]])
+            num_values = np.char.count(text, ",") + 1
+        else:
+            num_values = count_retention_values(list(encoded[rows]), retention_format)
+
+        # only the retentions with as many values as the video has seconds can
+        # be valid
+        is_candidate = num_values == video_duration
+        candidates = rows[is_candidate]
+        if retention_format == RETENTION_TEXT:
+            text = text[is_candidate]
+
+        for start in range(0, len(candidates), RETENTION_CHUNK_SIZE):
+            chunk = slice(start, start + RETENTION_CHUNK_SIZE)
+            if retention_format == RETENTION_TEXT:
+                valid, retained = compute_text_retention_metrics(
+                    text[chunk], int(video_duration)
+                )
+            else:
+                valid, retained = compute_encoded_retention_metrics(
+                    list(encoded[candidates[chunk]]), retention_format
+                )
+            is_valid[candidates[chunk]] = valid
+            is_retained[candidates[chunk]] = valid & retained
+
+    return is_valid, is_retained
+
+
+def compute_response_metrics(responses: pd.DataFrame):
+    """
+    Returns the number of responses, answered questions and correctly answered
+    questions of each viewer, indexed by user id.
+
+    mcq/checkbox answers are correct on an exact match with the correct answer,
+    while an answer to any other type of question is correct if it is present.
+
+    :param responses: one row per response with the columns in `RESPONSE_COLUMNS`
+    :type responses: pd.DataFrame
+    """
+    is_answered = responses["answer"].notna()
+    # a missing answer matches a missing correct answer, as None == None
+    is_matching = (responses["answer"] == responses["correct_answer"]) | (
+        responses["answer"].isna() & responses["correct_answer"].isna()
+    )
+    is_correct = np.where(
+        responses["question_type"].isin(GRADED_QUESTION_TYPES),
+        is_matching,
+        is_answered,
+    )
+
+    return (
+        pd.DataFrame(
+            {
+                "user_id": responses["user_id"],
+                "num_responses": 1,
+                "num_answered": is_answered.astype(int),
+                "num_correct": is_correct.astype(int),
+            }
+        )
+        .groupby("user_id")
+        .sum()
+    )
+
+
+def compute_viewer_metrics(sessions, responses, video_duration, num_questions):
+    """
+    Returns a dataframe with the columns in `VIEWER_FIELDS` and one row for
+    each of the given sessions.
+
+    :param sessions: the most recent session of each viewer as rows of `SESSION_COLUMNS`
+    :type sessions: list
+    :param responses: the responses to the non-survey questions in those sessions
+        as rows of `RESPONSE_COLUMNS`
+    :type responses: list
+    :param video_duration: duration of the plio's video in seconds
+    :type video_duration: float
+    :param num_questions: number of non-survey questions in the plio
+    :type num_questions: int
+    """
+    viewers = pd.DataFrame(list(sessions), columns=SESSION_COLUMNS)
+    is_retention_valid, is_retained_one_minute = compute_retention_metrics(
+        viewers["retention"], video_duration
+    )
+    viewers["is_retention_valid"] = is_retention_valid
+    viewers["is_retained_one_minute"] = is_retained_one_minute
+
+    response_metrics = compute_response_metrics(
+        pd.DataFrame(list(responses), columns=RESPONSE_COLUMNS)
+    )
+    viewers = viewers.join(response_metrics, on="user_id")
+    for column in ["num_responses", "num_answered", "num_correct"]:
+        viewers[column] = viewers[column].fillna(0).astype(int)
+
+    # a viewer has completed the plio if they answered every non-survey question
+    viewers["is_completed"] = (viewers["num_responses"] > 0) & (
+        viewers["num_answered"] == num_questions
+    )
+    return viewers[VIEWER_FIELDS]
+
+
+def compute_metric_totals(viewers: pd.DataFrame):
+    """
+    Returns the totals in `TOTAL_FIELDS` over the given viewers as plain
+    python numbers. The totals for a single viewer are what that viewer
+    contributes to the totals of the plio.
+
+    :param viewers: one row per viewer with (at least) the columns in `VIEWER_FIELDS`
+    :type viewers: pd.DataFrame
+    """
+    is_answering = viewers["num_answered"] > 0
+    accuracy = (
+        viewers["num_correct"][is_answering] / viewers["num_answered"][is_answering]
+    )
+
+    return {
+        "num_viewers": int(len(viewers)),
+        "watch_time_sum": float(viewers["watch_time"].sum()),
+        "num_valid_retention": int(viewers["is_retention_valid"].sum()),
+        "num_one_minute_retained": int(viewers["is_retained_one_minute"].sum()),
+        "num_responders": int((viewers["num_responses"] > 0).sum()),
+        "num_answered_sum": int(viewers["num_answered"].sum()),
+        "num_answering": int(is_answering.sum()),
+        "accuracy_sum": float(accuracy.sum()),
+        "num_completed": int(viewers["is_completed"].sum()),
+    }
+
+
+def format_plio_metrics(totals, video_duration, has_questions, has_survey_question):
+    """
+    Returns the metrics of a plio, as served by the metrics endpoint, from the
+    totals over all of its viewers.
+
+    :param totals: the values of `TOTAL_FIELDS` for the plio
+    :type totals: dict
+    :param video_duration: duration of the plio's video in seconds
+    :type video_duration: float
+    :param has_questions: whether the plio has any questions at all
+    :type has_questions: bool
+    :param has_survey_question: whether any of the plio's questions is a survey question
+    :type has_survey_question: bool
+    """
+    num_viewers = totals["num_viewers"]
+
+    # no sessions have been created for the plio
+    if not num_viewers:
+        return {"has_survey_question": has_survey_question}
+
+    average_watch_time = totals["watch_time_sum"] / num_viewers
+
+    # retention at one minute
+    if not is_one_minute_retention_applicable(video_duration):
+        # the metric is not applicable in this case
+        percent_one_minute_retention = None
+    elif not totals["num_valid_retention"]:
+        percent_one_minute_retention = 0
+    else:
+        percent_one_minute_retention = np.round(
+            (totals["num_one_minute_retained"] / num_viewers) * 100, 2
+        )
+
+    # question-based metrics
+    # if the plio does not have any questions, these metrics are not applicable
+    if not has_questions:
+        accuracy = None
+        average_num_answered = None
+        percent_completed = None
+
+    # no responses to non-survey questions found
+    elif not totals["num_responders"]:
+        return {
+            "unique_viewers": num_viewers,
+            "average_watch_time": average_watch_time,
+            "percent_one_minute_retention": None,
+            "accuracy": None,
+            "average_num_answered": None,
+            "percent_completed": None,
+            "has_survey_question": True,
+        }
+
+    else:
+        average_num_answered = round(
+            totals["num_answered_sum"] / totals["num_responders"]
+        )
+        percent_completed = np.round(100 * (totals["num_completed"] / num_viewers), 2)
+
+        # only the viewers who have answered at least one question count
+        # towards the accuracy
+        if not totals["num_answering"]:
+            accuracy = None
+        else:
+            accuracy = np.round(
+                (totals["accuracy_sum"] / totals["num_answering"]) * 100, 2
+            )
+
+    return {
+        "unique_viewers": num_viewers,
+        "average_watch_time": average_watch_time,
+        "percent_one_minute_retention": percent_one_minute_retention,
+        "accuracy": accuracy,
+        "average_num_answered": average_num_answered,
+        "percent_completed": percent_completed,
+        "has_survey_question": has_survey_question,
+    }
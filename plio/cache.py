@@ -1,9 +1,293 @@
+import gzip
+import hashlib
+import json
+import logging
+import pickle
+import re
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict, defaultdict, namedtuple
+from contextlib import contextmanager
+from functools import partial
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
 from django.core.cache import cache
-from django.db import connection
+from django.db import connection, transaction
+from django_redis import get_redis_connection
+from django_tenants.utils import schema_context
+from rest_framework.renderers import JSONRenderer
 
+logger = logging.getLogger(__name__)
 
-def get_cache_key(instance):
-    """Calculates the cache key for an instance based on the tenant schema of the request"""
+# how long, in seconds, a worker may hold the right to rebuild a cached value
+# before other workers stop waiting for it
+REBUILD_LOCK_TIMEOUT = 10
+
+# how long, in seconds, a worker waits for the value that another worker is
+# rebuilding (when there is no stale copy to serve) before building it itself
+REBUILD_WAIT_TIMEOUT = 2
+
+# how often, in seconds, a waiting worker checks whether the value is rebuilt
+REBUILD_POLL_INTERVAL = 0.05
+
+# how long, in seconds, the stale copy of a value is kept after the value
+# itself expires or is invalidated
+STALE_TIMEOUT = 24 * 60 * 60
+
+# responses smaller than this many bytes are not worth gzipping
+GZIP_MIN_SIZE = 1024
+
+# the redis pub/sub channel that invalidated cache keys are published on, for
+# every process to drop them from its local cache
+INVALIDATION_CHANNEL = "cache_invalidation"
+
+# the versions at the end of a versioned cache key (see `get_cache_key`)
+VERSIONS_SUFFIX_REGEX = re.compile(r"_v[0-9.]+$")
+
+
+class LocalCache:
+    """
+    A cache kept in the memory of the current process, holding at most
+    `max_size` values (and, if `max_bytes` is given, at most that many bytes of
+    pickled values) for at most `timeout` seconds each, evicting the least
+    recently used value first. Safe to use from many threads.
+
+    Values cached here are not seen by other processes. They are dropped from
+    every process through the invalidations published over redis (see
+    `publish_invalidations`), and otherwise expire once `timeout` runs out.
+
+    `generation` changes whenever a value is deleted, so that a value read from
+    elsewhere is not cached if it may have been invalidated in the meantime
+    (see `set_many`).
+    """
+
+    def __init__(self, max_size: int, timeout: float, max_bytes: int = None):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.values = OrderedDict()
+        self.num_bytes = 0
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.values:
+                return default
+            value, expires_at, _ = self.values[key]
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                return default
+            self.values.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def set_many(self, values: dict, generation: int = None):
+        """
+        Caches each of the given values under its key, unless `generation` is
+        given and a value has been deleted since it was read
+        """
+        sizes = {}
+        for key, value in values.items():
+            sizes[key] = 0
+            if self.max_bytes is not None:
+                sizes[key] = len(
+                    value if isinstance(value, bytes) else pickle.dumps(value)
+                )
+
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            expires_at = time.monotonic() + self.timeout
+            for key, value in values.items():
+                self._pop(key)
+                if self.max_bytes is not None and sizes[key] > self.max_bytes:
+                    continue
+                self.values[key] = (value, expires_at, sizes[key])
+                self.num_bytes += sizes[key]
+            while len(self.values) > self.max_size or (
+                self.max_bytes is not None and self.num_bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self.values)))
+
+    def _pop(self, key):
+        if key in self.values:
+            _, _, size = self.values.pop(key)
+            self.num_bytes -= size
+
+    def delete(self, key):
+        with self.lock:
+            self._pop(key)
+            self.generation += 1
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+            self.num_bytes = 0
+            self.generation += 1
+
+
+class CacheStats:
+    """
+    Counts, per family of cache keys (e.g. "plio", "user" or "version"), how
+    many reads were served from the local cache, from redis, or had to be built.
+
+    The counts and hit rates of the process are logged every
+    `CACHE_STATS_LOG_INTERVAL` seconds, as they are recorded.
+    """
+
+    def __init__(self):
+        self.counts = defaultdict(lambda: {"local": 0, "redis": 0, "miss": 0})
+        self.logged_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, cache_key: str, outcome: str):
+        with self.lock:
+            self.counts[get_cache_key_family(cache_key)][outcome] += 1
+            now = time.monotonic()
+            is_log_due = (
+                settings.CACHE_STATS_LOG_INTERVAL > 0
+                and now - self.logged_at >= settings.CACHE_STATS_LOG_INTERVAL
+            )
+            if is_log_due:
+                self.logged_at = now
+        if is_log_due:
+            self.log()
+
+    def log(self):
+        logger.info("Cache stats: %s", json.dumps(self.get(), sort_keys=True))
+
+    def get(self):
+        """The counts and the hit rate of each family of keys"""
+        with self.lock:
+            stats = {}
+            for family, counts in self.counts.items():
+                total = sum(counts.values())
+                hits = counts["local"] + counts["redis"]
+                stats[family] = {
+                    **counts,
+                    "local_hit_rate": counts["local"] / total,
+                    "hit_rate": hits / total,
+                }
+            return stats
+
+    def clear(self):
+        with self.lock:
+            self.counts.clear()
+            self.logged_at = time.monotonic()
+
+
+# the local cache in front of redis for the responses cached by `get_or_build`,
+# holding them pickled so that every read gets a copy of its own to work with
+response_cache = LocalCache(
+    max_size=100000,
+    timeout=settings.LOCAL_CACHE_TIMEOUT,
+    max_bytes=settings.LOCAL_CACHE_MAX_BYTES,
+)
+# the local cache in front of redis for the versions that the cache keys are
+# built from (see `get_versions`), which are read for every cached response
+version_cache = LocalCache(max_size=100000, timeout=settings.LOCAL_CACHE_TIMEOUT)
+# the local caches whose keys are dropped along with those of `response_cache`
+# when they are invalidated, by the prefix of their keys
+local_caches = {"version_": version_cache}
+cache_stats = CacheStats()
+invalidation_listener = None
+invalidation_listener_lock = threading.Lock()
+# set while this process is subscribed to the invalidations of other processes
+invalidation_subscribed = threading.Event()
+
+
+def get_cache_key_family(cache_key: str):
+    """
+    The family of a cache key, e.g. "plio" for "plio_public_1" and
+    "rendered_plio" for "rendered_plio_public_1"
+    """
+    if cache_key.startswith("rendered_"):
+        return "_".join(cache_key.split("_", 2)[:2])
+    return cache_key.split("_", 1)[0]
+
+
+def listen_for_invalidations():
+    """
+    Drops the keys that are published as invalidated by any process from the
+    local cache of this one, for as long as the process runs.
+    """
+    while True:
+        try:
+            pubsub = get_redis_connection("default").pubsub()
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            for message in pubsub.listen():
+                if message["type"] == "subscribe":
+                    invalidation_subscribed.set()
+                elif message["type"] == "message":
+                    drop_local_keys(json.loads(message["data"]))
+        except Exception:
+            logger.exception("Lost the cache invalidation channel, reconnecting")
+        # invalidations may be missed while not subscribed
+        invalidation_subscribed.clear()
+        response_cache.clear()
+        for local_cache in local_caches.values():
+            local_cache.clear()
+        time.sleep(1)
+
+
+def register_local_cache(prefix: str, local_cache: LocalCache):
+    """
+    Drops the keys with the given prefix from the given local cache, rather
+    than from `response_cache`, when they are invalidated in any process
+    """
+    local_caches[prefix] = local_cache
+
+
+def drop_local_keys(cache_keys):
+    """Drops the given keys (of responses or of versions) from the local caches"""
+    for cache_key in cache_keys:
+        local_cache = next(
+            (
+                local_cache
+                for prefix, local_cache in local_caches.items()
+                if cache_key.startswith(prefix)
+            ),
+            response_cache,
+        )
+        local_cache.delete(cache_key)
+
+
+def start_invalidation_listener():
+    """Starts listening for invalidations in this process, if not already"""
+    global invalidation_listener
+    with invalidation_listener_lock:
+        if invalidation_listener is None:
+            invalidation_listener = threading.Thread(
+                target=listen_for_invalidations,
+                name="cache-invalidation-listener",
+                daemon=True,
+            )
+            invalidation_listener.start()
+
+
+def use_local_cache():
+    """
+    Whether the local cache can be used by this process: only once it hears
+    about the invalidations of every other process.
+    """
+    if not settings.LOCAL_CACHE_ENABLED:
+        return False
+    start_invalidation_listener()
+    return invalidation_subscribed.is_set()
+
+
+def get_base_cache_key(instance):
+    """
+    Calculates the cache key for an instance based on the tenant schema of the
+    request, without the versions of what the cached value depends on
+    """
     schema_name = connection.schema_name
     instance_class = instance.__class__.__name__
 
@@ -24,11 +308,321 @@ def get_cache_key(instance):
     }.get(instance_class, None)
 
 
+def get_video_version_key(video_id: int):
+    return f"version_video_{connection.schema_name}_{video_id}"
+
+
+def get_user_version_key(user_id: int):
+    """
+    The version of a user, including the organizations they are a part of and
+    their roles in them, which is bumped for every member of an organization
+    when the organization changes
+    """
+    return f"version_user_{user_id}"
+
+
+def get_plio_version_key(plio_id: int):
+    """
+    The version of the content of a plio (including its items and questions),
+    which is part of its cache key, so that a value built from the content
+    before a change is never read again even if it is cached after the change
+    """
+    return f"version_plio_{connection.schema_name}_{plio_id}"
+
+
+def get_version_keys(instance):
+    """
+    The keys of the versions of the other instances that the cached value of
+    the given instance is built from. Changing any of them changes the cache
+    key of the instance, instead of having to find and delete its cached value.
+    """
+    instance_class = instance.__class__.__name__
+    if instance_class == "Plio":
+        version_keys = [
+            get_plio_version_key(instance.pk),
+            get_user_version_key(instance.created_by_id),
+        ]
+        if instance.video_id is not None:
+            version_keys.append(get_video_version_key(instance.video_id))
+        return version_keys
+    if instance_class == "User":
+        return [get_user_version_key(instance.pk)]
+    return []
+
+
+def get_versions(version_keys):
+    """
+    Returns the current value of each of the given versions, from the local
+    cache if they are there, and otherwise in a single round trip to redis
+    unless some of them do not exist yet
+    """
+    versions = {}
+    is_local_cache_used = use_local_cache()
+    if is_local_cache_used:
+        generation = version_cache.generation
+        for version_key in version_keys:
+            version = version_cache.get(version_key)
+            if version is not None:
+                cache_stats.record(version_key, "local")
+                versions[version_key] = version
+
+    missing_keys = [key for key in version_keys if key not in versions]
+    if missing_keys:
+        missing_versions = cache.get_many(missing_keys)
+        for version_key in missing_keys:
+            if version_key in missing_versions:
+                cache_stats.record(version_key, "redis")
+                continue
+            cache_stats.record(version_key, "miss")
+            # start from the current time rather than 0, so that keys built
+            # with versions that were evicted from redis are never reused
+            cache.add(version_key, time.time_ns(), None)
+            missing_versions[version_key] = cache.get(version_key)
+        if is_local_cache_used:
+            # versions bumped while they were read from redis are left out
+            version_cache.set_many(missing_versions, generation)
+        versions.update(missing_versions)
+    return [versions[version_key] for version_key in version_keys]
+
+
+def bump_version(version_key: str):
+    """
+    Changes the cache key of everything built from the instance the version
+    belongs to, once the current changes are flushed (see `flush_invalidations`)
+    """
+    pending_invalidations.version_keys.add(version_key)
+    schedule_invalidations()
+
+
+def get_cache_key(instance):
+    """
+    Calculates the cache key for an instance based on the tenant schema of the
+    request and the current versions of what its cached value is built from.
+    Returns None if the instance has changes that are not flushed yet, so that
+    its value is built rather than read from the cache.
+    """
+    cache_key = get_base_cache_key(instance)
+    if is_invalidation_pending(cache_key, get_version_keys(instance)):
+        return None
+    return get_versioned_cache_key(instance)
+
+
+def get_versioned_cache_key(instance):
+    """
+    The cache key of an instance along with the current versions of what its
+    cached value is built from (see `get_cache_key`)
+    """
+    cache_key = get_base_cache_key(instance)
+    version_keys = get_version_keys(instance)
+    if cache_key is None or not version_keys:
+        return cache_key
+
+    versions = get_versions(version_keys)
+    return f"{cache_key}_v{'.'.join(str(version) for version in versions)}"
+
+
+def get_etag(plio):
+    """
+    Returns a strong ETag for the response of the given plio, which changes
+    whenever the plio or anything in its response changes, without building
+    the response. Needs a single round trip to redis. Returns None if the plio
+    has changes that are not flushed yet.
+    """
+    version_keys = get_version_keys(plio)
+    if is_invalidation_pending(get_base_cache_key(plio), version_keys):
+        return None
+    versions = get_versions(version_keys)
+    tag = f"{get_base_cache_key(plio)}_v{'.'.join(str(v) for v in versions)}"
+    return f'"{hashlib.md5(tag.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def get_organization_roles_cache_key(user_id: int):
+    """Cache key for the roles of a user in each of their organizations"""
+    return f"organization_roles_{user_id}"
+
+
+def publish_invalidations(cache_keys, pipeline=None):
+    """
+    Drops the given keys (of responses or of versions) from the local cache of
+    every process, publishing them through the given redis pipeline if there
+    is one
+    """
+    cache_keys = [cache_key for cache_key in cache_keys if cache_key]
+    if not cache_keys:
+        return
+
+    drop_local_keys(cache_keys)
+    if not settings.LOCAL_CACHE_ENABLED:
+        return
+    (pipeline or get_redis_connection("default")).publish(
+        INVALIDATION_CHANNEL, json.dumps(cache_keys)
+    )
+
+
+class Invalidations:
+    """
+    Cache invalidations and channel layer messages that have not been flushed
+    yet, without duplicates
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # instances whose cached value is to be deleted, by schema and base key
+        self.instances = {}
+        self.cache_keys = set()
+        self.version_keys = set()
+        # functions building the message to send to each channel layer group
+        self.messages = {}
+
+    def __bool__(self):
+        return bool(
+            self.instances or self.cache_keys or self.version_keys or self.messages
+        )
+
+    def update(self, other):
+        """Adds the invalidations of the other instance to these ones"""
+        self.instances.update(other.instances)
+        self.cache_keys.update(other.cache_keys)
+        self.version_keys.update(other.version_keys)
+        self.messages.update(other.messages)
+
+    def pop(self):
+        """Moves these invalidations into a new instance"""
+        invalidations = Invalidations()
+        invalidations.update(self)
+        self.clear()
+        return invalidations
+
+    def is_pending(self, cache_key=None, version_keys=()):
+        """Whether the given key or any of the given versions is invalidated"""
+        return (
+            cache_key in self.cache_keys
+            or (connection.schema_name, cache_key) in self.instances
+            or not self.version_keys.isdisjoint(version_keys)
+        )
+
+
+class PendingInvalidations(Invalidations, threading.local):
+    """
+    The invalidations of the changes made by the current thread that have not
+    been flushed yet, along with those made in transactions that have not been
+    committed yet.
+    """
+
+    def __init__(self):
+        # number of `collect_invalidations` blocks the thread is in
+        self.num_scopes = 0
+        # the invalidations of each change made in a transaction, until the
+        # transaction commits. Their only other reference is the on-commit
+        # callback, so those of a rolled back transaction (or savepoint) are
+        # dropped along with it.
+        self.uncommitted = weakref.WeakSet()
+        super().__init__()
+
+
+pending_invalidations = PendingInvalidations()
+
+
+def is_invalidation_pending(cache_key=None, version_keys=()):
+    """
+    Whether the value cached under the given key, or built from the given
+    versions, was invalidated by a change of the current thread that has not
+    been flushed yet, in which case it must not be read from the cache
+    """
+    return any(
+        invalidations.is_pending(cache_key, version_keys)
+        for invalidations in [pending_invalidations, *pending_invalidations.uncommitted]
+    )
+
+
+def schedule_invalidations():
+    """
+    Makes sure that the pending invalidations are flushed: once the current
+    transaction commits (and are dropped if it rolls back), when the current
+    `collect_invalidations` block ends or, if there is neither, right away
+    """
+    if connection.in_atomic_block and not settings.CACHE_INVALIDATIONS_EAGER:
+        invalidations = pending_invalidations.pop()
+        pending_invalidations.uncommitted.add(invalidations)
+        transaction.on_commit(partial(commit_invalidations, invalidations), robust=True)
+    elif not pending_invalidations.num_scopes:
+        flush_invalidations()
+
+
+def commit_invalidations(invalidations):
+    """
+    Adds the invalidations of a change to the pending ones once its transaction
+    commits, and flushes them once those of every change made in it are added
+    (unless a `collect_invalidations` block flushes them when it ends)
+    """
+    pending_invalidations.uncommitted.discard(invalidations)
+    pending_invalidations.update(invalidations)
+    if not pending_invalidations.uncommitted and not pending_invalidations.num_scopes:
+        flush_invalidations()
+
+
+@contextmanager
+def collect_invalidations():
+    """
+    Holds back the invalidations of the changes made within the block until it
+    ends (e.g. for the length of a request), so that many changes to the same
+    instance are flushed once. The values invalidated within the block are
+    not read from the cache until then (see `is_invalidation_pending`).
+    """
+    pending_invalidations.num_scopes += 1
+    try:
+        yield
+    finally:
+        pending_invalidations.num_scopes -= 1
+        if pending_invalidations:
+            schedule_invalidations()
+
+
+def flush_invalidations():
+    """
+    Deletes the cached values and bumps the versions of all the pending
+    invalidations in a single pipelined call to redis, and then sends the
+    pending channel layer messages
+    """
+    instances = pending_invalidations.instances
+    cache_keys = pending_invalidations.cache_keys
+    version_keys = pending_invalidations.version_keys
+    messages = pending_invalidations.messages
+    pending_invalidations.clear()
+
+    for (schema_name, _), instance in instances.items():
+        with schema_context(schema_name):
+            cache_key = get_versioned_cache_key(instance)
+        if cache_key:
+            cache_keys.update([cache_key, get_rendered_cache_key(cache_key)])
+
+    pipeline = get_redis_connection("default").pipeline(transaction=False)
+    for version_key in version_keys:
+        # start from the current time rather than 0, as in `get_versions`
+        pipeline.set(cache.make_key(version_key), time.time_ns(), nx=True)
+        pipeline.incr(cache.make_key(version_key))
+    if cache_keys:
+        pipeline.delete(*[cache.make_key(cache_key) for cache_key in cache_keys])
+    # the versions are published after they are bumped, so that a process
+    # reading them in the meantime drops them again
+    publish_invalidations([*cache_keys, *version_keys], pipeline)
+    pipeline.execute()
+
+    for group_name, build_message in messages.items():
+        async_to_sync(get_channel_layer().group_send)(group_name, build_message())
+
+
+def invalidate_cache_keys(cache_keys):
+    """Deletes the values cached under the given keys"""
+    pending_invalidations.cache_keys.update(cache_keys)
+    schedule_invalidations()
+
+
 def invalidate_cache_for_instance(instance):
     """Deletes cache for a particular instance"""
-    cache_key = get_cache_key(instance)
-    if cache_key:
-        cache.delete(cache_key)
+    invalidate_cache_for_instances([instance])
 
 
 def get_cache_keys(instances):
@@ -41,5 +635,141 @@ def get_cache_keys(instances):
 
 def invalidate_cache_for_instances(instances):
     """Deletes cache for a list of instances"""
-    cache_keys = get_cache_keys(instances)
-    cache.delete_many(cache_keys)
+    for instance in instances:
+        base_cache_key = get_base_cache_key(instance)
+        if base_cache_key:
+            pending_invalidations.instances[
+                (connection.schema_name, base_cache_key)
+            ] = instance
+        if instance.__class__.__name__ == "Plio":
+            pending_invalidations.version_keys.add(get_plio_version_key(instance.pk))
+    schedule_invalidations()
+
+
+def send_to_group(group_name: str, build_message):
+    """
+    Sends a message to a channel layer group once the current changes are
+    flushed, such that only the last message queued for a group is sent
+
+    :param group_name: the channel layer group to send the message to
+    :type group_name: str
+    :param build_message: function without arguments that builds the message
+    :type build_message: Callable
+    """
+    pending_invalidations.messages[group_name] = build_message
+    schedule_invalidations()
+
+
+def get_stale_cache_key(cache_key: str):
+    """
+    The key of the stale copy of a value, which leaves out the versions in the
+    key, so that a value whose key moved to new versions still has one
+    """
+    return f"stale_{VERSIONS_SUFFIX_REGEX.sub('', cache_key)}"
+
+
+def get_rebuild_lock_key(cache_key: str):
+    return f"rebuild_{cache_key}"
+
+
+def get_rendered_cache_key(cache_key: str):
+    return f"rendered_{cache_key}"
+
+
+# the JSON of a response as rendered by DRF, along with its gzipped copy (if
+# any) and the ETag of the response it was rendered for (if any)
+RenderedJSON = namedtuple(
+    "RenderedJSON", ["content", "gzipped_content", "etag"], defaults=[None]
+)
+
+
+def render_json(data, etag=None):
+    """Renders the given data the way DRF renders JSON responses"""
+    content = JSONRenderer().render(data)
+    gzipped_content = None
+    if settings.RESPONSE_CACHE_GZIP and len(content) >= GZIP_MIN_SIZE:
+        # a fixed mtime keeps the gzipped copy the same for the same content
+        gzipped_content = gzip.compress(content, mtime=0)
+    return RenderedJSON(content, gzipped_content, etag)
+
+
+def get_or_render(cache_key: str, build, etag=None):
+    """
+    Returns the rendered JSON of the value cached under the given key, so that
+    serving it needs neither unpickling the value nor rendering it again.
+
+    :param cache_key: the key the value is cached under
+    :type cache_key: str
+    :param build: function without arguments that builds the value
+    :type build: Callable
+    :param etag: the ETag of the value as it is now, kept along with the value
+        it builds, so that a stale copy is never served with a newer ETag
+    :type etag: str
+    """
+    return get_or_build(
+        get_rendered_cache_key(cache_key), lambda: render_json(build(), etag)
+    )
+
+
+def get_or_build(cache_key: str, build):
+    """
+    Returns the cached value for the given key, building and caching it with
+    `build` if it is not cached, such that only one worker builds it at a time.
+
+    Invalidating a value only deletes the value itself, keeping a stale copy
+    of it. When many requests miss the same key at once (e.g. a plio shared
+    with a whole classroom right after it was edited), the first of them
+    takes a lock and rebuilds the value, while the others serve the stale copy
+    or, if there is none, wait for the rebuilt value for a short while.
+
+    :param cache_key: the key the value is cached under
+    :type cache_key: str
+    :param build: function without arguments that builds the value
+    :type build: Callable
+    """
+    is_local_cache_used = use_local_cache()
+    # a value invalidated while it is read from redis or built is not cached
+    # locally (see `LocalCache.set_many`)
+    generation = response_cache.generation
+    if is_local_cache_used:
+        value = response_cache.get(cache_key)
+        if value is not None:
+            cache_stats.record(cache_key, "local")
+            return pickle.loads(value)
+
+    value = cache.get(cache_key)
+    if value is not None:
+        cache_stats.record(cache_key, "redis")
+        if is_local_cache_used:
+            response_cache.set_many({cache_key: pickle.dumps(value)}, generation)
+        return value
+
+    cache_stats.record(cache_key, "miss")
+    lock_key = get_rebuild_lock_key(cache_key)
+    lock_token = uuid.uuid4().hex
+    if not cache.add(lock_key, lock_token, REBUILD_LOCK_TIMEOUT):
+        # another worker is rebuilding the value
+        value = cache.get(get_stale_cache_key(cache_key))
+        if value is not None:
+            return value
+
+        deadline = time.monotonic() + REBUILD_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(REBUILD_POLL_INTERVAL)
+            value = cache.get(cache_key)
+            if value is not None:
+                return value
+
+        # the other worker is taking too long, so build the value regardless
+        return build()
+
+    try:
+        value = build()
+        cache.set(cache_key, value)
+        cache.set(get_stale_cache_key(cache_key), value, STALE_TIMEOUT)
+        if is_local_cache_used:
+            response_cache.set_many({cache_key: pickle.dumps(value)}, generation)
+        return value
+    finally:
+        if cache.get(lock_key) == lock_token:
+            cache.delete(lock_key)
@@ -0,0 +1,190 @@
+from contextlib import nullcontext
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django_tenants.utils import schema_context
+
+from plio.models import Video, Plio, Item, Question, Image
+from plio.queries import (
+    get_clone_rows_query,
+    get_question_images_condition,
+    get_rows_by_key_condition,
+)
+
+
+def clone_rows(
+    model, where, params, source_schema, target_schema, remap=None, values=None
+):
+    """
+    Copies the rows of the model that match the given condition from the source
+    schema into the target schema (which may be the same) with a single
+    `INSERT ... SELECT ... RETURNING` query (see `get_clone_rows_query`), and
+    returns the id of each copy.
+
+    :param model: the model of the rows to copy
+    :type model: Model
+    :param where: the condition on the rows to copy, with `source` as the alias
+        of the source table and `%s` for each parameter
+    :type where: str
+    :param params: the parameters of the condition
+    :type params: list
+    :param source_schema: the schema to copy the rows from
+    :type source_schema: str
+    :param target_schema: the schema to copy the rows to
+    :type target_schema: str
+    :param remap: the new value of a column by the value of another (or the
+        same) column of the row being copied, as {column: (key column, values)},
+        e.g. to point a foreign key to the copy of the row it pointed to
+    :type remap: dict
+    :param values: the value of a column in every copy, as {column: value}
+    :type values: dict
+    :return: the id of the copy of each row, by the id of the row
+    :rtype: dict
+    """
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    column_types = {field.column: field.cast_db_type(connection) for field in fields}
+    query, query_params = get_clone_rows_query(
+        model._meta.db_table,
+        [field.column for field in fields],
+        where,
+        params,
+        source_schema,
+        target_schema,
+        remap={
+            column: (key_column, column_types[column], new_values)
+            for column, (key_column, new_values) in (remap or {}).items()
+        },
+        values=values,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(query, query_params)
+        return dict(cursor.fetchall())
+
+
+def in_schema(schema_name: str):
+    """
+    Runs the queries within it in the given schema, without switching schemas
+    (and so setting the search path again) if it is the current one already
+    """
+    if schema_name == connection.schema_name:
+        return nullcontext()
+    return schema_context(schema_name)
+
+
+def generate_plio_uuids(count: int):
+    """Returns the given number of distinct uuids that no plio has yet"""
+    uuids = set()
+    while len(uuids) < count:
+        candidates = {
+            Plio()._generate_random_string() for _ in range(count - len(uuids))
+        }
+        candidates -= uuids
+        taken = Plio.all_objects.filter(uuid__in=candidates).values_list(
+            "uuid", flat=True
+        )
+        uuids |= candidates - set(taken)
+    return list(uuids)
+
+
+@transaction.atomic
+def clone_plios(plios, source_schema: str, target_schema: str):
+    """
+    Clones the given plios from the source schema into the target schema (which
+    may be the same), along with their videos, items, questions and the images
+    of the questions, all in one transaction. Each table is copied into with a
+    single query for all the plios (see `clone_rows`), without reading its rows
+    into Python, so the number of queries does not grow with the number of
+    plios or items.
+
+    Each clone is a draft with no viewers, and has a copy of the video of the
+    plio it was cloned from. The images are copied as rows, pointing to the
+    same files.
+
+    :param plios: the plios to clone, from the source schema
+    :type plios: list
+    :param source_schema: the schema of the plios
+    :type source_schema: str
+    :param target_schema: the schema to create the clones in
+    :type target_schema: str
+    :return: the clone of each plio, by the uuid of the plio
+    :rtype: dict
+    """
+    plios = list(plios)
+    if not plios:
+        return {}
+
+    with in_schema(target_schema):
+        uuids = generate_plio_uuids(len(plios))
+    now = timezone.now()
+    timestamps = {"created_at": now, "updated_at": now}
+    schemas = {"source_schema": source_schema, "target_schema": target_schema}
+
+    videos = {}
+    video_ids = [plio.video_id for plio in plios if plio.video_id]
+    if video_ids:
+        videos = clone_rows(
+            Video,
+            get_rows_by_key_condition("id"),
+            [video_ids],
+            values=timestamps,
+            **schemas,
+        )
+
+    plio_ids = [plio.id for plio in plios]
+    clones = clone_rows(
+        Plio,
+        get_rows_by_key_condition("id", exclude_deleted=False),
+        [plio_ids],
+        remap={
+            "video_id": ("video_id", videos),
+            "uuid": ("id", dict(zip(plio_ids, uuids))),
+        },
+        values={"status": "draft", "unique_viewers": 0, **timestamps},
+        **schemas,
+    )
+
+    items = clone_rows(
+        Item,
+        get_rows_by_key_condition("plio_id"),
+        [plio_ids],
+        remap={"plio_id": ("plio_id", clones)},
+        values=timestamps,
+        **schemas,
+    )
+
+    if items:
+        # an image shared by questions is copied once, for all of them
+        images = clone_rows(
+            Image,
+            get_question_images_condition(source_schema),
+            [list(items)],
+            values=timestamps,
+            **schemas,
+        )
+        clone_rows(
+            Question,
+            get_rows_by_key_condition("item_id"),
+            [list(items)],
+            remap={
+                "item_id": ("item_id", items),
+                "image_id": ("image_id", images),
+            },
+            values=timestamps,
+            **schemas,
+        )
+
+    with in_schema(target_schema):
+        new_plios = Plio.objects.in_bulk(clones.values())
+    return {plio.uuid: new_plios[clones[plio.id]] for plio in plios}
+
+
+def duplicate_plios(plios):
+    """
+    Clones the given plios within the current schema (see `clone_plios`)
+
+    :param plios: the plios to clone
+    :type plios: list
+    :return: the clone of each plio, by the uuid of the plio
+    :rtype: dict
+    """
+    return clone_plios(plios, connection.schema_name, connection.schema_name)
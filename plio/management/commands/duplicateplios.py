@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import schema_context
+
+from plio.cloning import duplicate_plios
+from plio.models import Plio
+
+
+class Command(BaseCommand):
+    help = "Duplicates the plios with the given uuids in one transaction"
+
+    def add_arguments(self, parser):
+        parser.add_argument("uuids", nargs="*", help="The uuids of the plios")
+        parser.add_argument(
+            "--file", help="A file with the uuid of a plio on each line to duplicate"
+        )
+        parser.add_argument(
+            "--schema",
+            default="public",
+            help="The schema of the workspace that the plios are in",
+        )
+        parser.add_argument(
+            "--output", help="A file to write the old and new uuid of each plio to"
+        )
+
+    def handle(self, *args, **options):
+        uuids = list(options["uuids"])
+        if options["file"]:
+            with open(options["file"]) as uuid_file:
+                uuids += [line.strip() for line in uuid_file if line.strip()]
+        if not uuids:
+            raise CommandError("No plio uuids were given")
+
+        with schema_context(options["schema"]):
+            plios = list(Plio.objects.filter(uuid__in=uuids))
+            missing = set(uuids) - {plio.uuid for plio in plios}
+            if missing:
+                raise CommandError(
+                    f"No plios with these uuids exist: {', '.join(sorted(missing))}"
+                )
+            clones = duplicate_plios(plios)
+
+        lines = [f"{uuid} {clone.uuid}" for uuid, clone in clones.items()]
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write("".join(f"{line}\n" for line in lines))
+        for line in lines:
+            print(line)
+        print(f"Duplicated {len(clones)} plio(s) in {options['schema']}")
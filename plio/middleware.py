@@ -1,6 +1,8 @@
 from django.http.request import RawPostDataException
 from request_logging.middleware import LoggingMiddleware
 
+from plio.cache import collect_invalidations
+
 
 class RestoreContentLengthMiddleware:
     """
@@ -30,6 +32,22 @@ class RestoreContentLengthMiddleware:
         return self.get_response(request)
 
 
+class CacheInvalidationMiddleware:
+    """
+    Saving a plio along with its items and questions invalidates the cached
+    plio once per saved row. Collect the cache invalidations and channel layer
+    messages of a request and flush them together once it is done, so that
+    each of them is sent only once.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect_invalidations():
+            return self.get_response(request)
+
+
 class SafeBodyLoggingMiddleware(LoggingMiddleware):
     """
     django-request-logging reads `request.body` unconditionally on request
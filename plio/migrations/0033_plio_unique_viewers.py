@@ -0,0 +1,48 @@
+# Generated by Django 5.2.14 on 2026-10-17 21:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# the number of users with a (non-deleted) session of each plio
+BACKFILL_UNIQUE_VIEWERS = """
+    UPDATE plio
+    SET unique_viewers = viewers.count
+    FROM (
+        SELECT plio_id, COUNT(DISTINCT user_id) AS count
+        FROM session
+        WHERE deleted IS NULL
+        GROUP BY plio_id
+    ) AS viewers
+    WHERE plio.id = viewers.plio_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entries", "0033_user_plio_state"),
+        ("plio", "0032_image_deleted_by_cascade_item_deleted_by_cascade_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="plio",
+            name="unique_viewers",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="plio",
+            index=models.Index(
+                fields=["unique_viewers"], name="plio_unique__d53815_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="plio",
+            index=models.Index(
+                fields=["created_by", "unique_viewers"], name="plio_created_23efbd_idx"
+            ),
+        ),
+        migrations.RunSQL(BACKFILL_UNIQUE_VIEWERS, migrations.RunSQL.noop),
+    ]
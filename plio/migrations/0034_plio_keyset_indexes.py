@@ -0,0 +1,35 @@
+# Generated by Django 5.2.14 on 2026-10-17 21:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plio", "0033_plio_unique_viewers"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="plio",
+            index=models.Index(
+                fields=["created_by", "updated_at", "id"],
+                name="plio_created_75382c_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="plio",
+            index=models.Index(
+                fields=["created_by", "created_at", "id"],
+                name="plio_created_8df2f8_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="plio",
+            index=models.Index(
+                fields=["created_by", "name", "id"], name="plio_created_0a2f5a_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.14 on 2026-10-17 22:00
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations
+
+# the extension is created once for the whole database, in the public schema
+# (which is migrated first) so that the indexes of every tenant schema can use
+# its operator classes through the search path
+CREATE_TRIGRAM_EXTENSION = "CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plio", "0034_plio_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGRAM_EXTENSION, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name="plio",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"), name="gin_trgm_ops"
+                ),
+                name="plio_name_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="plio",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("uuid"), name="gin_trgm_ops"
+                ),
+                name="plio_uuid_trgm_idx",
+            ),
+        ),
+    ]
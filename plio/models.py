@@ -1,5 +1,8 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
+from django.db.models import Prefetch, prefetch_related_objects
 import string
 import random
 import os
@@ -76,12 +79,34 @@ class Plio(SafeDeleteModel):
     )
     is_public = models.BooleanField(default=True)
     config = models.JSONField(null=True)
+    # number of users with a (non-deleted) session of the plio, kept up to date
+    # as sessions are created and deleted (see `entries.viewers`)
+    unique_viewers = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "plio"
         ordering = ["-updated_at"]
+        indexes = [
+            # for listing plios by their number of viewers
+            models.Index(fields=["unique_viewers"]),
+            models.Index(fields=["created_by", "unique_viewers"]),
+            # for paging through the plios of a user by each of their orderings
+            models.Index(fields=["created_by", "updated_at", "id"]),
+            models.Index(fields=["created_by", "created_at", "id"]),
+            models.Index(fields=["created_by", "name", "id"]),
+            # for searching plios by a part of their name or uuid (see
+            # `PlioSearchFilter`), matching the `UPPER(...) LIKE` of icontains
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="plio_name_trgm_idx",
+            ),
+            GinIndex(
+                OpClass(Upper("uuid"), name="gin_trgm_ops"),
+                name="plio_uuid_trgm_idx",
+            ),
+        ]
 
     def __str__(self):
         return "%d: %s" % (self.id, self.name)
@@ -144,3 +169,22 @@ class Question(SafeDeleteModel):
     class Meta:
         db_table = "question"
         ordering = ["item__time"]
+
+
+def load_plio_tree(plios):
+    """
+    Fetches everything that the response of the given plios is built from --
+    their video, creator, items and the items' questions along with their
+    images -- in a fixed number of queries, however many items there are.
+    Whatever has already been fetched for a plio is not fetched again.
+    """
+    prefetch_related_objects(
+        plios,
+        "video",
+        "created_by",
+        "item_set",
+        Prefetch(
+            "item_set__question_set",
+            queryset=Question.objects.select_related("image"),
+        ),
+    )
@@ -1,5 +1,7 @@
 from rest_framework.filters import OrderingFilter
 
+from plio.search import SEARCH_RANK_FIELD
+
 
 class CustomOrderingFilter(OrderingFilter):
     """
@@ -41,7 +43,12 @@ class CustomOrderingFilter(OrderingFilter):
 
         # no ordering was included, or all the ordering fields were invalid
         setattr(view, "ordering", self.default_ordering)
-        return self.get_default_ordering(view)
+        ordering = self.get_default_ordering(view)
+
+        # the results of a search are ranked by how well they match it
+        if ordering and SEARCH_RANK_FIELD in queryset.query.annotations:
+            return ["-" + SEARCH_RANK_FIELD, *ordering]
+        return ordering
 
     def filter_queryset(self, request, queryset, view):
         ordering = self.get_ordering(request, queryset, view)
@@ -0,0 +1,239 @@
+import base64
+import binascii
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# the ways in which the number of plios in a listing can be counted
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_CACHED = "cached"
+COUNT_MODES = [COUNT_EXACT, COUNT_ESTIMATED, COUNT_CACHED]
+
+# seconds for which a cached count is reused
+COUNT_CACHE_TIMEOUT = 60
+
+
+def get_estimated_count(queryset):
+    """
+    Returns the number of rows that the query planner estimates the queryset
+    to have, without running it
+    """
+    if queryset.query.is_empty():
+        return 0
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return plan["Plan"]["Plan Rows"]
+
+
+def get_count_cache_key(queryset):
+    """
+    The cache key for the count of the given queryset in the current schema,
+    based on the query that counts it
+    """
+    query = str(queryset.order_by().query)
+    digest = hashlib.md5(query.encode()).hexdigest()
+    return f"plio_count_{connection.schema_name}_{digest}"
+
+
+def get_cached_count(queryset):
+    """
+    Returns the exact number of rows of the queryset, counting them only if
+    they were not counted within the last `COUNT_CACHE_TIMEOUT` seconds
+    """
+    if queryset.query.is_empty():
+        return 0
+    cache_key = get_count_cache_key(queryset)
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def count_queryset(queryset, mode=COUNT_EXACT):
+    """
+    Counts the rows of the queryset in the given way
+
+    :param queryset: the queryset to count
+    :type queryset: QuerySet
+    :param mode: "exact" to run COUNT(*), "estimated" to use the estimate of the
+        query planner and "cached" to reuse a recent exact count
+    :type mode: str
+    """
+    if mode == COUNT_ESTIMATED:
+        return get_estimated_count(queryset)
+    if mode == COUNT_CACHED:
+        return get_cached_count(queryset)
+    return queryset.count()
+
+
+def get_count_mode(request):
+    """The way of counting asked for by the `count` query param of the request"""
+    mode = request.query_params.get("count")
+    return mode if mode in COUNT_MODES else COUNT_EXACT
+
+
+def is_datetime_field(model, field_name):
+    """Whether the given field of the model (and not an annotation) is a datetime"""
+    try:
+        field = model._meta.get_field(field_name)
+    except FieldDoesNotExist:
+        return False
+    return field.get_internal_type() == "DateTimeField"
+
+
+class KeysetPagination(BasePagination):
+    """
+    Splits an ordered result set into pages by remembering where the last page
+    ended (the values of the ordering fields of its last row) instead of how
+    many rows came before it. Unlike `StandardResultsSetPagination`, fetching a
+    page neither skips over the rows before it with OFFSET nor counts the rows.
+
+    The id of the rows is appended to the ordering, so that rows with the same
+    values of the ordering fields still have a fixed order. The position is
+    sent to the client as an opaque `cursor` in the `next` and `previous` links.
+    The response follows the structure of `StandardResultsSetPagination`, with
+    `count` and `raw_count` counted as the view asks for.
+
+    Reference: django-rest-framework.org/api-guide/pagination/#cursorpagination
+    """
+
+    # number of results in a page
+    page_size = 5
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_ordering(self, queryset):
+        """
+        The ordering of the queryset as a list of (field, descending) pairs,
+        ending with the id as the tie-breaker
+        """
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        ordering = [
+            (field.lstrip("-"), field.startswith("-"))
+            for field in ordering
+            if field.lstrip("-") not in ["id", "pk"]
+        ]
+        descending = ordering[0][1] if ordering else False
+        return ordering + [("id", descending)]
+
+    def encode_cursor(self, row, reverse):
+        values = [row[field] for field, _ in self.ordering]
+        position = {
+            "values": [
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in values
+            ],
+            "reverse": reverse,
+        }
+        cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        """
+        Returns the values of the ordering fields at the position in the
+        `cursor` query param, and whether the rows before it are asked for
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            values = position["values"]
+            reverse = bool(position["reverse"])
+            if len(values) != len(self.ordering):
+                raise ValueError
+
+            for index, (field, _) in enumerate(self.ordering):
+                if not isinstance(values[index], (str, int, float)):
+                    raise ValueError
+                if is_datetime_field(model, field):
+                    values[index] = parse_datetime(values[index])
+                    if values[index] is None:
+                        raise ValueError
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, reverse
+
+    def get_position_filter(self, values, reverse):
+        """
+        Builds the filter for the rows that come after (or, if reverse, before)
+        the given position, e.g. for ordering by -updated_at, id:
+        updated_at < x OR (updated_at = x AND id > y)
+        """
+        rows_after = None
+        same_position = Q()
+        for (field, descending), value in zip(self.ordering, values):
+            lookup = "lt" if descending != reverse else "gt"
+            condition = same_position & Q(**{f"{field}__{lookup}": value})
+            rows_after = condition if rows_after is None else rows_after | condition
+            same_position &= Q(**{field: value})
+
+        # the range on the first field alone lets an index on it be used
+        field, descending = self.ordering[0]
+        lookup = "lte" if descending != reverse else "gte"
+        return Q(**{f"{field}__{lookup}": values[0]}) & rows_after
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset)
+        values, reverse = self.decode_cursor(request, queryset.model)
+
+        order_by = [
+            f"-{field}" if descending != reverse else field
+            for field, descending in self.ordering
+        ]
+        queryset = queryset.order_by(*order_by)
+        if values is not None:
+            queryset = queryset.filter(self.get_position_filter(values, reverse))
+
+        # one more row than a page tells whether there is another page
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        page = rows[: self.page_size]
+        if reverse:
+            page.reverse()
+
+        self.next_link = self.previous_link = None
+        if page:
+            if has_more or reverse:
+                self.next_link = self.encode_cursor(page[-1], reverse=False)
+            if (has_more and reverse) or (values is not None and not reverse):
+                self.previous_link = self.encode_cursor(page[0], reverse=True)
+        elif values is not None:
+            # nothing left at this position, so link back to the first page
+            first_page = remove_query_param(self.base_url, self.cursor_query_param)
+            self.previous_link = first_page
+
+        return page
+
+    def get_next_link(self):
+        return self.next_link
+
+    def get_previous_link(self):
+        return self.previous_link
+
+    def get_paginated_response(self, params):
+        # a paginated response will follow the structure of the standard one
+        return Response(
+            {
+                "count": params["count"],
+                "page_size": self.page_size,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": params["data"],
+                "raw_count": params["raw_count"],
+            }
+        )
@@ -2,7 +2,6 @@ from rest_framework import permissions
 from organizations.middleware import OrganizationTenantMiddleware
 from plio.settings import DEFAULT_TENANT_SHORTCODE
 from plio.models import Plio, Item, Question
-from users.models import OrganizationUser
 
 
 class PlioPermission(permissions.BasePermission):
@@ -23,11 +22,7 @@ class PlioPermission(permissions.BasePermission):
         if organization_shortcode == DEFAULT_TENANT_SHORTCODE:
             return True
         # For organizational workspace, check if user is a member
-        user_belongs_to_organization = OrganizationUser.objects.filter(
-            organization__shortcode=organization_shortcode,
-            user=request.user.id,
-        ).exists()
-        return user_belongs_to_organization
+        return request.user.belongs_to_organization(organization_shortcode)
 
     def has_object_permission(self, request, view, obj):
         """
@@ -53,10 +48,9 @@ class PlioPermission(permissions.BasePermission):
             return request.user == obj.created_by
 
         # checking if user is a member of the organization
-        user_belongs_to_organization = OrganizationUser.objects.filter(
-            organization__shortcode=organization_shortcode,
-            user=request.user.id,
-        ).exists()
+        user_belongs_to_organization = request.user.belongs_to_organization(
+            organization_shortcode
+        )
 
         if user_belongs_to_organization and obj.is_public:
             return True
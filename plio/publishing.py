@@ -0,0 +1,48 @@
+from django.utils import timezone
+
+from plio.cache import invalidate_cache_for_instances
+from plio.models import Plio
+
+# the result of changing the status of a plio
+STATUS_UPDATED = "updated"
+STATUS_UNCHANGED = "unchanged"
+STATUS_NOT_FOUND = "not_found"
+STATUS_FORBIDDEN = "forbidden"
+
+
+def set_plios_status(plios, new_status: str):
+    """
+    Changes the status of the given plios with a single query, leaving out the
+    plios that already have the status. As with updating a single plio, any
+    plio can be published. The cache of the changed plios is invalidated all
+    at once.
+
+    :param plios: the plios to change
+    :type plios: list
+    :param new_status: the status to give the plios, e.g. "published"
+    :type new_status: str
+    :return: the result of the change for each plio, by its uuid
+    :rtype: dict
+    """
+    results = {}
+    plios_to_update = []
+    for plio in plios:
+        if plio.status == new_status:
+            results[plio.uuid] = STATUS_UNCHANGED
+        else:
+            results[plio.uuid] = STATUS_UPDATED
+            plios_to_update.append(plio)
+
+    if plios_to_update:
+        # `update` skips `auto_now`, so the time of the update is set here
+        updated_at = timezone.now()
+        Plio.objects.filter(id__in=[plio.id for plio in plios_to_update]).update(
+            status=new_status, updated_at=updated_at
+        )
+        for plio in plios_to_update:
+            plio.status = new_status
+            plio.updated_at = updated_at
+        # `update` does not send `post_save` either
+        invalidate_cache_for_instances(plios_to_update)
+
+    return results
@@ -1,65 +1,4 @@
-from typing import Tuple
-
-
-def get_plio_latest_sessions_query(plio_uuid: str, schema: str):
-    """Returns the most recent sessions for each user for the given plio
-
-    :param plio_uuid: The plio to fetch the details for
-    :type plio_uuid: str
-    :param schema: The schema from which the tables are to be accessed
-    :type schema: str
-    """
-    return f"""
-        WITH summary AS (
-            SELECT
-                session.id,
-                plio.uuid as plio_uuid,
-                session.watch_time,
-                session.retention,
-                ROW_NUMBER() OVER(PARTITION BY session.user_id, session.plio_id
-                 ORDER BY session.id DESC) AS rank
-            FROM {schema}.session
-            INNER JOIN {schema}.plio AS plio ON plio.id = session.plio_id
-        )
-        SELECT id, watch_time, retention
-        FROM summary
-        WHERE rank = 1 AND plio_uuid = '{plio_uuid}'"""
-
-
-def get_plio_latest_responses_query(schema: str, session_ids: Tuple[int]):
-    """
-    Returns the responses of each user to the given plio based on
-    their most recent session.
-
-    :param schema: The schema from which the tables are to be accessed
-    :type schema: str
-    :param session_ids: The database ids corresponding to the most recent session by each user
-    :type session_ids: Tuple[int]
-    """
-    query = f"""
-        SELECT
-            sessionAnswer.id,
-            session.user_id,
-            sessionAnswer.answer,
-            item.type AS item_type,
-            question.type AS question_type,
-            question.correct_answer AS question_correct_answer,
-            question.survey AS survey
-        FROM {schema}.session AS session
-        INNER JOIN {schema}.session_answer AS sessionAnswer
-        ON session.id = sessionAnswer.session_id
-        INNER JOIN {schema}.item AS item
-        ON item.id=sessionAnswer.item_id
-        INNER JOIN {schema}.question AS question ON question.item_id = item.id """
-
-    # for some reason, when there is only one id, we cannot use the
-    # tuple form and have to resort to equality
-    if len(session_ids) == 1:
-        query += f"WHERE session.id = {session_ids[0]}"
-    else:
-        query += f"WHERE session.id IN {session_ids}"
-
-    return query
+from typing import List, Tuple
 
 
 def get_plio_details_query(plio_uuid: str, schema: str, **kwargs):
@@ -277,3 +216,331 @@ def get_user_level_metrics_query(
         GROUP BY latestSession.user_identifier
         ORDER BY latestSession.user_identifier
     """
+
+
+def get_plio_report_watermark_query(plio_uuid: str, schema: str):
+    """
+    Returns the time of the most recent change to any of the data that goes into
+    the data dump of the given plio
+
+    :param plio_uuid: The plio to fetch the watermark for
+    :type plio_uuid: str
+    :param schema: The schema from which the tables are to be accessed
+    :type schema: str
+    """
+    return f"""
+        SELECT GREATEST(
+            plio.updated_at,
+            (
+                SELECT video.updated_at
+                FROM {schema}.video AS video
+                WHERE video.id = plio.video_id
+            ),
+            (
+                SELECT MAX(item.updated_at)
+                FROM {schema}.item AS item
+                WHERE item.plio_id = plio.id
+            ),
+            (
+                SELECT MAX(question.updated_at)
+                FROM {schema}.item AS item
+                INNER JOIN {schema}.question AS question ON question.item_id = item.id
+                WHERE item.plio_id = plio.id
+            ),
+            (
+                SELECT MAX(session.updated_at)
+                FROM {schema}.session AS session
+                WHERE session.plio_id = plio.id
+            ),
+            (
+                SELECT MAX(sessionAnswer.updated_at)
+                FROM {schema}.session AS session
+                INNER JOIN {schema}.session_answer AS sessionAnswer
+                ON session.id = sessionAnswer.session_id
+                WHERE session.plio_id = plio.id
+            ),
+            (
+                SELECT MAX(event.updated_at)
+                FROM {schema}.session AS session
+                INNER JOIN {schema}.event AS event ON session.id = event.session_id
+                WHERE session.plio_id = plio.id
+            )
+        )
+        FROM {schema}.plio AS plio
+        WHERE plio.uuid = '{plio_uuid}'"""
+
+
+def get_plio_viewer_sessions_query(
+    plio_id: int, schema: str, user_ids: Tuple[int] = None
+):
+    """
+    Returns the most recent session of each viewer of the given plio
+
+    :param plio_id: The database id of the plio to fetch the sessions for
+    :type plio_id: int
+    :param schema: The schema from which the tables are to be accessed
+    :type schema: str
+    :param user_ids: If given, only the sessions of these viewers are returned
+    :type user_ids: Tuple[int]
+    """
+    query = f"""
+        SELECT DISTINCT ON (session.user_id)
+            session.id,
+            session.user_id,
+            session.watch_time,
+            session.retention
+        FROM {schema}.session AS session
+        WHERE session.plio_id = {int(plio_id)}"""
+
+    if user_ids is not None:
+        user_ids = ", ".join(str(int(user_id)) for user_id in user_ids)
+        query += f" AND session.user_id IN ({user_ids})"
+
+    return query + " ORDER BY session.user_id, session.id DESC"
+
+
+def get_plio_viewer_responses_query(
+    plio_id: int, schema: str, user_ids: Tuple[int] = None
+):
+    """
+    Returns the responses to the non-survey questions of the given plio from the
+    most recent session of each viewer
+
+    :param plio_id: The database id of the plio to fetch the responses for
+    :type plio_id: int
+    :param schema: The schema from which the tables are to be accessed
+    :type schema: str
+    :param user_ids: If given, only the responses of these viewers are returned
+    :type user_ids: Tuple[int]
+    """
+    return f"""
+        WITH latestSession AS ({get_plio_viewer_sessions_query(plio_id, schema, user_ids)})
+        SELECT
+            latestSession.user_id,
+            sessionAnswer.answer,
+            question.type AS question_type,
+            question.correct_answer AS question_correct_answer
+        FROM latestSession
+        INNER JOIN {schema}.session_answer AS sessionAnswer
+        ON latestSession.id = sessionAnswer.session_id
+        INNER JOIN {schema}.item AS item
+        ON item.id = sessionAnswer.item_id
+        INNER JOIN {schema}.question AS question ON question.item_id = item.id
+        WHERE item.type = 'question' AND NOT question.survey"""
+
+
+def get_user_plio_state_update_query(event_ids: Tuple[int], schema: str):
+    """
+    Makes the most recent of the given events the last event of its user-plio
+    pair, for every pair that the events belong to, unless the pair already
+    points to a more recent event: one from a later session or, within the same
+    session, one that was updated later.
+
+    Deleted events and the events of deleted sessions are left out.
+
+    :param event_ids: The database ids of the events that were written
+    :type event_ids: Tuple[int]
+    :param schema: The schema from which the tables are to be accessed
+    :type schema: str
+    """
+    return f"""
+        INSERT INTO {schema}.user_plio_state AS state (
+            user_id,
+            plio_id,
+            last_event_id,
+            last_event_session_id,
+            last_event_updated_at,
+            last_event_player_time,
+            updated_at
+        )
+        SELECT DISTINCT ON (session.user_id, session.plio_id)
+            session.user_id,
+            session.plio_id,
+            event.id,
+            event.session_id,
+            event.updated_at,
+            event.player_time,
+            NOW()
+        FROM {schema}.event AS event
+        INNER JOIN {schema}.session AS session ON session.id = event.session_id
+        WHERE event.id IN ({", ".join(str(int(event_id)) for event_id in event_ids)})
+            AND event.deleted IS NULL
+            AND session.deleted IS NULL
+        -- a pair can only be written once by the same statement
+        ORDER BY
+            session.user_id,
+            session.plio_id,
+            event.session_id DESC,
+            event.updated_at DESC,
+            event.id DESC
+        ON CONFLICT (user_id, plio_id) DO UPDATE SET
+            last_event_id = EXCLUDED.last_event_id,
+            last_event_session_id = EXCLUDED.last_event_session_id,
+            last_event_updated_at = EXCLUDED.last_event_updated_at,
+            last_event_player_time = EXCLUDED.last_event_player_time,
+            updated_at = EXCLUDED.updated_at
+        WHERE (
+            state.last_event_session_id,
+            state.last_event_updated_at,
+            state.last_event_id
+        ) <= (
+            EXCLUDED.last_event_session_id,
+            EXCLUDED.last_event_updated_at,
+            EXCLUDED.last_event_id
+        )"""
+
+
+def get_unique_viewer_insert_query(plio_id: int, user_id: int, schema: str):
+    """
+    Adds the user as a viewer of the plio, unless they are one already, and
+    increments the number of unique viewers of the plio only if they were added
+
+    :param plio_id: The database id of the plio that the user viewed
+    :type plio_id: int
+    :param user_id: The database id of the user
+    :type user_id: int
+    :param schema: The schema from which the tables are to be accessed
+    :type schema: str
+    """
+    return f"""
+        WITH inserted AS (
+            INSERT INTO {schema}.plio_viewer (plio_id, user_id)
+            VALUES ({int(plio_id)}, {int(user_id)})
+            ON CONFLICT (plio_id, user_id) DO NOTHING
+            RETURNING id
+        )
+        UPDATE {schema}.plio
+        SET unique_viewers = unique_viewers + 1
+        WHERE id = {int(plio_id)} AND EXISTS (SELECT 1 FROM inserted)"""
+
+
+def get_plio_viewers_insert_query(plio_ids: Tuple[int], schema: str):
+    """
+    Adds the users with a (non-deleted) session of any of the given plios as
+    viewers of the plio, unless they are viewers already
+
+    :param plio_ids: The database ids of the plios
+    :type plio_ids: Tuple[int]
+    :param schema: The schema from which the tables are to be accessed
+    :type schema: str
+    """
+    return f"""
+        INSERT INTO {schema}.plio_viewer (plio_id, user_id)
+        SELECT DISTINCT session.plio_id, session.user_id
+        FROM {schema}.session AS session
+        WHERE session.plio_id IN ({", ".join(str(int(plio_id)) for plio_id in plio_ids)})
+            AND session.deleted IS NULL
+        ON CONFLICT (plio_id, user_id) DO NOTHING"""
+
+
+def get_rows_by_key_condition(key_column: str, exclude_deleted: bool = True):
+    """
+    Returns the condition on the rows to clone (see `get_clone_rows_query`)
+    that matches the rows whose key column has any of the given values
+
+    :param key_column: The column to match the values against
+    :type key_column: str
+    :param exclude_deleted: Whether to leave out the deleted rows
+    :type exclude_deleted: bool
+    """
+    condition = f'source."{key_column}" = ANY(%s)'
+    if exclude_deleted:
+        condition += " AND source.deleted IS NULL"
+    return condition
+
+
+def get_question_images_condition(schema: str):
+    """
+    Returns the condition on the images to clone (see `get_clone_rows_query`)
+    that matches the images of the (non-deleted) questions of the given items
+
+    :param schema: The schema from which the tables are to be accessed
+    :type schema: str
+    """
+    return f"""source.id IN (
+        SELECT image_id FROM "{schema}"."question"
+        WHERE item_id = ANY(%s) AND deleted IS NULL
+    )"""
+
+
+def get_clone_rows_query(
+    table: str,
+    columns: List[str],
+    where: str,
+    where_params: list,
+    source_schema: str,
+    target_schema: str,
+    remap: dict = None,
+    values: dict = None,
+):
+    """
+    Returns the query copying the rows of the table that match the given
+    condition from the source schema into the target schema (which may be the
+    same), along with its parameters. The query returns the id of each row
+    along with the id of its copy.
+
+    The id of each copy is drawn from the sequence of the target table up front,
+    in a CTE, so that the id of the row that it was copied from is known
+    without reading the rows into Python.
+
+    :param table: The table of the rows to copy
+    :type table: str
+    :param columns: The columns of the table to copy, other than the id
+    :type columns: List[str]
+    :param where: The condition on the rows to copy, with `source` as the alias
+        of the source table and `%s` for each parameter
+    :type where: str
+    :param where_params: The parameters of the condition
+    :type where_params: list
+    :param source_schema: The schema to copy the rows from
+    :type source_schema: str
+    :param target_schema: The schema to copy the rows to
+    :type target_schema: str
+    :param remap: The new value of a column by the value of another (or the
+        same) column of the row being copied, as
+        {column: (key column, type of the column, {key: new value})}, e.g. to
+        point a foreign key to the copy of the row it pointed to
+    :type remap: dict
+    :param values: The value of a column in every copy, as {column: value}
+    :type values: dict
+    """
+    remap = remap or {}
+    values = values or {}
+    source_table = f'"{source_schema}"."{table}"'
+    target_table = f'"{target_schema}"."{table}"'
+
+    select, select_params = [], []
+    joins, join_params = [], []
+    for column in columns:
+        if column in values:
+            select.append("%s")
+            select_params.append(values[column])
+        elif column in remap:
+            key_column, column_type, new_values = remap[column]
+            alias = f"remap_{len(joins)}"
+            select.append(f"{alias}.new_value")
+            joins.append(
+                f"LEFT JOIN unnest(%s::bigint[], %s::{column_type}[]) "
+                f"AS {alias}(old_value, new_value) "
+                f'ON {alias}.old_value = source."{key_column}"'
+            )
+            join_params += [list(new_values.keys()), list(new_values.values())]
+        else:
+            select.append(f'source."{column}"')
+
+    query = f"""
+        WITH copies AS (
+            SELECT source.id AS old_id, nextval(pg_get_serial_sequence(%s, 'id')) AS new_id
+            FROM {source_table} AS source
+            WHERE {where}
+        ), inserted AS (
+            INSERT INTO {target_table} (id, {", ".join(f'"{column}"' for column in columns)})
+            SELECT copies.new_id, {", ".join(select)}
+            FROM copies
+            JOIN {source_table} AS source ON source.id = copies.old_id
+            {" ".join(joins)}
+            RETURNING id
+        )
+        SELECT copies.old_id, copies.new_id
+        FROM copies JOIN inserted ON inserted.id = copies.new_id"""
+    return query, [target_table, *where_params, *select_params, *join_params]
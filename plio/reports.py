@@ -0,0 +1,462 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection
+from django_tenants.utils import schema_context
+
+from plio.models import Plio
+from plio.queries import (
+    get_plio_details_query,
+    get_sessions_dump_query,
+    get_responses_dump_query,
+    get_user_level_metrics_query,
+    get_events_query,
+    get_plio_report_watermark_query,
+)
+
+logger = logging.getLogger(__name__)
+
+# README bundled with every data dump
+REPORT_README_PATH = "./plio/static/plio/docs/download_csv_README.pdf"
+
+# number of rows fetched from the server-side cursor in one round-trip
+REPORT_FETCH_SIZE = 2000
+
+
+class ZipStreamBuffer(io.RawIOBase):
+    """
+    Write-only, non-seekable file object that `zipfile` writes the archive into.
+
+    Whatever has been written since the last `drain()` is handed out as one
+    chunk, so the archive can be sent out while it is still being built.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        """Returns and forgets all the bytes written so far"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def shift_answer_index(question_type: str, answer):
+    """
+    Converts a 0-indexed mcq/checkbox answer into the 1-indexed form
+    shown in the reports. Answers to other question types are returned as-is.
+    """
+    if answer is None:
+        return answer
+    if question_type == "mcq":
+        return answer + 1
+    if question_type == "checkbox":
+        return list(map(lambda x: x + 1, answer))
+    return answer
+
+
+def transform_responses(columns, rows):
+    """
+    Deserialises the submitted answers and makes them 1-indexed. The answer
+    column is moved to the end of the row.
+    """
+    answer_index = columns.index("answer")
+    question_type_index = columns.index("question_type")
+    columns = columns[:answer_index] + columns[answer_index + 1 :] + ["answer"]
+
+    def transform(row):
+        answer = row[answer_index]
+        if answer is not None:
+            answer = shift_answer_index(row[question_type_index], json.loads(answer))
+        return list(row[:answer_index]) + list(row[answer_index + 1 :]) + [answer]
+
+    return columns, map(transform, rows)
+
+
+def transform_plio_details(columns, rows):
+    """
+    Deserialises the correct answers and makes them 1-indexed. The correct
+    answer column is moved to the end of the row.
+    """
+    answer_index = columns.index("question_correct_answer")
+    question_type_index = columns.index("question_type")
+    columns = (
+        columns[:answer_index]
+        + columns[answer_index + 1 :]
+        + ["question_correct_answer"]
+    )
+
+    def transform(row):
+        answer = row[answer_index]
+        # subjective questions have no correct answer
+        if answer is not None:
+            answer = shift_answer_index(row[question_type_index], json.loads(answer))
+        return list(row[:answer_index]) + list(row[answer_index + 1 :]) + [answer]
+
+    return columns, map(transform, rows)
+
+
+# the CSVs built from the dump queries, in the order they are added to the zip
+REPORT_DUMPS = [
+    ("sessions.csv", get_sessions_dump_query, None),
+    ("user-level-metrics.csv", get_user_level_metrics_query, None),
+    ("responses.csv", get_responses_dump_query, transform_responses),
+    ("plio-interaction-details.csv", get_plio_details_query, transform_plio_details),
+    ("events.csv", get_events_query, None),
+]
+
+
+def iter_query_rows(query: str):
+    """
+    Runs the query on a server-side cursor and yields the column names
+    followed by the rows, fetching `REPORT_FETCH_SIZE` rows at a time.
+    """
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(query)
+        rows = cursor.fetchmany(REPORT_FETCH_SIZE)
+        # a named cursor only knows its description after the first fetch
+        yield [col[0] for col in cursor.description]
+        while rows:
+            yield from rows
+            rows = cursor.fetchmany(REPORT_FETCH_SIZE)
+
+
+def iter_report_zip(plio, schema: str, show_unmasked_user_id: bool):
+    """
+    Yields the zip containing the data dump of the given plio in chunks of bytes.
+
+    Rows are read from server-side cursors and written into the zip as they
+    arrive, so the memory used does not depend on the size of the plio's data.
+
+    :param plio: The plio to build the data dump for
+    :type plio: Plio
+    :param schema: The schema from which the tables are to be accessed
+    :type schema: str
+    :param show_unmasked_user_id: whether the user identifiers should be shown unmasked
+    :type show_unmasked_user_id: bool
+    """
+    buffer = ZipStreamBuffer()
+    archive = zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED)
+
+    def write_csv(filename, columns, rows):
+        with archive.open(filename, mode="w", force_zip64=True) as member:
+            member_text = io.TextIOWrapper(member, encoding="utf-8", newline="")
+            writer = csv.writer(member_text, lineterminator="\n")
+            writer.writerow(columns)
+            for index, row in enumerate(rows, start=1):
+                writer.writerow(row)
+                if index % REPORT_FETCH_SIZE == 0:
+                    member_text.flush()
+                    yield buffer.drain()
+            member_text.flush()
+            member_text.detach()
+        yield buffer.drain()
+
+    for filename, query_method, transform in REPORT_DUMPS:
+        result = iter_query_rows(
+            query_method(
+                plio.uuid, schema=schema, show_unmasked_user_id=show_unmasked_user_id
+            )
+        )
+        columns = next(result)
+        if transform is not None:
+            columns, result = transform(columns, result)
+        yield from write_csv(filename, columns, result)
+
+    yield from write_csv(
+        "plio-meta-details.csv",
+        ["id", "name", "video"],
+        [[plio.uuid, plio.name, plio.video.url if plio.video else None]],
+    )
+
+    archive.write(REPORT_README_PATH, "READ-ME-FIRST.pdf")
+    archive.close()
+    yield buffer.drain()
+
+
+def start_report_zip(plio, schema: str, show_unmasked_user_id: bool):
+    """
+    Builds the zip containing the data dump of the given plio up to its first
+    chunk (see `iter_report_zip`) and returns an iterator over all of its
+    chunks, so that a report that cannot be built at all fails before any
+    response is sent for it.
+
+    :param plio: The plio to build the data dump for
+    :type plio: Plio
+    :param schema: The schema from which the tables are to be accessed
+    :type schema: str
+    :param show_unmasked_user_id: whether the user identifiers should be shown unmasked
+    :type show_unmasked_user_id: bool
+    """
+    chunks = iter_report_zip(
+        plio, schema=schema, show_unmasked_user_id=show_unmasked_user_id
+    )
+    first_chunk = next(chunks)
+
+    def iter_chunks():
+        yield first_chunk
+        try:
+            yield from chunks
+        except Exception:
+            # the status of the response has been sent already, so the
+            # connection is dropped before the end of the zip instead
+            logger.exception("Report of plio %s failed while streaming", plio.uuid)
+            raise
+
+    return iter_chunks()
+
+
+# states a report job moves through
+REPORT_JOB_QUEUED = "queued"
+REPORT_JOB_RUNNING = "running"
+REPORT_JOB_COMPLETED = "completed"
+REPORT_JOB_FAILED = "failed"
+
+# how long the state of a report job is kept around (in seconds)
+REPORT_JOB_TIMEOUT = 60 * 60 * 24
+
+# how often the process running report jobs records that it is still alive,
+# and how long after its last record its queued and running jobs are taken to
+# have been lost along with it and are queued again (in seconds)
+REPORT_HEARTBEAT_INTERVAL = 10
+REPORT_HEARTBEAT_TIMEOUT = 60
+
+# the id of this process, which the report jobs it runs are recorded with
+REPORT_PROCESS_ID = uuid.uuid4().hex
+
+# the name of a stored report: the version of the report data and the visibility
+# of the user identifiers in it
+REPORT_ARTIFACT_NAME_REGEX = re.compile(
+    r"^(?P<version>\d+)-(?P<visibility>masked|unmasked)\.zip$"
+)
+
+# the pool running the report jobs and the thread recording that this process
+# is alive; created on first use
+_report_executor = None
+_report_heartbeat = None
+_report_lock = threading.Lock()
+
+
+def get_report_process_cache_key(process_id: str):
+    return f"report_process_{process_id}"
+
+
+def record_report_heartbeat():
+    """Records that this process is alive to run the report jobs queued in it"""
+    cache.set(
+        get_report_process_cache_key(REPORT_PROCESS_ID),
+        time.time(),
+        REPORT_HEARTBEAT_TIMEOUT,
+    )
+
+
+def run_report_heartbeat():
+    """Records that this process is alive, for as long as it runs"""
+    while True:
+        try:
+            record_report_heartbeat()
+        except Exception:
+            logger.exception("Could not record the report heartbeat")
+        time.sleep(REPORT_HEARTBEAT_INTERVAL)
+
+
+def get_report_executor():
+    """
+    Returns the pool of worker threads that build the reports, starting the
+    heartbeat of this process along with it
+    """
+    global _report_executor, _report_heartbeat
+    with _report_lock:
+        if _report_executor is None:
+            _report_executor = ThreadPoolExecutor(
+                max_workers=settings.REPORT_WORKERS, thread_name_prefix="plio-report"
+            )
+            _report_heartbeat = threading.Thread(
+                target=run_report_heartbeat, name="plio-report-heartbeat", daemon=True
+            )
+            _report_heartbeat.start()
+    return _report_executor
+
+
+def get_report_watermark(plio, schema: str):
+    """Returns the time of the most recent change to the plio's report data"""
+    with connection.cursor() as cursor:
+        cursor.execute(get_plio_report_watermark_query(plio.uuid, schema))
+        return cursor.fetchone()[0]
+
+
+def get_report_artifact_path(plio, schema: str, show_unmasked_user_id: bool):
+    """
+    Returns the path in the default storage where the report for the current
+    state of the plio's data is stored. The path changes whenever the report
+    data changes, so a stored artifact never goes stale.
+    """
+    watermark = get_report_watermark(plio, schema)
+    version = watermark.strftime("%Y%m%d%H%M%S%f")
+    visibility = "unmasked" if show_unmasked_user_id else "masked"
+    return f"reports/{schema}/{plio.uuid}/{version}-{visibility}.zip"
+
+
+def get_report_job_cache_key(job_id: str):
+    return f"report_job_{job_id}"
+
+
+def get_report_job(job_id: str):
+    """Returns the state of the report job with the given id (None if unknown)"""
+    return cache.get(get_report_job_cache_key(job_id))
+
+
+def set_report_job(job):
+    cache.set(get_report_job_cache_key(job["id"]), job, REPORT_JOB_TIMEOUT)
+
+
+def is_report_job_stale(job):
+    """
+    Whether the job is queued or running in a process that has stopped
+    recording its heartbeat, and so must have died along with the job. A job
+    that takes long to build is left alone as long as its process is alive.
+    """
+    if job["status"] not in [REPORT_JOB_QUEUED, REPORT_JOB_RUNNING]:
+        return False
+    process_cache_key = get_report_process_cache_key(job.get("process", ""))
+    return cache.get(process_cache_key) is None
+
+
+def parse_report_artifact_name(file_name: str):
+    """
+    Returns the version and visibility of a stored report from its file name,
+    or None if the file is not a report
+    """
+    match = REPORT_ARTIFACT_NAME_REGEX.match(file_name)
+    if match is None:
+        return None
+    return match.group("version"), match.group("visibility")
+
+
+def delete_stale_report_artifacts(artifact_path: str):
+    """Deletes the older reports of the same plio with the same visibility"""
+    directory, file_name = os.path.split(artifact_path)
+    version, visibility = parse_report_artifact_name(file_name)
+    _, file_names = default_storage.listdir(directory)
+    for stale_file_name in file_names:
+        parsed = parse_report_artifact_name(stale_file_name)
+        if parsed is None or parsed[1] != visibility:
+            continue
+        # the versions are timestamps of the same length, so they sort as text;
+        # a newer report built in the meantime is left alone
+        if parsed[0] < version:
+            default_storage.delete(os.path.join(directory, stale_file_name))
+
+
+def build_report_artifact(job):
+    """Builds the zip for the given report job and saves it to the default storage"""
+    with schema_context(job["schema"]):
+        plio = Plio.objects.select_related("video").get(uuid=job["plio"])
+
+    with tempfile.TemporaryFile() as report_file:
+        for chunk in iter_report_zip(
+            plio,
+            schema=job["schema"],
+            show_unmasked_user_id=job["show_unmasked_user_id"],
+        ):
+            report_file.write(chunk)
+        report_file.seek(0)
+        default_storage.save(job["artifact"], File(report_file))
+
+    delete_stale_report_artifacts(job["artifact"])
+
+
+def run_report_job(job):
+    """Runs the given report job and records its progress"""
+    job["status"] = REPORT_JOB_RUNNING
+    set_report_job(job)
+    try:
+        build_report_artifact(job)
+    except Exception:
+        logger.exception("Report job %s failed", job["id"])
+        job["status"] = REPORT_JOB_FAILED
+    else:
+        job["status"] = REPORT_JOB_COMPLETED
+    set_report_job(job)
+
+
+def run_report_job_in_worker(job):
+    try:
+        run_report_job(job)
+    finally:
+        # the worker thread has its own database connection
+        connection.close()
+
+
+def enqueue_report_job(plio, schema: str, show_unmasked_user_id: bool):
+    """
+    Queues a job that builds the data dump of the plio, unless a report for the
+    current state of the plio's data is already stored or being built.
+
+    :param plio: The plio to build the data dump for
+    :type plio: Plio
+    :param schema: The schema from which the tables are to be accessed
+    :type schema: str
+    :param show_unmasked_user_id: whether the user identifiers should be shown unmasked
+    :type show_unmasked_user_id: bool
+    """
+    artifact_path = get_report_artifact_path(plio, schema, show_unmasked_user_id)
+    job_id = hashlib.sha256(artifact_path.encode()).hexdigest()[:32]
+
+    job = get_report_job(job_id)
+    if job is not None:
+        if job["status"] != REPORT_JOB_FAILED and not is_report_job_stale(job):
+            return job
+        # a failed job is tried again, and so is one whose worker was lost
+        # (e.g. the process running it was restarted) before it finished
+        cache.delete(get_report_job_cache_key(job_id))
+
+    job = {
+        "id": job_id,
+        "plio": plio.uuid,
+        "schema": schema,
+        "show_unmasked_user_id": show_unmasked_user_id,
+        "artifact": artifact_path,
+        "status": REPORT_JOB_QUEUED,
+        "process": REPORT_PROCESS_ID,
+    }
+
+    if default_storage.exists(artifact_path):
+        # the data has not changed since the last report was built
+        job["status"] = REPORT_JOB_COMPLETED
+        set_report_job(job)
+        return job
+
+    # the heartbeat is recorded before the job can be seen by other requests
+    record_report_heartbeat()
+    if not cache.add(get_report_job_cache_key(job_id), job, REPORT_JOB_TIMEOUT):
+        # the same job was queued by another request in the meantime
+        return get_report_job(job_id)
+
+    if settings.REPORT_JOBS_EAGER:
+        run_report_job(job)
+    else:
+        get_report_executor().submit(run_report_job_in_worker, dict(job))
+    return get_report_job(job_id) or job
@@ -0,0 +1,101 @@
+import json
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from plio.cache import get_cache_key, get_or_render
+
+
+class RenderedJSONResponse(Response):
+    """
+    A response whose JSON has already been rendered (see `plio.cache.render_json`).
+
+    The JSON is served as is, gzipped if the client accepts it and a gzipped
+    copy was kept. Only other renderers (e.g. the browsable API) and tests
+    reading `data` decode it again. Any other bytes than the rendered JSON
+    get a weak ETag, as Django's `GZipMiddleware` does.
+    """
+
+    def __init__(self, rendered, **kwargs):
+        self.rendered = rendered
+        super().__init__(None, **kwargs)
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = json.loads(self.rendered.content)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    def accepts_gzip(self):
+        request = self.renderer_context["request"]
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        return "gzip" in accept_encoding.lower()
+
+    def weaken_etag(self):
+        etag = self.get("ETag")
+        if etag and not etag.startswith("W/"):
+            self["ETag"] = f"W/{etag}"
+
+    @property
+    def rendered_content(self):
+        renderer = getattr(self, "accepted_renderer", None)
+        accepted_media_type = getattr(self, "accepted_media_type", None)
+        context = getattr(self, "renderer_context", None)
+        # anything other than the default compact JSON is rendered again
+        if not isinstance(renderer, JSONRenderer) or renderer.get_indent(
+            accepted_media_type, context or {}
+        ):
+            self.weaken_etag()
+            return super().rendered_content
+
+        self["Content-Type"] = renderer.media_type
+        if self.rendered.gzipped_content is None:
+            return self.rendered.content
+
+        patch_vary_headers(self, ["Accept-Encoding"])
+        if not self.accepts_gzip():
+            return self.rendered.content
+        self["Content-Encoding"] = "gzip"
+        self.weaken_etag()
+        return self.rendered.gzipped_content
+
+
+def get_cached_json_response(serializer, etag=None):
+    """
+    Returns the response for the instance of the given serializer, rendering
+    its JSON only when it is not cached already
+
+    :param serializer: the serializer of the instance to respond with
+    :type serializer: Serializer
+    :param etag: the current ETag of the response, if any
+    :type etag: str
+    """
+    cache_key = get_cache_key(serializer.instance)
+    if cache_key is None:
+        headers = {"ETag": etag} if etag else None
+        return Response(serializer.data, headers=headers)
+
+    # the cached JSON carries the ETag it was rendered for, which differs from
+    # the current one when a stale copy is served while the JSON is rebuilt
+    rendered = get_or_render(cache_key, lambda: serializer.data, etag)
+    headers = {"ETag": rendered.etag} if rendered.etag else None
+    return RenderedJSONResponse(rendered, headers=headers)
+
+
+def get_not_modified_response(request, etag):
+    """
+    Returns a 304 response if the client already has the response with the
+    given ETag (going by its `If-None-Match` header), and None otherwise
+    """
+    if etag is None:
+        return None
+    # the headers for the 304 response to carry over
+    response = HttpResponse(headers={"ETag": etag, "Vary": "Accept-Encoding"})
+    not_modified = get_conditional_response(request, etag=etag, response=response)
+    return None if not_modified is response else not_modified
@@ -0,0 +1,69 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast, Greatest
+from rest_framework.filters import SearchFilter
+
+from plio.config import plio_status_choices
+
+# the annotation holding how well each plio matches the search
+SEARCH_RANK_FIELD = "search_rank"
+
+# search terms that could be a part of a timestamp, e.g. "2021-06" or "10:30"
+TIMESTAMP_TERM_REGEX = re.compile(r"^[\d\-:.+ ]+$")
+
+
+class PlioSearchFilter(SearchFilter):
+    """
+    This class extends the SearchFilter class provided in
+    rest_framework/filters.py, keeping its `?search=` query param: the plios
+    matching every one of the search terms are returned.
+
+    A term matches the name or uuid of a plio if it is a part of it (ignoring
+    case), as with `SearchFilter`. These matches are looked up in the trigram
+    indexes on both fields (see `Plio.Meta.indexes`) instead of scanning every
+    plio, so the other fields that `SearchFilter` searched are only checked when
+    the term could match them:
+        - status: if the term is a part of one of the statuses
+        - updated_at: if the term only has the characters of a timestamp
+
+    Each plio is annotated with how similar its name or uuid is to the search,
+    which `CustomOrderingFilter` orders the results by.
+    """
+
+    def get_term_filter(self, term):
+        """The filter for the plios matching the given search term"""
+        conditions = [Q(name__icontains=term), Q(uuid__icontains=term)]
+        conditions += [
+            Q(status=status)
+            for status, _ in plio_status_choices
+            if term.lower() in status
+        ]
+        if TIMESTAMP_TERM_REGEX.match(term):
+            conditions.append(Q(updated_at__icontains=term))
+        return reduce(or_, conditions)
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+
+        queryset = queryset.filter(*map(self.get_term_filter, search_terms))
+
+        # the similarity is stored as a real, and cast so that it can be compared
+        # exactly with the value read back (e.g. by `KeysetPagination`)
+        search = " ".join(search_terms)
+        return queryset.annotate(
+            **{
+                SEARCH_RANK_FIELD: Cast(
+                    Greatest(
+                        TrigramSimilarity("name", search),
+                        TrigramSimilarity("uuid", search),
+                    ),
+                    FloatField(),
+                )
+            }
+        )
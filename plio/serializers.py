@@ -1,10 +1,9 @@
 from django.conf import settings
 from rest_framework import serializers
-from plio.models import Video, Plio, Item, Question, Image
+from plio.models import Video, Plio, Item, Question, Image, load_plio_tree
 from users.models import User
 from users.serializers import UserSerializer
-from django.core.cache import cache
-from plio.cache import get_cache_key
+from plio.cache import get_cache_key, get_or_build
 
 
 class ImageSerializer(serializers.ModelSerializer):
@@ -66,17 +65,20 @@ class PlioSerializer(serializers.ModelSerializer):
         read_only_fields = ["uuid"]
 
     def to_representation(self, instance):
-        # check if a cached version exists and if it does, return it as the response
-        cache_key = get_cache_key(instance)
-        cached_response = cache.get(cache_key)
-        if cached_response:
-            return cached_response
+        # return the cached version if it exists, otherwise build it, with a
+        # single worker building it when many requests miss it at once
+        return get_or_build(
+            get_cache_key(instance), lambda: self.build_representation(instance)
+        )
+
+    def build_representation(self, instance):
+        # fetch the whole tree of the plio at once instead of item by item
+        load_plio_tree([instance])
 
         response = super().to_representation(instance)
         response["video"] = VideoSerializer(instance.video).data
         response["created_by"] = UserSerializer(instance.created_by).data
         response["items"] = ItemSerializer(instance.item_set, many=True).data
-        cache.set(cache_key, response)  # set a cached version
         return response
 
 
@@ -97,7 +99,8 @@ class ItemSerializer(serializers.ModelSerializer):
         response = super().to_representation(instance)
         # add the question details to the item response if it exists
         if instance.type == "question":
-            question = instance.question_set.all().first()
+            # makes use of the questions if they have been prefetched
+            question = next(iter(instance.question_set.all()), None)
             if question:
                 response["details"] = QuestionSerializer(question).data
             else:
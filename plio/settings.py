@@ -119,6 +119,7 @@ SOCIAL_AUTH_GOOGLE_OAUTH2_SCOPE = [
 MIDDLEWARE = [
     "silk.middleware.SilkyMiddleware",
     "organizations.middleware.OrganizationTenantMiddleware",
+    "plio.middleware.CacheInvalidationMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -187,7 +188,12 @@ LOGGING = {
             "level": "DEBUG",
             "propagate": True,
             "formatter": "verbose",
-        }
+        },
+        "plio.cache": {
+            "handlers": ["file"],
+            "level": "INFO",
+            "propagate": True,
+        },
     },
 }
 
@@ -363,6 +369,31 @@ CACHES = {
     }
 }
 
+# in-process cache in front of redis for the plio and user responses; each
+# process keeps at most `LOCAL_CACHE_MAX_BYTES` of (pickled) responses for at
+# most `LOCAL_CACHE_TIMEOUT` seconds, dropping them as soon as any process
+# invalidates them
+LOCAL_CACHE_ENABLED = os.environ.get("LOCAL_CACHE_ENABLED", "false") == "true"
+LOCAL_CACHE_MAX_BYTES = int(os.environ.get("LOCAL_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+LOCAL_CACHE_TIMEOUT = int(os.environ.get("LOCAL_CACHE_TIMEOUT", 300))
+
+# how often, in seconds, each process logs the hit rates of its cache reads
+# (see `plio.cache.CacheStats`); 0 turns the logging off
+CACHE_STATS_LOG_INTERVAL = int(os.environ.get("CACHE_STATS_LOG_INTERVAL", 300))
+
+# whether a gzipped copy of the cached JSON responses is kept as well, to be
+# served as is to clients accepting gzip
+RESPONSE_CACHE_GZIP = os.environ.get("RESPONSE_CACHE_GZIP", "true") == "true"
+
+# number of worker threads building plio reports in the background
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", 2))
+# build reports inside the request instead of in the background (used in tests)
+REPORT_JOBS_EAGER = False
+
+# flush cache invalidations made in a transaction without waiting for it to
+# commit (used in tests, whose transactions are never committed)
+CACHE_INVALIDATIONS_EAGER = False
+
 # Django 4.0 defaults SECURE_CROSS_ORIGIN_OPENER_POLICY to "same-origin",
 # which breaks popup-based Google OAuth sign-in. Allow popups to communicate
 # with their opener.
@@ -1,7 +1,11 @@
 from django.dispatch import receiver
 from django.db.models.signals import post_save, post_delete
 
-from plio.cache import invalidate_cache_for_instance, invalidate_cache_for_instances
+from plio.cache import (
+    bump_version,
+    get_video_version_key,
+    invalidate_cache_for_instance,
+)
 from plio.models import Video, Plio, Item, Question
 
 
@@ -12,10 +16,8 @@ def plio_update_cache(sender, instance, **kwargs):
 
 @receiver([post_save, post_delete], sender=Video)
 def video_update_cache(sender, instance, **kwargs):
-    # fetch all plio with video id
-    plios = Plio.objects.filter(video_id=instance.id)
-    # invalidate saved cache for the plios
-    invalidate_cache_for_instances(plios)
+    # the cache keys of the plios with this video include its version
+    bump_version(get_video_version_key(instance.id))
 
 
 @receiver([post_save, post_delete], sender=Item)
@@ -38,3 +38,7 @@ STORAGES = {
 }
 MEDIA_ROOT = os.path.join(tempfile.gettempdir(), "plio-tests-{}".format(worker))
 SMS_DRIVER = None
+# build reports inside the request so tests can read the stored artifact
+REPORT_JOBS_EAGER = True
+# each test runs in a transaction that is rolled back rather than committed
+CACHE_INVALIDATIONS_EAGER = True
@@ -1,10 +1,12 @@
 import datetime
+import io
 import random
 import string
 import json
 import tempfile
+import zipfile
 from django.utils import timezone
-from django.http import FileResponse
+from django.http import StreamingHttpResponse
 
 from rest_framework.test import APIClient
 from rest_framework.test import APITestCase
@@ -14,17 +16,37 @@ from oauth2_provider.models import AccessToken
 from django.urls import reverse
 from django.db import connection
 from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.test import override_settings
 from django_redis import get_redis_connection
 
 from users.models import User, Role, OrganizationUser
+from organizations.cache import tenant_cache
 from organizations.models import Organization
 from plio.settings import API_APPLICATION_NAME, OAUTH2_PROVIDER
 from plio.models import Plio, Video, Item, Question, Image
-from entries.models import Session, SessionAnswer
+from entries.models import (
+    Session,
+    SessionAnswer,
+    PendingViewerMetrics,
+    PlioMetrics,
+)
 from plio.views import StandardResultsSetPagination
-from plio.cache import get_cache_key
+from plio.cache import (
+    cache_stats,
+    get_cache_key,
+    pending_invalidations,
+    response_cache,
+    version_cache,
+)
 from plio.serializers import ImageSerializer
+from plio.reports import (
+    delete_stale_report_artifacts,
+    get_report_job,
+    get_report_process_cache_key,
+    set_report_job,
+)
 
 
 LOCAL_FILE_STORAGES = {
@@ -98,6 +120,11 @@ class BaseTestCase(APITestCase):
     def tearDown(self):
         # flush the cache
         get_redis_connection("default").flushdb()
+        tenant_cache.clear()
+        response_cache.clear()
+        version_cache.clear()
+        cache_stats.clear()
+        pending_invalidations.clear()
 
     def setUp(self):
         self.client = APIClient()
@@ -1227,6 +1254,76 @@ class PlioTestCase(LocalImageStorageMixin, BaseTestCase):
         self.assertEqual(response.data["accuracy"], None)
         self.assertEqual(response.data["has_survey_question"], True)
 
+    def test_metrics_updated_incrementally_when_sessions_change(self):
+        # seed an item and a question
+        item = Item.objects.create(type="question", plio=self.plio_1, time=1)
+        Question.objects.create(
+            type="mcq", item=item, text="test", options=["", ""], correct_answer=0
+        )
+
+        session = Session.objects.create(
+            plio=self.plio_1, user=self.user, watch_time=20
+        )
+        session_answer = SessionAnswer.objects.create(session=session, item=item)
+
+        # the first request builds the stored metrics for the plio
+        response = self.client.get(f"/api/v1/plios/{self.plio_1.uuid}/metrics/")
+        self.assertEqual(response.data["unique_viewers"], 1)
+        self.assertEqual(response.data["average_num_answered"], 0)
+        self.assertEqual(response.data["accuracy"], None)
+
+        # a new viewer shows up and the first viewer answers correctly
+        session_2 = Session.objects.create(
+            plio=self.plio_1, user=self.user_2, watch_time=40
+        )
+        SessionAnswer.objects.create(session=session_2, item=item, answer=1)
+        session_answer.answer = 0
+        session_answer.save()
+
+        # the writes only queued their viewers, without touching the totals
+        self.assertEqual(PlioMetrics.objects.get(plio=self.plio_1).num_viewers, 1)
+        self.assertEqual(
+            set(
+                PendingViewerMetrics.objects.filter(plio=self.plio_1).values_list(
+                    "user_id", flat=True
+                )
+            ),
+            {self.user.id, self.user_2.id},
+        )
+
+        # the totals are updated in place on the next read instead of being rebuilt
+        response = self.client.get(f"/api/v1/plios/{self.plio_1.uuid}/metrics/")
+        plio_metrics = PlioMetrics.objects.get(plio=self.plio_1)
+        self.assertFalse(plio_metrics.is_stale)
+        self.assertEqual(plio_metrics.num_viewers, 2)
+        self.assertEqual(plio_metrics.num_answering, 2)
+        self.assertFalse(PendingViewerMetrics.objects.filter(plio=self.plio_1).exists())
+        self.assertEqual(response.data["unique_viewers"], 2)
+        self.assertEqual(response.data["average_watch_time"], 30.0)
+        self.assertEqual(response.data["average_num_answered"], 1)
+        self.assertEqual(response.data["accuracy"], 50.0)
+        self.assertEqual(response.data["percent_completed"], 100.0)
+
+    def test_metrics_rebuilt_when_questions_change(self):
+        item = Item.objects.create(type="question", plio=self.plio_1, time=1)
+        question = Question.objects.create(
+            type="mcq", item=item, text="test", options=["", ""], correct_answer=0
+        )
+        session = Session.objects.create(plio=self.plio_1, user=self.user)
+        SessionAnswer.objects.create(session=session, item=item, answer=1)
+
+        response = self.client.get(f"/api/v1/plios/{self.plio_1.uuid}/metrics/")
+        self.assertEqual(response.data["accuracy"], 0)
+
+        # changing the correct answer re-scores every viewer
+        question.correct_answer = 1
+        question.save()
+        self.assertTrue(PlioMetrics.objects.get(plio=self.plio_1).is_stale)
+
+        response = self.client.get(f"/api/v1/plios/{self.plio_1.uuid}/metrics/")
+        self.assertEqual(response.data["accuracy"], 100.0)
+        self.assertFalse(PlioMetrics.objects.get(plio=self.plio_1).is_stale)
+
 
 class PlioDownloadTestCase(BaseTestCase):
     def setUp(self):
@@ -1255,7 +1352,7 @@ class PlioDownloadTestCase(BaseTestCase):
         # download plio data
         response = self.client.get(f"/api/v1/plios/{self.plio.uuid}/download_data/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(isinstance(response, FileResponse))
+        self.assertTrue(isinstance(response, StreamingHttpResponse))
 
     def test_non_plio_owner_cannot_download_data(self):
         # make a plio with new user
@@ -1296,11 +1393,94 @@ class PlioDownloadTestCase(BaseTestCase):
             HTTP_ORGANIZATION=self.organization.shortcode,
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(isinstance(response, FileResponse))
+        self.assertTrue(isinstance(response, StreamingHttpResponse))
 
         # set db connection back to public (default) schema
         connection.set_schema_to_public()
 
+    def test_draft_plio_report_cannot_be_requested(self):
+        # change plio status to draft
+        self.plio.status = "draft"
+        self.plio.save()
+        response = self.client.post(f"/api/v1/plios/{self.plio.uuid}/reports/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_requested_report_can_be_downloaded(self):
+        # reports are built eagerly in tests, so the job is already complete
+        response = self.client.post(f"/api/v1/plios/{self.plio.uuid}/reports/")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "completed")
+        job_id = response.data["id"]
+
+        response = self.client.get(f"/api/v1/plios/{self.plio.uuid}/reports/{job_id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"id": job_id, "status": "completed"})
+
+        response = self.client.get(
+            f"/api/v1/plios/{self.plio.uuid}/reports/{job_id}/download/"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertIn("sessions.csv", archive.namelist())
+        self.assertIn("READ-ME-FIRST.pdf", archive.namelist())
+
+    def test_report_is_reused_while_plio_data_is_unchanged(self):
+        first = self.client.post(f"/api/v1/plios/{self.plio.uuid}/reports/")
+        second = self.client.post(f"/api/v1/plios/{self.plio.uuid}/reports/")
+        # the stored artifact is handed out instead of building the report again
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data["id"], first.data["id"])
+
+        # a new session changes the report data, so a new report is built
+        Session.objects.create(plio=self.plio, user=self.user)
+        third = self.client.post(f"/api/v1/plios/{self.plio.uuid}/reports/")
+        self.assertEqual(third.status_code, status.HTTP_202_ACCEPTED)
+        self.assertNotEqual(third.data["id"], first.data["id"])
+
+    def test_report_is_rebuilt_when_the_video_changes(self):
+        first = self.client.post(f"/api/v1/plios/{self.plio.uuid}/reports/")
+
+        # the video url is part of the report data
+        self.video.url = "https://www.youtube.com/watch?v=changed"
+        self.video.save()
+        second = self.client.post(f"/api/v1/plios/{self.plio.uuid}/reports/")
+        self.assertNotEqual(second.data["id"], first.data["id"])
+
+    def test_unknown_report_cannot_be_downloaded(self):
+        response = self.client.get(
+            f"/api/v1/plios/{self.plio.uuid}/reports/{'0' * 32}/download/"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_report_job_lost_with_its_worker_is_queued_again(self):
+        response = self.client.post(f"/api/v1/plios/{self.plio.uuid}/reports/")
+        job = get_report_job(response.data["id"])
+
+        # a job running in a live process is left to it, however long it takes
+        set_report_job({**job, "status": "running"})
+        response = self.client.post(f"/api/v1/plios/{self.plio.uuid}/reports/")
+        self.assertEqual(response.data["status"], "running")
+
+        # one whose process stopped recording its heartbeat is taken to be lost
+        cache.delete(get_report_process_cache_key(job["process"]))
+        response = self.client.post(f"/api/v1/plios/{self.plio.uuid}/reports/")
+        self.assertEqual(response.data["status"], "completed")
+
+    def test_only_older_reports_with_the_same_visibility_are_deleted(self):
+        directory = f"reports/public/{self.plio.uuid}"
+        file_names = [
+            "20200101000000000000-masked.zip",
+            "20200101000000000000-unmasked.zip",
+            "20210101000000000000-masked.zip",
+            "20220101000000000000-masked.zip",
+        ]
+        for file_name in file_names:
+            default_storage.save(f"{directory}/{file_name}", ContentFile(b"zip"))
+
+        delete_stale_report_artifacts(f"{directory}/20210101000000000000-masked.zip")
+        _, remaining = default_storage.listdir(directory)
+        self.assertEqual(sorted(remaining), file_names[1:])
+
 
 class VideoTestCase(BaseTestCase):
     def setUp(self):
@@ -1355,15 +1535,17 @@ class VideoTestCase(BaseTestCase):
             {"title": new_title_for_video},
         )
 
-        # plio cache should be deleted after video update
-        self.assertEqual(len(cache.keys(cache_key_name)), 0)
+        # the plio cache key should change after video update
+        new_cache_key_name = get_cache_key(plio)
+        self.assertNotEqual(new_cache_key_name, cache_key_name)
+        self.assertEqual(len(cache.keys(new_cache_key_name)), 0)
 
         # re-request plio again via API after video update
         self.client.get(reverse("plios-detail", kwargs={"uuid": plio.uuid}))
 
         # check plio cache with the new video title
         self.assertEqual(
-            cache.get(cache_key_name)["video"]["title"], new_title_for_video
+            cache.get(new_cache_key_name)["video"]["title"], new_title_for_video
         )
 
 
@@ -40,6 +40,7 @@ from plio.views import (
 )
 from entries.views import SessionViewSet, SessionAnswerViewSet, EventViewSet
 from users import consumers
+from entries.consumers import SessionConsumer
 from etl.views import BigqueryJobsViewSet
 
 schema_view = get_schema_view(
@@ -113,4 +114,6 @@ urlpatterns += [re_path(r"^silk/", include("silk.urls", namespace="silk"))]
 websocket_urlpatterns = [
     # consumer for a particular user
     path("api/v1/users/<int:user_id>", consumers.UserConsumer.as_asgi()),
+    # consumer for the telemetry of a particular session
+    path("api/v1/sessions/<int:session_id>", SessionConsumer.as_asgi()),
 ]
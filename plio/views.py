@@ -1,26 +1,18 @@
-import os
-import shutil
-import json
-
-from rest_framework import viewsets, status, filters
+from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
 from django.db import connection
-from django.db.models import Q, F, Count, IntegerField, OuterRef, Subquery
-from django.db.models.functions import Coalesce
-from django.http import FileResponse
+from django.db.models import Q, F
+from django.core.files.storage import default_storage
+from django.http import FileResponse, StreamingHttpResponse
 
 from django_tenants.utils import get_tenant_model
 
-import pandas as pd
-
 from organizations.middleware import OrganizationTenantMiddleware
-from organizations.models import Organization
-from users.models import OrganizationUser
 from plio.models import Video, Plio, Item, Question, Image
-from entries.models import Session
+from entries.metrics import get_plio_metrics, serialize_plio_metrics
 from plio.serializers import (
     VideoSerializer,
     PlioSerializer,
@@ -31,18 +23,25 @@ from plio.serializers import (
 from plio.settings import (
     DEFAULT_TENANT_SHORTCODE,
 )
-from plio.queries import (
-    get_plio_details_query,
-    get_sessions_dump_query,
-    get_responses_dump_query,
-    get_user_level_metrics_query,
-    get_events_query,
-    get_plio_latest_sessions_query,
-    get_plio_latest_responses_query,
-)
 from plio.permissions import PlioPermission
 from plio.ordering import CustomOrderingFilter
-from plio.cache import invalidate_cache_for_instance
+from plio.search import PlioSearchFilter
+from plio.pagination import KeysetPagination, count_queryset, get_count_mode
+from plio.cache import get_etag
+from plio.cloning import clone_plios, duplicate_plios
+from plio.config import plio_status_choices
+from plio.publishing import (
+    set_plios_status,
+    STATUS_NOT_FOUND,
+    STATUS_FORBIDDEN,
+)
+from plio.responses import get_cached_json_response, get_not_modified_response
+from plio.reports import (
+    start_report_zip,
+    enqueue_report_job,
+    get_report_job,
+    REPORT_JOB_COMPLETED,
+)
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -127,19 +126,39 @@ class PlioViewSet(viewsets.ModelViewSet):
     pagination_class = StandardResultsSetPagination
 
     # define the filter backends to use
-    # this inlcludes the search filtering and ordering
+    # this inlcludes the search filtering (on the name, uuid, status and
+    # updated_at of the plios) and ordering
     filter_backends = [
-        filters.SearchFilter,
+        PlioSearchFilter,
         CustomOrderingFilter,
     ]
 
-    # match the search query with the values of these fields
-    search_fields = [
-        "name",
-        "status",
-        "updated_at",
-        "uuid",
-    ]
+    @property
+    def paginator(self):
+        """
+        Pages through the listing with `KeysetPagination` when it is asked for
+        with `?pagination=cursor`, and by page number otherwise
+        """
+        if not hasattr(self, "_paginator"):
+            if self.request.query_params.get("pagination") == "cursor":
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+    def get_plio_response(self, request, plio):
+        """
+        Responds with the cached JSON of the plio, or with a 304 response if
+        the client already has it, so that a repeat fetch of an unchanged plio
+        neither builds nor sends it again
+        """
+        etag = get_etag(plio)
+        return get_not_modified_response(request, etag) or get_cached_json_response(
+            self.get_serializer(plio), etag
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_plio_response(request, self.get_object())
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -176,10 +195,7 @@ class PlioViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(created_by=self.request.user)
         else:
             # organizational workspace
-            if OrganizationUser.objects.filter(
-                organization__shortcode=self.organization_shortcode,
-                user=self.request.user.id,
-            ).exists():
+            if self.request.user.belongs_to_organization(self.organization_shortcode):
                 # user should be a part of the org
                 queryset = queryset.filter(
                     Q(is_public=True)
@@ -189,31 +205,23 @@ class PlioViewSet(viewsets.ModelViewSet):
                 # otherwise, they don't have access to any plio
                 queryset = Plio.objects.none()
 
-        num_plios = queryset.count()
-
-        # add the number of unique viewers to the queryset
-        plio_session_group = Session.objects.filter(plio__uuid=OuterRef("uuid")).values(
-            "plio__uuid"
-        )
-
-        plios_unique_users_count = plio_session_group.annotate(
-            count_unique_users=Count("user__id", distinct=True)
-        ).values("count_unique_users")
-
-        # annotate the plio's queryset with the count of unique users
-        queryset = queryset.annotate(
-            unique_viewers=Coalesce(
-                Subquery(plios_unique_users_count), 0, output_field=IntegerField()
-            )
-        )
+        # the counts can be estimated or cached instead of counted (`?count=`)
+        count_mode = get_count_mode(request)
+        num_plios = count_queryset(queryset, count_mode)
 
+        # the number of unique viewers of each plio is stored along with it
         queryset = self.filter_queryset(queryset)
+        params = {"raw_count": num_plios}
+        if isinstance(self.paginator, KeysetPagination):
+            # unlike the page numbers, the keyset pages do not count the results
+            params["count"] = count_queryset(queryset, count_mode)
+
         # adds the video URL to the queryset
         queryset = queryset.annotate(video_url=F("video__url"))
         page = self.paginate_queryset(queryset.values())
 
         if page is not None:
-            return self.get_paginated_response({"data": page, "raw_count": num_plios})
+            return self.get_paginated_response({"data": page, **params})
 
         # return an empty response in the paginated format if pagination fails
         return Response(
@@ -243,8 +251,7 @@ class PlioViewSet(viewsets.ModelViewSet):
                 {"detail": "Plio not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        serializer = self.get_serializer(plio)
-        return Response(serializer.data)
+        return self.get_plio_response(request, plio)
 
     @action(
         methods=["post"],
@@ -256,59 +263,94 @@ class PlioViewSet(viewsets.ModelViewSet):
         # else fetch the object
         plio = self.get_object()
 
-        video = Video.objects.get(pk=plio.video.id)
-        # django will auto-generate the key when the key is set to None
-        video.pk = None
-        # create a new instance of video
-        video.save()
+        # a duplicated plio will always be in "draft" mode
+        clone = duplicate_plios([plio])[plio.uuid]
+        return Response(self.get_serializer(clone).data)
 
-        items = Item.objects.filter(plio__id=plio.id)
-        questions = Question.objects.filter(item__plio__id=plio.id)
+    @action(methods=["post"], detail=False)
+    def bulk_duplicate(self, request):
+        """
+        Creates a clone of each of the plios with the given uuids, all in one
+        transaction, and returns the uuid of the clone of each plio
+        """
+        if "uuids" not in request.data:
+            return Response(
+                {"detail": "plio uuid(s) not provided"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        # django will auto-generate the key when the key is set to None
-        plio.pk = None
-        plio.uuid = None
-        plio.status = "draft"
-        plio.video = video
-        # a duplicated plio will always be in "draft" mode
-        plio.save()
+        uuids = request.data["uuids"]
 
-        if items:
-            for index, _ in enumerate(items):
-                items[index].plio = plio
-                items[index].pk = None
+        # ensure that a list of uuids has been provided
+        if not isinstance(uuids, list) or not all(
+            isinstance(uuid, str) for uuid in uuids
+        ):
+            return Response(
+                {"detail": "uuids should contain a list of plio uuids to duplicate"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-            # create the items
-            items = Item.objects.bulk_create(items)
+        plios = list(self.get_queryset().filter(uuid__in=uuids))
+        if len(plios) != len(set(uuids)):
+            return Response(
+                {"detail": "one or more of the uuids provided do not exist"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
 
-        # questions part
-        question_indices_with_image = []
-        images = []
+        # the user should be able to access every plio, as with `duplicate`
+        for plio in plios:
+            self.check_object_permissions(request, plio)
 
-        for index, question in enumerate(questions):
-            if question.image is not None:
-                question_indices_with_image.append(index)
-                images.append(question.image)
+        clones = duplicate_plios(plios)
+        return Response({uuid: clone.uuid for uuid, clone in clones.items()})
 
-        if images:
-            for index, _ in enumerate(images):
-                # reset the key - django will auto-generate the keys when they are set to None
-                images[index].pk = None
+    @action(methods=["post"], detail=False)
+    def bulk_status(self, request):
+        """
+        Publishes or unpublishes the plios with the given uuids at once, and
+        returns the result for each of them
+        """
+        if "uuids" not in request.data or "status" not in request.data:
+            return Response(
+                {"detail": "plio uuid(s) or status not provided"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-            images = Image.objects.bulk_create(images)
-            for index, question_index in enumerate(question_indices_with_image):
-                questions[question_index].image = images[index]
+        uuids = request.data["uuids"]
+        new_status = request.data["status"]
 
-        if questions:
-            item_ids = [item.id for item in items]
-            question_items = Item.objects.filter(id__in=item_ids, type="question")
-            for index, item in zip(range(len(questions)), question_items):
-                questions[index].item = item
-                questions[index].pk = None
+        # ensure that a list of uuids and a valid status have been provided
+        if not isinstance(uuids, list) or not all(
+            isinstance(uuid, str) for uuid in uuids
+        ):
+            return Response(
+                {"detail": "uuids should contain a list of plio uuids to update"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if new_status not in [choice for choice, _ in plio_status_choices]:
+            return Response(
+                {"detail": "status should be one of draft or published"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-            Question.objects.bulk_create(questions)
+        plios = self.get_queryset().filter(uuid__in=uuids)
+        plios = plios.select_related("created_by")
+        results = {uuid: STATUS_NOT_FOUND for uuid in uuids}
+        permitted_plios = []
+        for plio in plios:
+            # the user should be able to access the plio, as with an update
+            if all(
+                permission.has_object_permission(request, self, plio)
+                for permission in self.get_permissions()
+            ):
+                permitted_plios.append(plio)
+            else:
+                results[plio.uuid] = STATUS_FORBIDDEN
+        results.update(set_plios_status(permitted_plios, new_status))
 
-        return Response(self.get_serializer(plio).data)
+        return Response(
+            [{"uuid": uuid, "result": result} for uuid, result in results.items()]
+        )
 
     @action(
         methods=["post"],
@@ -326,30 +368,7 @@ class PlioViewSet(viewsets.ModelViewSet):
         # return 404 if user cannot access the object
         # else fetch the object
         plio = self.get_object()
-        if plio.video is not None:
-            video = Video.objects.filter(id=plio.video.id).first()
-            video.pk = None
-
-            items = list(Item.objects.filter(plio__id=plio.id))
-            questions = list(Question.objects.filter(item__plio__id=plio.id))
-
-            # will be needed to handle questions with images
-            question_indices_with_image = []
-            images = []
-
-            for index, question in enumerate(questions):
-                if question.image is not None:
-                    question_indices_with_image.append(index)
-                    images.append(question.image)
-        else:
-            video = None
-            items = []
-            questions = []
-
-        # django will auto-generate the key when the key is set to None
-        plio.pk = None
-        plio.uuid = None
-        plio.status = "draft"
+        source_schema = connection.schema_name
 
         # change workspace
         workspace = request.data.get("workspace")
@@ -361,51 +380,9 @@ class PlioViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        if video is not None:
-            video.save()
-            plio.video = video
-
-        plio.save()
-
-        if items:
-            # before creating the items in the given workspace, update the
-            # plio ids that they are linked to and reset the primary key;
-            # django will auto-generate the keys when they are set to None
-            for index, _ in enumerate(items):
-                items[index].plio = plio
-                items[index].pk = None
-
-            # create the items
-            items = Item.objects.bulk_create(items)
-
-            # before creating the questions in the given workspace, update the
-            # item ids that they are linked to and
-            # since we are ordering both items and questions by the item time,
-            # questions and items at the same index should be linked
-            for index, _ in enumerate(questions):
-                questions[index].item = items[index]
-                questions[index].pk = None
-
-            # if there are any questions with images, create instances of those images in the
-            # new workspace and link them to the question instances that need to be created
-            if images:
-                for index, _ in enumerate(images):
-                    # reset the key - django will auto-generate the keys when they are set to None
-                    images[index].pk = None
-
-                images = Image.objects.bulk_create(images)
-                for index, question_index in enumerate(question_indices_with_image):
-                    questions[question_index].image = images[index]
-
-            # create the questions
-            questions = Question.objects.bulk_create(questions)
-
-            # clear the cache for the destination plio or else the items wouldn't show up
-            # when the plio is fetched; we need to trigger this manually as bulk_create
-            # does not call the post_save signal
-            invalidate_cache_for_instance(plio)
-
-        return Response(self.get_serializer(plio).data)
+        # the copy is a draft, like a duplicated plio
+        clone = clone_plios([plio], source_schema, connection.schema_name)[plio.uuid]
+        return Response(self.get_serializer(clone).data)
 
     @action(
         methods=["get"],
@@ -418,183 +395,35 @@ class PlioViewSet(viewsets.ModelViewSet):
         plio = self.get_object()
 
         questions = Question.objects.filter(item__plio=plio.id)
-        survey_questions = questions.filter(survey=True)
-
-        # no sessions have been created for the plio: return
-        if not Session.objects.filter(plio=plio.id):
-            return Response(
-                {
-                    "has_survey_question": len(survey_questions) > 0,
-                }
-            )
-
-        import numpy as np
-
-        with connection.cursor() as cursor:
-            cursor.execute(
-                get_plio_latest_sessions_query(plio.uuid, connection.schema_name)
-            )
-            results = cursor.fetchall()
-
-        df = pd.DataFrame(results, columns=["id", "watch_time", "retention"])
-
-        # number of unique viewers and average watch time
-        num_unique_viewers = len(df)
-        average_watch_time = df["watch_time"].mean()
-
-        # retention at one minute
-        if plio.video.duration is None or plio.video.duration < 60:
-            # the metric is not applicable in this case
-            percent_one_minute_retention = None
-        else:
-            # convert "0,1,0" to ["0", "1", "0"]
-            df["retention"] = df["retention"].apply(lambda row: row.split(","))
-
-            # remove entries where the retention is either empty or has NaN values
-            df["is_retention_valid"] = df["retention"].apply(
-                lambda row: ("NaN" not in row and len(row) == plio.video.duration)
-            )
-
-            valid_retention_df = df[df["is_retention_valid"]]
-
-            if not len(valid_retention_df):
-                percent_one_minute_retention = 0
-            else:
-                # convert ["0", "1", "0"] to [0, 1, 0]
-                retention = (
-                    valid_retention_df["retention"]
-                    .apply(lambda row: list(map(int, row)))
-                    .values
-                )
-                # create an array out of all the retention values and only
-                # retain the values after one minute
-                retention = np.vstack(retention)[:, 59:]
-
-                # checks if a given user has crossed the second mark
-                percent_one_minute_retention = np.round(
-                    ((retention.sum(axis=1) > 0).sum() / num_unique_viewers) * 100, 2
-                )
-
-        # question-based metrics
-        # if the plio does not have any questions, these metrics are not applicable
-        if not questions:
-            accuracy = None
-            average_num_answered = None
-            percent_completed = None
-
-        else:
-            with connection.cursor() as cursor:
-                cursor.execute(
-                    get_plio_latest_responses_query(
-                        connection.schema_name, tuple(df["id"])
-                    )
-                )
-                results = cursor.fetchall()
-
-            df = pd.DataFrame(
-                results,
-                columns=[
-                    "id",
-                    "user_id",
-                    "answer",
-                    "item_type",
-                    "question_type",
-                    "correct_answer",
-                    "survey",
-                ],
-            )
-
-            # retain only the responses to items which are questions
-            question_df = df[df["item_type"] == "question"].reset_index(drop=True)
-            # retain only non-survey questions
-            question_df = question_df[~question_df.survey].reset_index(drop=True)
-            num_non_survey_questions = len(questions.filter(survey=False))
-
-            # no non-survey questions found
-            if not len(question_df):
-                return Response(
-                    {
-                        "unique_viewers": num_unique_viewers,
-                        "average_watch_time": average_watch_time,
-                        "percent_one_minute_retention": None,
-                        "accuracy": None,
-                        "average_num_answered": None,
-                        "percent_completed": None,
-                        "has_survey_question": True,
-                    }
-                )
-
-            def is_answer_correct(row):
-                """Whether the answer corresponding to the given row is correct"""
-                if row["question_type"] in ["mcq", "checkbox"]:
-                    return row["answer"] == row["correct_answer"]
-                return row["answer"] is not None
-
-            # holds the number of questions answered for each viewer
-            num_answered_list = []
-            # holds the number of questions correctly answered for each viewer
-            num_correct_list = []
-
-            user_grouping = question_df.groupby("user_id")
-            for group in user_grouping.groups:
-                # get the responses for a given user
-                group_df = user_grouping.get_group(group)
-
-                # sanity check
-                assert num_non_survey_questions == len(
-                    group_df
-                ), "Inconsistency in the number of questions"
-
-                num_answered = sum(
-                    group_df["answer"].apply(lambda value: value is not None)
-                )
+        has_survey_question = questions.filter(survey=True).exists()
 
-                num_answered_list.append(num_answered)
-
-                if not num_answered:
-                    num_correct_list.append(None)
-                else:
-                    num_correct_list.append(
-                        sum(group_df.apply(is_answer_correct, axis=1))
-                    )
-
-            # converting to numpy arrays enabled us to use vectorization
-            # to speed up the computation many folds
-            num_answered_list = np.array(num_answered_list)
-            num_correct_list = np.array(num_correct_list)
-            average_num_answered = round(num_answered_list.mean())
-            percent_completed = np.round(
-                100
-                * (
-                    sum(num_answered_list == num_non_survey_questions)
-                    / num_unique_viewers
-                ),
-                2,
+        # the metrics are kept up to date as sessions and answers are written,
+        # so only the stored totals need to be read here
+        return Response(
+            serialize_plio_metrics(
+                plio,
+                get_plio_metrics(plio),
+                has_questions=questions.exists(),
+                has_survey_question=has_survey_question,
             )
+        )
 
-            # only use the responses from viewers who have answered at least
-            # one question to compute the accuracy
-            answered_at_least_one_index = num_answered_list > 0
-            num_answered_list = num_answered_list[answered_at_least_one_index]
-            num_correct_list = num_correct_list[answered_at_least_one_index]
+    def get_report_access(self, request):
+        """
+        Returns the schema that the report data lives in and whether the
+        requesting user can see unmasked user identifiers in it.
+        """
+        # the organization of the request, as resolved by the tenant middleware
+        organization = OrganizationTenantMiddleware(
+            get_response=lambda r: None
+        ).get_tenant(request)
 
-            if not len(num_correct_list):
-                accuracy = None
-            else:
-                accuracy = np.round(
-                    (num_correct_list / num_answered_list).mean() * 100, 2
-                )
-        return Response(
-            {
-                "unique_viewers": num_unique_viewers,
-                "average_watch_time": average_watch_time,
-                "percent_one_minute_retention": percent_one_minute_retention,
-                "accuracy": accuracy,
-                "average_num_answered": average_num_answered,
-                "percent_completed": percent_completed,
-                "has_survey_question": len(survey_questions) > 0,
-            }
+        # schema name to query in
+        schema_name = organization.schema_name if organization else "public"
+        is_user_org_admin = organization is not None and request.user.is_org_admin(
+            organization.id
         )
+        return schema_name, is_user_org_admin
 
     @action(
         methods=["get"],
@@ -618,139 +447,116 @@ class PlioViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        # define the directory which will hold the data dump
-        data_dump_dir = f"/tmp/plio-{uuid}/user-{request.user.id}"
-
-        # delete the directory if it exists and create a new one
-        if os.path.exists(data_dump_dir):
-            shutil.rmtree(data_dump_dir)
-        os.makedirs(data_dump_dir)
-
-        # schema name to query in
-        schema_name = OrganizationTenantMiddleware(
-            get_response=lambda r: None
-        ).get_schema(self.request)
+        schema_name, is_user_org_admin = self.get_report_access(request)
 
-        organization = Organization.objects.filter(
-            shortcode=self.organization_shortcode,
-        ).first()
-        is_user_org_admin = organization is not None and request.user.is_org_admin(
-            organization.id
+        # stream the zip as it is being built instead of staging it on disk,
+        # once its first chunk is built so that a failure gets an error status
+        response = StreamingHttpResponse(
+            start_report_zip(
+                plio, schema=schema_name, show_unmasked_user_id=is_user_org_admin
+            ),
+            content_type="application/zip",
         )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="user-{request.user.id}.zip"'
+        return response
 
-        def run_query(cursor, query_method):
-            # execute the sql query
-            cursor.execute(
-                query_method(
-                    uuid, schema=schema_name, show_unmasked_user_id=is_user_org_admin
-                )
-            )
-            # extract column names as cursor.description returns a tuple
-            columns = [col[0] for col in cursor.description]
-            # create a dataframe from the rows and the columns
-            df = pd.DataFrame(cursor.fetchall(), columns=columns)
-
-            return df
-
-        def save_query_results(df, filename):
-            # save to csv
-            df.to_csv(os.path.join(data_dump_dir, filename), index=False)
+    @action(
+        methods=["post"],
+        detail=True,
+    )
+    def reports(self, request, uuid):
+        """
+        Queues a background job that builds the data dump of a plio.
 
-        def run_and_save_query_results(cursor, query_method, filename):
-            df = run_query(cursor, query_method)
-            save_query_results(df, filename)
+        If the dump for the current state of the plio's data has already been
+        built, the finished job is returned without building it again.
 
-        # create the individual dump files
-        with connection.cursor() as cursor:
-            # --- sessions --- #
-            run_and_save_query_results(cursor, get_sessions_dump_query, "sessions.csv")
+        request: HTTP request.
+        uuid: UUID of the plio for which report needs to be built.
+        """
+        plio = self.get_object()
 
-            # --- user level metrics --- #
-            run_and_save_query_results(
-                cursor, get_user_level_metrics_query, "user-level-metrics.csv"
+        # handle draft plios
+        if plio.status == "draft":
+            return Response(
+                {"detail": "Data dumps are not available for draft plios"},
+                status=status.HTTP_404_NOT_FOUND,
             )
 
-            # --- responses --- #
-            # change the submitted answers to make them 1-indexed
-            df = run_query(cursor, get_responses_dump_query)
+        schema_name, is_user_org_admin = self.get_report_access(request)
+        job = enqueue_report_job(
+            plio, schema=schema_name, show_unmasked_user_id=is_user_org_admin
+        )
+        return Response(
+            {"id": job["id"], "status": job["status"]},
+            status=status.HTTP_200_OK
+            if job["status"] == REPORT_JOB_COMPLETED
+            else status.HTTP_202_ACCEPTED,
+        )
 
-            # deserialise the submitted answer values
-            answers = pd.Series(df["answer"])
-            df.drop(columns="answer", inplace=True)
+    def get_report_job_or_none(self, request, job_id):
+        """
+        Returns the report job with the given id if it belongs to the requested
+        plio and its data can be seen by the requesting user.
+        """
+        plio = self.get_object()
+        job = get_report_job(job_id)
+        if job is None or job["plio"] != plio.uuid:
+            return None
 
-            valid_answer_indices = answers[~answers.isnull()].index
-            answers.loc[valid_answer_indices] = answers[valid_answer_indices].apply(
-                json.loads
-            )
-            df["answer"] = answers
+        schema_name, is_user_org_admin = self.get_report_access(request)
+        if job["schema"] != schema_name or (
+            job["show_unmasked_user_id"] and not is_user_org_admin
+        ):
+            return None
+        return job
 
-            # find the rows where the question type is MCQ
-            # and update the submitted answer there
-            df_mcq = df[df["question_type"] == "mcq"]
-            df.loc[df_mcq.index, "answer"] = df_mcq["answer"].apply(
-                lambda x: x + 1 if x is not None else x
-            )
+    @action(
+        methods=["get"],
+        detail=True,
+        url_path=r"reports/(?P<job_id>[0-9a-f]+)",
+    )
+    def report_status(self, request, uuid, job_id):
+        """
+        Returns the status of a report job.
 
-            # find the rows where the question type is checkbox
-            # and update the submitted answer there
-            df_checkbox = df[df["question_type"] == "checkbox"]
-            df.loc[df_checkbox.index, "answer"] = df_checkbox["answer"].apply(
-                lambda row: list(map(lambda x: x + 1, row)) if row is not None else row
+        request: HTTP request.
+        uuid: UUID of the plio the report is being built for.
+        job_id: id of the report job returned when the report was requested.
+        """
+        job = self.get_report_job_or_none(request, job_id)
+        if job is None:
+            return Response(
+                {"detail": "Report not found"}, status=status.HTTP_404_NOT_FOUND
             )
+        return Response({"id": job["id"], "status": job["status"]})
 
-            save_query_results(df, "responses.csv")
-
-            # --- interaction details --- #
-            # change the correct answers to make them 1-indexed
-            df = run_query(cursor, get_plio_details_query)
-
-            # deserialise the correct_answer values
-            question_correct_answer = df["question_correct_answer"]
-            df.drop(columns="question_correct_answer", inplace=True)
-
-            question_correct_answer = question_correct_answer.apply(json.loads)
-            df["question_correct_answer"] = question_correct_answer
-
-            # find the rows where the question type is MCQ
-            # and update the correct answer there
-            df_mcq = df[df["question_type"] == "mcq"]
-            df.loc[df_mcq.index, "question_correct_answer"] = df_mcq[
-                "question_correct_answer"
-            ].apply(lambda x: x + 1)
-
-            # find the rows where the question type is checkbox
-            # and update the correct answer there
-            df_checkbox = df[df["question_type"] == "checkbox"]
-            df.loc[df_checkbox.index, "question_correct_answer"] = df_checkbox[
-                "question_correct_answer"
-            ].apply(lambda row: list(map(lambda x: x + 1, row)))
-
-            save_query_results(df, "plio-interaction-details.csv")
-
-            # --- events --- #
-            run_and_save_query_results(cursor, get_events_query, "events.csv")
-
-            df = pd.DataFrame(
-                [[plio.uuid, plio.name, plio.video.url]],
-                columns=["id", "name", "video"],
-            )
-            df.to_csv(os.path.join(data_dump_dir, "plio-meta-details.csv"), index=False)
+    @action(
+        methods=["get"],
+        detail=True,
+        url_path=r"reports/(?P<job_id>[0-9a-f]+)/download",
+    )
+    def report_download(self, request, uuid, job_id):
+        """
+        Downloads the zip built by a completed report job.
 
-            # move the README for the data dump to the directory
-            shutil.copyfile(
-                "./plio/static/plio/docs/download_csv_README.pdf",
-                os.path.join(data_dump_dir, "READ-ME-FIRST.pdf"),
+        request: HTTP request.
+        uuid: UUID of the plio the report was built for.
+        job_id: id of the report job returned when the report was requested.
+        """
+        job = self.get_report_job_or_none(request, job_id)
+        if job is None or job["status"] != REPORT_JOB_COMPLETED:
+            return Response(
+                {"detail": "Report not found"}, status=status.HTTP_404_NOT_FOUND
             )
-
-        # create the zip
-        shutil.make_archive(data_dump_dir, "zip", data_dump_dir)
-
-        # read the zip
-        zip_file = open(f"{data_dump_dir}.zip", "rb")
-
-        # create the response
-        response = FileResponse(zip_file, as_attachment=True)
-        return response
+        return FileResponse(
+            default_storage.open(job["artifact"]),
+            as_attachment=True,
+            filename=f"user-{request.user.id}.zip",
+            content_type="application/zip",
+        )
 
     def create(self, request, *args, **kwargs):
         # Explicitly check permissions before creating a plio
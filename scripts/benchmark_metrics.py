@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+"""Benchmark the plio metrics engine against the per-viewer loop it replaced.
+
+Generates the rows the metrics are computed from (the most recent session of
+each learner and their responses to the plio's questions) for a synthetic plio,
+computes the metrics with the previous implementation (a pandas groupby loop
+over every learner) and with ``plio.analytics``, checks that both return the
+same numbers and prints the time each took.
+
+The previous implementation reads the retention strings, while ``plio.analytics``
+reads the retention as it is now stored (see ``entries.retention``). The average
+size of the retention of a session in both forms is printed at the end.
+
+Usage:
+    python scripts/benchmark_metrics.py --learners 1000 10000 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entries.retention import encode_retention  # noqa: E402
+from plio.analytics import (  # noqa: E402
+    compute_metric_totals,
+    compute_viewer_metrics,
+    format_plio_metrics,
+)
+
+
+def generate_rows(num_learners, num_questions, video_duration, seed=0):
+    """Returns the session and response rows for a synthetic plio"""
+    rng = np.random.default_rng(seed)
+    question_types = ["mcq", "checkbox", "subjective"] * num_questions
+    question_types = question_types[:num_questions]
+    correct_answers = {"mcq": "0", "checkbox": "[0, 1]", "subjective": None}
+    answers = {
+        "mcq": ["0", "1", "2"],
+        "checkbox": ["[0, 1]", "[1]", "[0]"],
+        "subjective": ["some text", "more text", "an answer"],
+    }
+
+    sessions = []
+    responses = []
+    for user_id in range(1, num_learners + 1):
+        watched = rng.integers(0, video_duration + 1)
+        retention = np.zeros(video_duration, dtype=int)
+        retention[:watched] = 1
+        if rng.random() < 0.3:
+            # some learners rewatch a part of the video
+            start, end = np.sort(rng.integers(0, video_duration + 1, size=2))
+            retention[start:end] += 1
+        retention = list(map(str, retention))
+        if rng.random() < 0.05:
+            # a few learners have unusable retention strings
+            retention = ["NaN"] * video_duration
+        sessions.append(
+            (user_id, user_id, float(watched), ",".join(retention)),
+        )
+        for question_type in question_types:
+            answer = None
+            if rng.random() < 0.7:
+                answer = answers[question_type][rng.integers(0, 3)]
+            responses.append(
+                (user_id, answer, question_type, correct_answers[question_type])
+            )
+    return sessions, responses
+
+
+def legacy_metrics(sessions, responses, video_duration, num_questions):
+    """The metrics as computed by `PlioViewSet.metrics` before `plio.analytics`"""
+    df = pd.DataFrame(
+        [
+            (session_id, watch_time, retention)
+            for session_id, _, watch_time, retention in sessions
+        ],
+        columns=["id", "watch_time", "retention"],
+    )
+    num_unique_viewers = len(df)
+    average_watch_time = df["watch_time"].mean()
+
+    if video_duration is None or video_duration < 60:
+        percent_one_minute_retention = None
+    else:
+        df["retention"] = df["retention"].apply(lambda row: row.split(","))
+        df["is_retention_valid"] = df["retention"].apply(
+            lambda row: ("NaN" not in row and len(row) == video_duration)
+        )
+        valid_retention_df = df[df["is_retention_valid"]]
+        if not len(valid_retention_df):
+            percent_one_minute_retention = 0
+        else:
+            retention = (
+                valid_retention_df["retention"]
+                .apply(lambda row: list(map(int, row)))
+                .values
+            )
+            retention = np.vstack(retention)[:, 59:]
+            percent_one_minute_retention = np.round(
+                ((retention.sum(axis=1) > 0).sum() / num_unique_viewers) * 100, 2
+            )
+
+    question_df = pd.DataFrame(
+        responses, columns=["user_id", "answer", "question_type", "correct_answer"]
+    )
+
+    def is_answer_correct(row):
+        if row["question_type"] in ["mcq", "checkbox"]:
+            return row["answer"] == row["correct_answer"]
+        return row["answer"] is not None
+
+    num_answered_list = []
+    num_correct_list = []
+    user_grouping = question_df.groupby("user_id")
+    for group in user_grouping.groups:
+        group_df = user_grouping.get_group(group)
+        num_answered = sum(group_df["answer"].apply(lambda value: value is not None))
+        num_answered_list.append(num_answered)
+        if not num_answered:
+            num_correct_list.append(None)
+        else:
+            num_correct_list.append(sum(group_df.apply(is_answer_correct, axis=1)))
+
+    num_answered_list = np.array(num_answered_list)
+    num_correct_list = np.array(num_correct_list)
+    average_num_answered = round(num_answered_list.mean())
+    percent_completed = np.round(
+        100 * (sum(num_answered_list == num_questions) / num_unique_viewers), 2
+    )
+    answered_at_least_one_index = num_answered_list > 0
+    num_answered_list = num_answered_list[answered_at_least_one_index]
+    num_correct_list = num_correct_list[answered_at_least_one_index]
+    if not len(num_correct_list):
+        accuracy = None
+    else:
+        accuracy = np.round((num_correct_list / num_answered_list).mean() * 100, 2)
+
+    return {
+        "unique_viewers": num_unique_viewers,
+        "average_watch_time": average_watch_time,
+        "percent_one_minute_retention": percent_one_minute_retention,
+        "accuracy": accuracy,
+        "average_num_answered": average_num_answered,
+        "percent_completed": percent_completed,
+        "has_survey_question": False,
+    }
+
+
+def encode_sessions(sessions):
+    """The session rows with the retention as stored in the database"""
+    return [
+        (session_id, user_id, watch_time, encode_retention(retention))
+        for session_id, user_id, watch_time, retention in sessions
+    ]
+
+
+def vectorized_metrics(sessions, responses, video_duration, num_questions):
+    """The metrics as computed by `plio.analytics`"""
+    viewers = compute_viewer_metrics(sessions, responses, video_duration, num_questions)
+    return format_plio_metrics(
+        compute_metric_totals(viewers),
+        video_duration,
+        has_questions=True,
+        has_survey_question=False,
+    )
+
+
+def assert_same_metrics(expected, actual):
+    assert expected.keys() == actual.keys()
+    for key, value in expected.items():
+        if isinstance(value, float):
+            assert np.isclose(value, actual[key]), (key, value, actual[key])
+        else:
+            assert value == actual[key], (key, value, actual[key])
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--learners", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--video-duration", type=int, default=300)
+    parser.add_argument(
+        "--skip-legacy",
+        action="store_true",
+        help="only time plio.analytics (the legacy loop takes minutes at 100k)",
+    )
+    args = parser.parse_args(argv)
+
+    print(f"{'learners':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for num_learners in args.learners:
+        sessions, responses = generate_rows(
+            num_learners, args.questions, args.video_duration
+        )
+        encoded_sessions = encode_sessions(sessions)
+        rest = (responses, args.video_duration, args.questions)
+
+        actual, vectorized_time = timed(vectorized_metrics, encoded_sessions, *rest)
+        if args.skip_legacy:
+            print(f"{num_learners:>10} {'-':>12} {vectorized_time:>15.3f} {'-':>9}")
+            continue
+
+        expected, legacy_time = timed(legacy_metrics, sessions, *rest)
+        assert_same_metrics(expected, actual)
+        print(
+            f"{num_learners:>10} {legacy_time:>12.3f} {vectorized_time:>15.3f} "
+            f"{legacy_time / vectorized_time:>8.1f}x"
+        )
+
+    text_size = np.mean([len(session[3].encode()) for session in sessions])
+    encoded_size = np.mean([len(session[3]) for session in encoded_sessions])
+    print(
+        f"retention per session: {text_size:.0f} bytes as text, "
+        f"{encoded_size:.0f} bytes encoded ({text_size / encoded_size:.0f}x smaller)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""Benchmark searching plios with ``PlioSearchFilter`` against ``SearchFilter``.
+
+Creates a workspace's worth of synthetic plios in the given schema (within a
+transaction that is rolled back at the end), and times the first page and the
+count of the search results for a few search terms, first with the query of
+DRF's ``SearchFilter`` over the previous ``search_fields`` (``ILIKE '%term%'``
+on name, status, updated_at and uuid) and then with ``PlioSearchFilter``. Both
+are checked to find the same plios, and whether the query planner used the
+trigram indexes is printed along with the times.
+
+Needs the same environment variables as the app, as it loads its settings, and
+a database that has been migrated.
+
+Usage:
+    python scripts/benchmark_plio_search.py --plios 100000 --schema public
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from functools import reduce
+from operator import and_, or_
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "plio.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import Q  # noqa: E402
+from django_tenants.utils import schema_context  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from plio.models import Plio  # noqa: E402
+from plio.search import PlioSearchFilter  # noqa: E402
+from users.models import User  # noqa: E402
+
+# the fields that `SearchFilter` searched
+LEGACY_SEARCH_FIELDS = ["name", "status", "updated_at", "uuid"]
+WORDS = [
+    "algebra",
+    "geometry",
+    "fractions",
+    "decimals",
+    "photosynthesis",
+    "electricity",
+    "magnetism",
+    "chemical",
+    "reactions",
+    "motion",
+    "probability",
+    "statistics",
+    "trigonometry",
+    "calculus",
+    "cells",
+    "evolution",
+    "revision",
+    "chapter",
+    "lecture",
+    "quiz",
+]
+
+
+def create_plios(num_plios, user, seed=0):
+    """Creates the given number of plios with names made of random words"""
+    rng = random.Random(seed)
+    plios = [
+        Plio(
+            name=" ".join(rng.choices(WORDS, k=rng.randint(2, 5))).capitalize(),
+            uuid="".join(rng.choices(string.ascii_lowercase, k=10)),
+            created_by=user,
+            status=rng.choice(["draft", "published"]),
+        )
+        for _ in range(num_plios)
+    ]
+    Plio.objects.bulk_create(plios, batch_size=5000)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE plio")
+
+
+def legacy_search(queryset, search):
+    """The plios that `SearchFilter` returned for the search"""
+    return queryset.filter(
+        reduce(
+            and_,
+            [
+                reduce(
+                    or_,
+                    [
+                        Q(**{f"{field}__icontains": term})
+                        for field in LEGACY_SEARCH_FIELDS
+                    ],
+                )
+                for term in search.split()
+            ],
+        )
+    ).order_by("-updated_at")
+
+
+def indexed_search(queryset, search):
+    """The plios that `PlioSearchFilter` returns for the search"""
+    request = Request(APIRequestFactory().get("/", {"search": search}))
+    queryset = PlioSearchFilter().filter_queryset(request, queryset, None)
+    return queryset.order_by("-search_rank", "-updated_at")
+
+
+def timed(queryset, repeat):
+    """The best time of reading the first page of the queryset and counting it"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        page = list(queryset.values_list("id", flat=True)[:5])
+        count = queryset.count()
+        times.append(time.perf_counter() - start)
+    return page, count, min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plios", type=int, default=100000)
+    parser.add_argument("--schema", default="public")
+    parser.add_argument(
+        "--terms",
+        nargs="+",
+        default=["fractions", "magnet", "trigonometry quiz", "zzzz"],
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with schema_context(args.schema), transaction.atomic():
+        user = User.objects.create(email="benchmark-search@example.com")
+        create_plios(args.plios, user)
+        queryset = Plio.objects.filter(created_by=user)
+
+        print(
+            f"{'search':>20} {'results':>8} {'ILIKE (ms)':>11} "
+            f"{'trigram (ms)':>13} {'speedup':>8}  index used"
+        )
+        for search in args.terms:
+            legacy = legacy_search(queryset, search)
+            indexed = indexed_search(queryset, search)
+            _, legacy_count, legacy_time = timed(legacy, args.repeat)
+            _, count, indexed_time = timed(indexed, args.repeat)
+            assert count == legacy_count, (search, legacy_count, count)
+
+            plan = indexed.explain()
+            uses_index = "trgm_idx" in plan
+            print(
+                f"{search:>20} {count:>8} {legacy_time * 1000:>11.1f} "
+                f"{indexed_time * 1000:>13.1f} {legacy_time / indexed_time:>7.1f}x"
+                f"  {'yes' if uses_index else 'no'}"
+            )
+
+        # leave the schema as it was
+        transaction.set_rollback(True)
+
+
+if __name__ == "__main__":
+    main()
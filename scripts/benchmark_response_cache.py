@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""Benchmark serving cached plio responses as dicts against rendered JSON.
+
+Builds the response of a synthetic plio with a number of question items, caches
+it the way ``get_or_build`` caches the plio dict and the way ``get_or_render``
+caches its rendered JSON, and times a cache hit of each: unpickling the dict
+and rendering it with DRF, against unpickling the rendered bytes. The size of
+the response as JSON and gzipped is printed along with the times.
+
+Needs the same environment variables as the app, as it loads its settings.
+
+Usage:
+    python scripts/benchmark_response_cache.py --items 10 50 200
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "plio.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from plio.cache import render_json  # noqa: E402
+
+
+def build_plio_response(num_items):
+    """The response of a plio with the given number of question items"""
+    timestamp = "2021-06-01T10:00:00.000000Z"
+    user = {
+        "id": 1,
+        "email": "creator@example.com",
+        "first_name": "Plio",
+        "last_name": "Creator",
+        "config": {"settings": {}},
+        "organizations": [
+            {"id": 1, "name": "Organization", "shortcode": "org", "role": "org-admin"}
+        ],
+        "created_at": timestamp,
+        "updated_at": timestamp,
+    }
+    items = []
+    for index in range(num_items):
+        items.append(
+            {
+                "id": index + 1,
+                "plio": 1,
+                "type": "question",
+                "time": float(index * 15),
+                "meta": {"source": {"name": "default"}},
+                "created_at": timestamp,
+                "updated_at": timestamp,
+                "details": {
+                    "id": index + 1,
+                    "item": index + 1,
+                    "text": f"<p>What is the answer to question {index + 1}?</p>",
+                    "type": "mcq",
+                    "options": [f"<p>Option {option}</p>" for option in range(4)],
+                    "correct_answer": 0,
+                    "has_char_limit": False,
+                    "max_char_limit": 100,
+                    "image": None,
+                    "survey": False,
+                    "created_at": timestamp,
+                    "updated_at": timestamp,
+                },
+            }
+        )
+    return {
+        "id": 1,
+        "name": "Synthetic plio",
+        "uuid": "abcdefghij",
+        "failsafe_url": "",
+        "status": "published",
+        "is_public": True,
+        "config": {"player": {"configuration": {"skipEnabled": True}}},
+        "created_by": user,
+        "video": {
+            "id": 1,
+            "url": "https://www.youtube.com/watch?v=vnISjBbrMUM",
+            "title": "Synthetic video",
+            "duration": 3600,
+            "created_at": timestamp,
+            "updated_at": timestamp,
+        },
+        "created_at": timestamp,
+        "updated_at": timestamp,
+        "items": items,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    renderer = JSONRenderer()
+    print(
+        f"{'items':>6} {'json (KB)':>10} {'gzip (KB)':>10} "
+        f"{'dict hit (us)':>14} {'bytes hit (us)':>15} {'speedup':>9}"
+    )
+    for num_items in args.items:
+        response = build_plio_response(num_items)
+        cached_dict = pickle.dumps(response)
+        rendered = render_json(response)
+        cached_rendered = pickle.dumps(rendered)
+        assert renderer.render(pickle.loads(cached_dict)) == rendered.content
+
+        dict_time = timeit.timeit(
+            lambda: renderer.render(pickle.loads(cached_dict)), number=args.repeat
+        )
+        rendered_time = timeit.timeit(
+            lambda: pickle.loads(cached_rendered).content, number=args.repeat
+        )
+        gzipped_size = len(rendered.gzipped_content or rendered.content)
+        print(
+            f"{num_items:>6} {len(rendered.content) / 1024:>10.1f} "
+            f"{gzipped_size / 1024:>10.1f} "
+            f"{dict_time / args.repeat * 1e6:>14.1f} "
+            f"{rendered_time / args.repeat * 1e6:>15.1f} "
+            f"{dict_time / rendered_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -21,41 +21,30 @@ OUTPUT_FILE = "new_plio_uuids.txt"
 # --- End of Configuration ---
 
 
-def duplicate_plio(plio_uuid: str) -> str | None:
+def duplicate_plios(plio_uuids: list) -> dict | None:
     """
-    Calls the duplicate API for a given plio UUID.
-    Returns the new plio's UUID if successful, otherwise None.
+    Calls the bulk duplicate API for the given plio UUIDs, which duplicates
+    all of them in one transaction (or none of them, if any fails).
+    Returns the new UUID of each plio by its UUID if successful, otherwise None.
     """
-    url = f"{BASE_URL}/plios/{plio_uuid}/duplicate/"
+    url = f"{BASE_URL}/plios/bulk_duplicate/"
     headers = {
         "Authorization": f"Bearer {AUTH_TOKEN}",
         "organization": ORGANIZATION,
         "Content-Type": "application/json",
     }
 
-    print(f"Duplicating plio: {plio_uuid}")
+    print(f"Duplicating {len(plio_uuids)} plio(s)")
 
     try:
-        # The duplicate endpoint is a POST request.
-        response = requests.post(url, headers=headers)
+        # The bulk duplicate endpoint is a POST request.
+        response = requests.post(url, headers=headers, json={"uuids": plio_uuids})
         response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-
-        new_plio_data = response.json()
-        new_plio_uuid = new_plio_data.get("uuid")
-
-        if new_plio_uuid:
-            print(
-                f"Successfully duplicated plio {plio_uuid}. New UUID: {new_plio_uuid}"
-            )
-            return new_plio_uuid
-        else:
-            print(f"Error: 'uuid' not found in response for plio {plio_uuid}.")
-            print(f"Response: {response.text}")
-            return None
+        return response.json()
 
     except requests.exceptions.RequestException as e:
-        print(f"An error occurred while duplicating plio {plio_uuid}: {e}")
-        if e.response:
+        print(f"An error occurred while duplicating the plios: {e}")
+        if e.response is not None:
             print(f"Response status: {e.response.status_code}")
             print(f"Response text: {e.response.text}")
         return None
@@ -64,27 +53,31 @@ def duplicate_plio(plio_uuid: str) -> str | None:
 def main():
     """
     Main function to duplicate plios and save new UUIDs.
+
+    To duplicate plios without going through the API, run
+    `python manage.py duplicateplios` on the server instead.
     """
-    if AUTH_TOKEN == "your_auth_token_here" or ORGANIZATION == "your_organization_here":
+    if not AUTH_TOKEN or not ORGANIZATION:
         print(
             "Please configure AUTH_TOKEN and ORGANIZATION in the script or as environment variables."
         )
         return
 
-    new_uuids = []
-    for uuid in PLIO_UUIDS_TO_DUPLICATE:
-        new_uuid = duplicate_plio(uuid)
-        if new_uuid:
-            new_uuids.append(new_uuid)
-
-    if new_uuids:
-        with open(OUTPUT_FILE, "w") as f:
-            for uuid in new_uuids:
-                f.write(f"{uuid}\n")
-        print(f"\nSuccessfully created {len(new_uuids)} new plios.")
-        print(f"The new UUIDs have been written to {OUTPUT_FILE}")
-    else:
+    if not PLIO_UUIDS_TO_DUPLICATE:
+        print("No plios were duplicated.")
+        return
+
+    new_uuids = duplicate_plios(PLIO_UUIDS_TO_DUPLICATE)
+    if not new_uuids:
         print("\nNo plios were duplicated.")
+        return
+
+    with open(OUTPUT_FILE, "w") as f:
+        for uuid in PLIO_UUIDS_TO_DUPLICATE:
+            print(f"Duplicated plio {uuid}. New UUID: {new_uuids[uuid]}")
+            f.write(f"{new_uuids[uuid]}\n")
+    print(f"\nSuccessfully created {len(new_uuids)} new plios.")
+    print(f"The new UUIDs have been written to {OUTPUT_FILE}")
 
 
 if __name__ == "__main__":
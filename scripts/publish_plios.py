@@ -19,42 +19,40 @@ PLIO_UUIDS_TO_PUBLISH = []
 # --- End of Configuration ---
 
 
-def publish_plio(plio_uuid: str) -> bool:
+def publish_plios(plio_uuids: list) -> list | None:
     """
-    Calls the API to mark a plio as published.
-    Returns True if successful, otherwise False.
+    Calls the bulk status API to mark the given plios as published at once.
+    Returns the result for each plio if successful, otherwise None.
     """
-    url = f"{BASE_URL}/plios/{plio_uuid}/"
+    url = f"{BASE_URL}/plios/bulk_status/"
     headers = {
         "Authorization": f"Bearer {AUTH_TOKEN}",
         "organization": ORGANIZATION,
         "Content-Type": "application/json",
     }
-    data = {"status": "published"}
+    data = {"uuids": plio_uuids, "status": "published"}
 
-    print(f"Publishing plio: {plio_uuid}")
+    print(f"Publishing {len(plio_uuids)} plio(s)")
 
     try:
-        # The endpoint to update a plio is a PATCH request.
-        response = requests.patch(url, headers=headers, json=data)
+        # The bulk status endpoint is a POST request.
+        response = requests.post(url, headers=headers, json=data)
         response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-
-        print(f"Successfully published plio {plio_uuid}.")
-        return True
+        return response.json()
 
     except requests.exceptions.RequestException as e:
-        print(f"An error occurred while publishing plio {plio_uuid}: {e}")
-        if e.response:
+        print(f"An error occurred while publishing the plios: {e}")
+        if e.response is not None:
             print(f"Response status: {e.response.status_code}")
             print(f"Response text: {e.response.text}")
-        return False
+        return None
 
 
 def main():
     """
     Main function to publish plios.
     """
-    if AUTH_TOKEN == "your_auth_token_here" or ORGANIZATION == "your_organization_here":
+    if not AUTH_TOKEN or not ORGANIZATION:
         print(
             "Please configure AUTH_TOKEN and ORGANIZATION in the script or as environment variables."
         )
@@ -66,10 +64,14 @@ def main():
         )
         return
 
+    results = publish_plios(PLIO_UUIDS_TO_PUBLISH) or []
     published_count = 0
-    for uuid in PLIO_UUIDS_TO_PUBLISH:
-        if publish_plio(uuid):
+    for result in results:
+        # plios that were already published count as published too
+        if result["result"] in ["updated", "unchanged"]:
             published_count += 1
+        else:
+            print(f"Could not publish plio {result['uuid']}: {result['result']}")
 
     print(
         f"\nFinished. {published_count}/{len(PLIO_UUIDS_TO_PUBLISH)} plios were published successfully."
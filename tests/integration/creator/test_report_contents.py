@@ -11,10 +11,8 @@ by an org admin (admins see unmasked identifiers) so tenancy rides on the
 
 import csv
 import io
-import shutil
 import zipfile
 
-import pytest
 
 from tests.builders import in_workspace
 from tests.factories import (
@@ -34,20 +32,7 @@ def _read_csv(archive, name):
         return list(csv.DictReader(io.TextIOWrapper(handle, encoding="utf-8")))
 
 
-@pytest.fixture
-def report_dump_cleanup():
-    """download_data writes its dump under /tmp/plio-<uuid> and only cleans it
-    on the *next* download of the same plio -- remove what this test generated
-    so repeated runs don't accumulate archive trees in the container."""
-    uuids = []
-    yield uuids
-    for plio_uuid in uuids:
-        shutil.rmtree("/tmp/plio-{}".format(plio_uuid), ignore_errors=True)
-
-
-def test_downloaded_report_cells_match_the_constructed_scenario(
-    authed_client, org_a, report_dump_cleanup
-):
+def test_downloaded_report_cells_match_the_constructed_scenario(authed_client, org_a):
     admin = authed_client()
     OrganizationUser.objects.create(
         user=admin.user,
@@ -87,7 +72,6 @@ def test_downloaded_report_cells_match_the_constructed_scenario(
         SessionAnswerFactory(session=decoy_session, item=decoy_item, answer=0)
         EventFactory(session=decoy_session, type="paused", player_time=99)
 
-    report_dump_cleanup.append(plio.uuid)
     response = admin.get(
         "/api/v1/plios/{}/download_data/".format(plio.uuid), organization=org_a
     )
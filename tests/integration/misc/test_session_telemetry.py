@@ -0,0 +1,159 @@
+"""Session telemetry websocket canary.
+
+Drives the real ``SessionConsumer`` route through channels' test communicator:
+a learner authenticates with the first message and streams events and session
+updates for their session in an organization's workspace, and the spec asserts
+that everything is written to that workspace's tables once the websocket
+closes. Like the live-users canary, the consumer runs in its own thread and
+only sees committed rows, hence ``slow_lane``.
+"""
+import datetime
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.utils import timezone
+from oauth2_provider.models import AccessToken
+
+from entries.config import TELEMETRY_MAX_FLUSH_FAILURES, TELEMETRY_MESSAGE_MAX_EVENTS
+from entries.models import Event, Session
+from plio.asgi import application
+from tests.builders import in_workspace
+from tests.factories import SessionFactory, UserFactory
+
+
+def create_access_token(user):
+    return AccessToken.objects.create(
+        user=user,
+        token=f"telemetry-{user.id}",
+        expires=timezone.now() + datetime.timedelta(hours=1),
+        scope="read write",
+    )
+
+
+async def connect(session, token):
+    """Opens the websocket of the session and authenticates it with the token"""
+    communicator = WebsocketCommunicator(application, f"/api/v1/sessions/{session.id}")
+    connected, _ = await communicator.connect()
+    assert connected
+    await communicator.send_json_to({"token": token.token, "organization": "org-a"})
+    return communicator, await communicator.receive_json_from(timeout=5)
+
+
+@pytest.mark.slow_lane
+def test_streamed_telemetry_is_written_when_the_websocket_closes(slow_lane_db, org_a):
+    learner = UserFactory()
+    token = create_access_token(learner)
+    with in_workspace(org_a):
+        session = SessionFactory(user=learner, retention="0,0,0")
+
+    async def scenario():
+        communicator, authenticated = await connect(session, token)
+        assert authenticated == {"status": "ok"}
+
+        await communicator.send_json_to(
+            {
+                "events": [
+                    {"type": "played", "player_time": 0},
+                    {"type": "watching", "player_time": 1},
+                ],
+                "session": {"retention": "1,0,0", "watch_time": 1},
+            }
+        )
+        first = await communicator.receive_json_from(timeout=5)
+        await communicator.send_json_to(
+            {
+                "events": [{"type": "unknown", "player_time": 2}],
+            }
+        )
+        second = await communicator.receive_json_from(timeout=5)
+        await communicator.send_json_to(
+            {
+                "events": [{"type": "paused", "player_time": 2}],
+                "session": {"retention": "1,1,0", "watch_time": 2},
+            }
+        )
+        third = await communicator.receive_json_from(timeout=5)
+        await communicator.disconnect()
+        return first, second, third
+
+    first, second, third = async_to_sync(scenario)()
+    assert first == {"status": "ok"}
+    # an invalid message is rejected as a whole
+    assert "type" in second["errors"]["events"][0]
+    assert third == {"status": "ok"}
+
+    with in_workspace(org_a):
+        events = Event.objects.filter(session_id=session.id).order_by("id")
+        assert [event.type for event in events] == ["played", "watching", "paused"]
+        # the session holds the latest values that were sent
+        session = Session.objects.get(id=session.id)
+        assert session.retention == "1,1,0"
+        assert session.watch_time == 2
+
+
+@pytest.mark.slow_lane
+def test_websocket_of_another_users_session_is_refused(slow_lane_db, org_a):
+    learner = UserFactory()
+    token = create_access_token(UserFactory())
+    with in_workspace(org_a):
+        session = SessionFactory(user=learner)
+
+    async def scenario():
+        communicator, authenticated = await connect(session, token)
+        closed = await communicator.receive_output(timeout=5)
+        return authenticated, closed
+
+    authenticated, closed = async_to_sync(scenario)()
+    assert "errors" in authenticated
+    assert closed == {"type": "websocket.close", "code": 4001}
+
+
+@pytest.mark.slow_lane
+def test_oversized_messages_are_rejected(slow_lane_db, org_a):
+    learner = UserFactory()
+    token = create_access_token(learner)
+    with in_workspace(org_a):
+        session = SessionFactory(user=learner)
+
+    async def scenario():
+        communicator, _ = await connect(session, token)
+        events = [{"type": "watching", "player_time": 1}]
+        await communicator.send_json_to(
+            {"events": events * (TELEMETRY_MESSAGE_MAX_EVENTS + 1)}
+        )
+        response = await communicator.receive_json_from(timeout=5)
+        await communicator.disconnect()
+        return response
+
+    assert "events" in async_to_sync(scenario)()["errors"]
+    with in_workspace(org_a):
+        assert not Event.objects.filter(session_id=session.id).exists()
+
+
+@pytest.mark.slow_lane
+def test_websocket_is_closed_when_writes_keep_failing(slow_lane_db, org_a):
+    learner = UserFactory()
+    token = create_access_token(learner)
+    with in_workspace(org_a):
+        session = SessionFactory(user=learner)
+
+    async def scenario():
+        communicator, _ = await connect(session, token)
+        await communicator.send_json_to({"session": {"watch_time": 1}})
+        await communicator.receive_json_from(timeout=5)
+        # each failed flush is logged and retried with the next one, until
+        # too many in a row have failed
+        with mock.patch(
+            "entries.consumers.write_session_telemetry",
+            side_effect=RuntimeError("database is down"),
+        ) as write:
+            closed = await communicator.receive_output(timeout=5)
+            await communicator.disconnect()
+        return write.call_count, closed
+
+    with mock.patch("entries.consumers.TELEMETRY_FLUSH_INTERVAL", 0.01):
+        num_writes, closed = async_to_sync(scenario)()
+    assert num_writes >= TELEMETRY_MAX_FLUSH_FAILURES
+    assert closed == {"type": "websocket.close", "code": 1011}
@@ -0,0 +1,118 @@
+"""Pin duplicating many plios at once at the ``plio.cloning`` seam.
+
+``POST /plios/bulk_duplicate/`` and ``manage.py duplicateplios`` clone a list of
+plios -- with their videos, items, questions and images -- in one transaction,
+inserting each kind of row for all of them at once. These specs check that the
+clones match the plios, that the number of queries does not grow with the
+number of plios, and that nothing is cloned if any plio cannot be.
+"""
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from plio.cloning import duplicate_plios
+from plio.models import Plio, Question
+from tests.builders import in_workspace
+from tests.factories import (
+    ImageFactory,
+    ItemFactory,
+    PlioFactory,
+    QuestionFactory,
+)
+
+
+def build_plio(**kwargs):
+    plio = PlioFactory(**kwargs)
+    for time in [5, 15]:
+        QuestionFactory(item=ItemFactory(plio=plio, time=time))
+    QuestionFactory(item=ItemFactory(plio=plio, time=25), image=ImageFactory())
+    return plio
+
+
+def get_tree(plio):
+    """What a plio is made of, without any ids"""
+    questions = Question.objects.filter(item__plio=plio).order_by("item__time")
+    return {
+        "name": plio.name,
+        "video": (plio.video.url, plio.video.title),
+        "questions": [
+            (
+                question.item.time,
+                question.text,
+                question.options,
+                question.image.url.name if question.image else None,
+            )
+            for question in questions
+        ],
+    }
+
+
+def test_clones_match_the_plios(creator):
+    plios = [build_plio(created_by=creator.user, published=True) for _ in range(2)]
+    response = creator.post(
+        "/api/v1/plios/bulk_duplicate/",
+        {"uuids": [plio.uuid for plio in plios]},
+        format="json",
+    )
+    assert response.status_code == 200
+    assert set(response.data) == {plio.uuid for plio in plios}
+
+    for plio in plios:
+        clone = Plio.objects.get(uuid=response.data[plio.uuid])
+        assert clone.status == "draft"
+        assert clone.created_by == plio.created_by
+        assert clone.video_id != plio.video_id
+        assert get_tree(clone) == get_tree(plio)
+        image_ids = Question.objects.filter(
+            item__plio__in=[plio, clone], image__isnull=False
+        ).values_list("image_id", flat=True)
+        assert len(set(image_ids)) == 2
+
+
+def test_queries_do_not_grow_with_the_plios(db, org_a, django_assert_num_queries):
+    with in_workspace(org_a):
+        few = [build_plio() for _ in range(2)]
+        many = [build_plio() for _ in range(6)]
+
+        with CaptureQueriesContext(connection) as few_queries:
+            duplicate_plios(few)
+        with django_assert_num_queries(len(few_queries)):
+            duplicate_plios(many)
+
+
+def test_nothing_is_cloned_unless_every_plio_can_be(creator, learner):
+    plio = build_plio(created_by=creator.user)
+    others = build_plio()
+    num_plios = Plio.objects.count()
+
+    path = "/api/v1/plios/bulk_duplicate/"
+    response = creator.post(path, {"uuids": [plio.uuid, "missing"]}, format="json")
+    assert response.status_code == 404
+    response = creator.post(path, {"uuids": [plio.uuid, others.uuid]}, format="json")
+    assert response.status_code == 403
+    response = creator.post(path, {"uuids": plio.uuid}, format="json")
+    assert response.status_code == 400
+    response = creator.post(path, {"uuids": [["a"], {"b": 1}]}, format="json")
+    assert response.status_code == 400
+    assert Plio.objects.count() == num_plios
+
+
+def test_command_writes_the_new_uuids(db, org_a, tmp_path):
+    with in_workspace(org_a):
+        plios = [build_plio() for _ in range(2)]
+
+    output = tmp_path / "new_uuids.txt"
+    call_command(
+        "duplicateplios",
+        *[plio.uuid for plio in plios],
+        schema=org_a.schema_name,
+        output=str(output),
+    )
+
+    lines = [line.split() for line in output.read_text().splitlines()]
+    assert [uuid for uuid, _ in lines] == [plio.uuid for plio in plios]
+    with in_workspace(org_a):
+        for uuid, new_uuid in lines:
+            original = Plio.objects.get(uuid=uuid)
+            assert get_tree(Plio.objects.get(uuid=new_uuid)) == get_tree(original)
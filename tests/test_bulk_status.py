@@ -0,0 +1,79 @@
+"""Pin publishing many plios at once at the ``plio.publishing`` seam.
+
+``POST /plios/bulk_status/`` changes the status of a list of plios with a
+single UPDATE, following the same rules as updating a single plio, and
+invalidates their cache all at once. These specs check the result returned
+for each plio, that the cached plios change, and that the number of queries
+does not grow with the number of plios.
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from plio.models import Plio
+from tests.factories import PlioFactory
+
+PATH = "/api/v1/plios/bulk_status/"
+
+
+def set_status(actor, uuids, new_status):
+    return actor.post(PATH, {"uuids": uuids, "status": new_status}, format="json")
+
+
+def test_result_of_each_plio(creator):
+    draft = PlioFactory(created_by=creator.user)
+    published = PlioFactory(created_by=creator.user, published=True)
+    # as with updating a single plio, a plio without a video can be published
+    without_video = PlioFactory(created_by=creator.user, video=None)
+    others = PlioFactory()
+    uuids = [draft.uuid, published.uuid, without_video.uuid, others.uuid, "missing"]
+
+    response = set_status(creator, uuids, "published")
+    assert response.status_code == 200
+    assert response.data == [
+        {"uuid": draft.uuid, "result": "updated"},
+        {"uuid": published.uuid, "result": "unchanged"},
+        {"uuid": without_video.uuid, "result": "updated"},
+        {"uuid": others.uuid, "result": "forbidden"},
+        {"uuid": "missing", "result": "not_found"},
+    ]
+    statuses = dict(Plio.objects.values_list("uuid", "status"))
+    assert statuses[draft.uuid] == "published"
+    assert statuses[without_video.uuid] == "published"
+    assert statuses[others.uuid] == "draft"
+
+    response = set_status(creator, [draft.uuid, others.uuid], "draft")
+    assert [result["result"] for result in response.data] == ["updated", "forbidden"]
+
+
+def test_cached_plios_change(creator):
+    plio = PlioFactory(created_by=creator.user)
+    path = "/api/v1/plios/{}/".format(plio.uuid)
+    assert creator.get(path).data["status"] == "draft"
+
+    set_status(creator, [plio.uuid], "published")
+    assert creator.get(path).data["status"] == "published"
+
+
+def test_queries_do_not_grow_with_the_plios(creator):
+    few = PlioFactory.create_batch(2, created_by=creator.user)
+    many = PlioFactory.create_batch(6, created_by=creator.user)
+    # whatever is cached for any request is cached before counting
+    set_status(creator, [], "published")
+
+    with CaptureQueriesContext(connection) as few_queries:
+        set_status(creator, [plio.uuid for plio in few], "published")
+    with CaptureQueriesContext(connection) as many_queries:
+        set_status(creator, [plio.uuid for plio in many], "published")
+    assert len(many_queries) == len(few_queries)
+    updates = [
+        query for query in many_queries if query["sql"].startswith('UPDATE "plio"')
+    ]
+    assert len(updates) == 1
+
+
+def test_invalid_requests(creator):
+    plio = PlioFactory(created_by=creator.user)
+    assert set_status(creator, [plio.uuid], "archived").status_code == 400
+    assert set_status(creator, plio.uuid, "published").status_code == 400
+    assert creator.post(PATH, {"uuids": [plio.uuid]}, format="json").status_code == 400
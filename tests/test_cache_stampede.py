@@ -0,0 +1,75 @@
+"""Pin single-flight cache population at the ``plio.cache.get_or_build`` seam.
+
+Plio and user payloads are cached through ``get_or_build``. When many requests
+miss the same key at once, only one of them may rebuild the value: the others
+serve the stale copy kept from before the invalidation or wait for the rebuilt
+value. These specs drive the lock directly with ``cache.add`` -- standing in
+for another worker in the middle of a rebuild -- and race real threads.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+
+from plio.cache import get_or_build, get_rebuild_lock_key
+
+
+def test_value_is_built_once_and_then_served_from_the_cache():
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"name": "fresh"}
+
+    assert get_or_build("plio_spec_1", build) == {"name": "fresh"}
+    assert get_or_build("plio_spec_1", build) == {"name": "fresh"}
+    assert len(builds) == 1
+
+
+def test_stale_copy_is_served_while_another_worker_rebuilds():
+    get_or_build("plio_spec_1", lambda: {"name": "old"})
+    # an edit invalidates the value
+    cache.delete("plio_spec_1")
+
+    # another worker has started rebuilding it
+    cache.add(get_rebuild_lock_key("plio_spec_1"), "other-worker")
+    assert get_or_build("plio_spec_1", lambda: {"name": "new"}) == {"name": "old"}
+
+
+def test_stale_copy_outlives_a_new_version_of_the_key():
+    get_or_build("plio_spec_1_v1.1", lambda: {"name": "old"})
+
+    # the key moves to a new version while another worker rebuilds it
+    cache.add(get_rebuild_lock_key("plio_spec_1_v1.2"), "other-worker")
+    assert get_or_build("plio_spec_1_v1.2", lambda: {"name": "new"}) == {"name": "old"}
+
+
+def test_worker_without_a_stale_copy_waits_for_the_rebuilt_value():
+    cache.add(get_rebuild_lock_key("plio_spec_1"), "other-worker")
+    # the other worker finishes its rebuild a little later
+    threading.Timer(0.2, cache.set, ["plio_spec_1", {"name": "rebuilt"}]).start()
+
+    def build():
+        raise AssertionError("the value should not be built twice")
+
+    assert get_or_build("plio_spec_1", build) == {"name": "rebuilt"}
+
+
+def test_concurrent_misses_build_the_value_once():
+    builds = []
+
+    def build():
+        builds.append(1)
+        # a slow rebuild, so that all the workers miss the key meanwhile
+        time.sleep(0.3)
+        return {"name": "fresh"}
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        values = list(
+            executor.map(lambda _: get_or_build("plio_spec_1", build), range(8))
+        )
+
+    assert values == [{"name": "fresh"}] * 8
+    assert len(builds) == 1
@@ -0,0 +1,123 @@
+"""Pin versioned cache keys at the ``plio.cache.get_cache_key`` seam.
+
+The cached payload of a plio embeds its video and its creator, and the payload
+of a user embeds their organizations. Rather than looking up and deleting every
+payload that embeds a changed video, user or organization, their keys include
+the versions of what they are built from, and a change bumps those versions --
+an organization bumps the version of each of its members. A plio key also
+carries the version of the plio's own content, so that a payload built before
+a change and cached after it is never read again. These specs check
+that the keys move on such changes -- and only on such changes -- and that the
+signal handlers do so without loading what the payloads are built from.
+"""
+
+from django.core.cache import cache
+
+from plio.cache import (
+    bump_version,
+    get_base_cache_key,
+    get_cache_key,
+    get_user_version_key,
+    get_video_version_key,
+)
+from tests.builders import in_workspace
+from tests.factories import OrganizationFactory, PlioFactory, UserFactory
+from users.models import OrganizationUser, Role
+
+
+def test_plio_key_moves_when_its_video_or_creator_changes(db, org_a):
+    with in_workspace(org_a):
+        plio = PlioFactory()
+        other_plio = PlioFactory()
+        cache_key = get_cache_key(plio)
+        other_cache_key = get_cache_key(other_plio)
+        assert cache_key.startswith(get_base_cache_key(plio) + "_v")
+        # the key is stable until something it is built from changes
+        assert get_cache_key(plio) == cache_key
+
+        bump_version(get_video_version_key(plio.video_id))
+        video_cache_key = get_cache_key(plio)
+        assert video_cache_key != cache_key
+
+        bump_version(get_user_version_key(plio.created_by_id))
+        assert get_cache_key(plio) not in (cache_key, video_cache_key)
+
+        # plios with another video and creator keep their key
+        assert get_cache_key(other_plio) == other_cache_key
+
+
+def test_plio_built_before_a_change_is_not_read_after_it(db, org_a):
+    with in_workspace(org_a):
+        plio = PlioFactory(name="Old name")
+        cache_key = get_cache_key(plio)
+
+        plio.name = "New name"
+        plio.save()
+        # a request that read the plio before the change caches it afterwards
+        cache.set(cache_key, {"name": "Old name"})
+
+        assert get_cache_key(plio) != cache_key
+        assert cache.get(get_cache_key(plio)) is None
+
+
+def test_evicted_versions_do_not_bring_back_old_keys(db):
+    user = UserFactory()
+    cache_key = get_cache_key(user)
+    cache.set(cache_key, {"first_name": "old"})
+
+    # the version is evicted and then bumped
+    cache.delete(get_user_version_key(user.id))
+    bump_version(get_user_version_key(user.id))
+    assert get_cache_key(user) != cache_key
+
+
+def test_changes_bump_a_version_without_querying(db, org_a, django_assert_num_queries):
+    organization = OrganizationFactory()
+    with in_workspace(org_a):
+        plio = PlioFactory()
+        cache_key = get_cache_key(plio)
+
+        # the receivers of each save change the key without loading the plios
+        # or users built from the saved instance
+        plio.video.title = "New title"
+        with django_assert_num_queries(1):
+            plio.video.save()
+        video_cache_key = get_cache_key(plio)
+        assert video_cache_key != cache_key
+
+        plio.created_by.first_name = "New name"
+        with django_assert_num_queries(1):
+            plio.created_by.save()
+        user_cache_key = get_cache_key(plio)
+        assert user_cache_key != video_cache_key
+
+        # the previous shortcode of the organization is read before saving it,
+        # and its members after
+        OrganizationUser.objects.create(
+            organization=organization,
+            user=plio.created_by,
+            role=Role.objects.get(name="org-view"),
+        )
+        member_cache_key = get_cache_key(plio)
+        organization.name = "New name"
+        with django_assert_num_queries(3):
+            organization.save()
+        assert get_cache_key(plio) != member_cache_key
+
+
+def test_organization_only_moves_the_keys_of_its_members(db, org_a):
+    organization = OrganizationFactory()
+    member = UserFactory()
+    OrganizationUser.objects.create(
+        organization=organization, user=member, role=Role.objects.get(name="org-view")
+    )
+    with in_workspace(org_a):
+        other_plio = PlioFactory()
+        other_cache_key = get_cache_key(other_plio)
+    member_cache_key = get_cache_key(member)
+
+    organization.name = "New name"
+    organization.save()
+    assert get_cache_key(member) != member_cache_key
+    with in_workspace(org_a):
+        assert get_cache_key(other_plio) == other_cache_key
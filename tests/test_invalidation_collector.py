@@ -0,0 +1,118 @@
+"""Pin collected cache invalidation at the ``plio.cache.collect_invalidations`` seam.
+
+The cache receivers of plios, users and organizations no longer delete keys as
+each row is saved: their invalidations are collected without duplicates and
+flushed together when the request ends or once the transaction they were made
+in commits, and are dropped if it rolls back. These specs save a plio's items
+and questions in one block, read within it, and write inside transactions that
+commit or roll back.
+"""
+
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+
+from plio import cache as plio_cache
+from plio.cache import (
+    collect_invalidations,
+    get_cache_key,
+    pending_invalidations,
+)
+from tests.builders import in_workspace
+from tests.factories import ItemFactory, PlioFactory, QuestionFactory
+
+
+def test_saves_within_a_block_invalidate_the_plio_once(db, org_a):
+    with in_workspace(org_a):
+        plio = PlioFactory()
+        items = ItemFactory.create_batch(3, plio=plio)
+        cache_key = get_cache_key(plio)
+        cache.set(cache_key, {"name": "cached"})
+
+        with collect_invalidations():
+            for item in items:
+                QuestionFactory.create_batch(10, item=item)
+            plio.name = "New name"
+            plio.save()
+
+            # 31 saves leave a single invalidation of the plio to flush
+            assert len(pending_invalidations.instances) == 1
+            assert cache.get(cache_key) == {"name": "cached"}
+
+        assert not pending_invalidations
+        assert cache.get(cache_key) is None
+
+
+def test_reading_within_a_block_sees_the_changes_so_far(db, org_a):
+    with in_workspace(org_a):
+        plio = PlioFactory()
+        cache_key = get_cache_key(plio)
+        cache.set(cache_key, {"name": "cached"})
+
+        with collect_invalidations():
+            plio.name = "New name"
+            plio.save()
+            # a request serializing the plio it just saved builds it rather
+            # than reading it from the cache, without flushing anything yet
+            assert get_cache_key(plio) is None
+            assert cache.get(cache_key) == {"name": "cached"}
+
+        assert cache.get(cache_key) is None
+
+
+@pytest.fixture
+def on_commit(settings, django_capture_on_commit_callbacks):
+    """Waits for the transactions of the test to commit, as requests do"""
+    settings.CACHE_INVALIDATIONS_EAGER = False
+    return django_capture_on_commit_callbacks
+
+
+def test_invalidations_wait_for_the_transaction_to_commit(db, org_a, on_commit):
+    with in_workspace(org_a):
+        plio = PlioFactory()
+        cache_key = get_cache_key(plio)
+        cache.set(cache_key, {"name": "cached"})
+
+        with mock.patch.object(
+            plio_cache, "flush_invalidations", wraps=plio_cache.flush_invalidations
+        ) as flush, on_commit(execute=True):
+            with transaction.atomic():
+                ItemFactory.create_batch(3, plio=plio)
+                # a concurrent request would still see the committed plio
+                assert cache.get(cache_key) == {"name": "cached"}
+                assert get_cache_key(plio) is None
+
+        # the changes of the whole transaction are flushed once
+        assert flush.call_count == 1
+        assert cache.get(cache_key) is None
+        assert get_cache_key(plio) != cache_key
+
+
+def test_rolled_back_invalidations_are_dropped(db, org_a, on_commit):
+    with in_workspace(org_a):
+        plio = PlioFactory()
+        items = ItemFactory.create_batch(2, plio=plio)
+        cache_key = get_cache_key(plio)
+        cache.set(cache_key, {"name": "cached"})
+
+        with on_commit(execute=True) as callbacks:
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    items[0].delete()
+                    raise RuntimeError
+            # only the savepoint that changed the second item rolls back
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        items[1].delete()
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+
+        assert callbacks == []
+        assert not pending_invalidations
+        assert not list(pending_invalidations.uncommitted)
+        assert get_cache_key(plio) == cache_key
+        assert cache.get(cache_key) == {"name": "cached"}
@@ -0,0 +1,172 @@
+"""Pin the in-process cache in front of redis at the ``plio.cache`` seam.
+
+With ``LOCAL_CACHE_ENABLED``, ``get_or_build`` serves the responses it has seen
+from the memory of the process, and every invalidation is published on redis
+for all processes to drop their copy. These specs check the byte-bounded LRU on
+its own, that a local hit skips redis entirely, that a key published by
+another process is dropped, that the versions the keys are built from are kept
+locally too, and the hit counters of each key family and their logging.
+"""
+
+import json
+import logging
+import time
+
+import pytest
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from plio.cache import (
+    INVALIDATION_CHANNEL,
+    LocalCache,
+    bump_version,
+    cache_stats,
+    get_cache_key,
+    get_or_build,
+    get_user_version_key,
+    invalidation_subscribed,
+    publish_invalidations,
+    response_cache,
+    use_local_cache,
+    version_cache,
+)
+from tests.factories import PlioFactory
+
+
+@pytest.fixture
+def local_cache(settings):
+    settings.LOCAL_CACHE_ENABLED = True
+    use_local_cache()
+    assert invalidation_subscribed.wait(timeout=5)
+
+
+def test_least_recently_used_values_are_evicted_beyond_the_byte_limit():
+    values = LocalCache(max_size=10, timeout=60, max_bytes=100)
+    values.set("a", b"a" * 40)
+    values.set("b", b"b" * 40)
+    # reading "a" makes "b" the least recently used value
+    assert values.get("a") == b"a" * 40
+    values.set("c", b"c" * 40)
+
+    assert values.get("b") is None
+    assert values.get("a") == b"a" * 40
+    assert values.num_bytes == 80
+
+    # a value larger than the whole cache is not kept at all
+    values.set("d", b"d" * 101)
+    assert values.get("d") is None
+    assert values.num_bytes == 80
+
+
+def test_local_hit_does_not_go_to_redis(local_cache):
+    assert get_or_build("plio_spec_1", lambda: {"name": "fresh"}) == {"name": "fresh"}
+    # a plain redis delete, which other processes are not told about
+    cache.delete("plio_spec_1")
+
+    value = get_or_build("plio_spec_1", lambda: {"name": "rebuilt"})
+    assert value == {"name": "fresh"}
+    # every read gets its own copy
+    value["name"] = "changed"
+    assert get_or_build("plio_spec_1", lambda: {})["name"] == "fresh"
+
+
+def test_key_invalidated_by_another_process_is_dropped(local_cache):
+    get_or_build("plio_spec_1", lambda: {"name": "fresh"})
+    assert response_cache.get("plio_spec_1") is not None
+
+    # another process invalidates the key
+    get_redis_connection("default").publish(
+        INVALIDATION_CHANNEL, json.dumps(["plio_spec_1"])
+    )
+    deadline = time.monotonic() + 5
+    while response_cache.get("plio_spec_1") is not None:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_own_invalidation_drops_the_key_at_once(local_cache):
+    get_or_build("user_1", lambda: {"id": 1})
+    publish_invalidations(["user_1"])
+    assert response_cache.get("user_1") is None
+
+
+def test_value_invalidated_while_it_is_built_is_not_kept_locally(local_cache):
+    def build():
+        # another process invalidates the key in the meantime
+        publish_invalidations(["plio_spec_1"])
+        return {"name": "old"}
+
+    get_or_build("plio_spec_1", build)
+    assert response_cache.get("plio_spec_1") is None
+
+
+def test_hit_rates_are_counted_per_key_family(local_cache):
+    get_or_build("plio_spec_1", lambda: {"name": "fresh"})
+    get_or_build("plio_spec_1", lambda: {"name": "fresh"})
+    response_cache.clear()
+    get_or_build("plio_spec_1", lambda: {"name": "fresh"})
+    get_or_build("user_1", lambda: {"id": 1})
+
+    stats = cache_stats.get()
+    assert stats["plio"]["miss"] == 1
+    assert stats["plio"]["local"] == 1
+    assert stats["plio"]["redis"] == 1
+    assert stats["plio"]["hit_rate"] == pytest.approx(2 / 3)
+    assert stats["plio"]["local_hit_rate"] == pytest.approx(1 / 3)
+    assert stats["user"] == {
+        "local": 0,
+        "redis": 0,
+        "miss": 1,
+        "local_hit_rate": 0,
+        "hit_rate": 0,
+    }
+
+
+def test_values_deleted_while_being_read_are_not_kept():
+    values = LocalCache(max_size=10, timeout=60)
+    generation = values.generation
+    values.delete("a")
+    values.set_many({"a": 1}, generation)
+    assert values.get("a") is None
+
+    values.set_many({"a": 2}, values.generation)
+    assert values.get("a") == 2
+
+
+def test_versions_are_read_locally_until_bumped(db, local_cache):
+    plio = PlioFactory()
+    version_key = get_user_version_key(plio.created_by_id)
+    cache_key = get_cache_key(plio)
+    assert cache_stats.get()["version"]["local"] == 0
+    assert get_cache_key(plio) == cache_key
+    assert cache_stats.get()["version"]["local"] > 0
+    assert version_cache.get(version_key) is not None
+
+    # another process bumps the version
+    get_redis_connection("default").incr(cache.make_key(version_key))
+    get_redis_connection("default").publish(
+        INVALIDATION_CHANNEL, json.dumps([version_key])
+    )
+    deadline = time.monotonic() + 5
+    while version_cache.get(version_key) is not None:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    bumped_cache_key = get_cache_key(plio)
+    assert bumped_cache_key != cache_key
+
+    # a version bumped by this process is dropped at once
+    bump_version(version_key)
+    assert get_cache_key(plio) not in (cache_key, bumped_cache_key)
+
+
+def test_hit_rates_are_logged_periodically(settings, caplog):
+    settings.CACHE_STATS_LOG_INTERVAL = 0
+    with caplog.at_level(logging.INFO, logger="plio.cache"):
+        get_or_build("plio_spec_1", lambda: {"name": "fresh"})
+        assert not caplog.records
+
+        settings.CACHE_STATS_LOG_INTERVAL = 1
+        cache_stats.logged_at -= 1
+        get_or_build("plio_spec_1", lambda: {"name": "fresh"})
+    assert len(caplog.records) == 1
+    assert '"plio"' in caplog.records[0].getMessage()
@@ -0,0 +1,47 @@
+"""Pin the membership lookups at the ``User.get_organization_roles`` seam.
+
+Permission classes and views ask whether ``request.user`` belongs to, or
+administers, an organization several times per request. These specs check that
+all those questions are answered from one membership query per user instance,
+that later instances (later requests) read the roles from Redis, and that a
+membership change is seen by the next instance.
+"""
+
+from organizations.cache import get_tenant
+from users.models import OrganizationUser, Role, User
+from tests.factories import UserFactory
+
+
+def test_membership_checks_share_one_query(db, org_a, org_b, django_assert_num_queries):
+    user = UserFactory()
+    OrganizationUser.objects.create(
+        user=user, organization=org_a, role=Role.objects.get(name="org-admin")
+    )
+    # the tenants are cached on their own, so resolve them up front
+    get_tenant("org-a")
+    get_tenant("org-b")
+    user = User.objects.get(id=user.id)
+
+    with django_assert_num_queries(1):
+        assert user.belongs_to_organization("org-a")
+        assert not user.belongs_to_organization("org-b")
+        assert user.is_org_admin(org_a.id)
+        assert user.get_role_for_organization(str(org_a.id)).name == "org-admin"
+        assert user.get_role_for_organization(org_b.id) is None
+
+
+def test_roles_are_cached_across_instances_until_membership_changes(
+    db, org_a, django_assert_num_queries
+):
+    user = UserFactory()
+    assert user.get_role_for_organization(org_a.id) is None
+
+    # the next request finds the roles in redis
+    with django_assert_num_queries(0):
+        assert User(id=user.id).get_role_for_organization(org_a.id) is None
+
+    OrganizationUser.objects.create(
+        user=user, organization=org_a, role=Role.objects.get(name="org-view")
+    )
+    role = User.objects.get(id=user.id).get_role_for_organization(org_a.id)
+    assert role.name == "org-view"
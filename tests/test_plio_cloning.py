@@ -0,0 +1,75 @@
+"""Pin cloning the tree of a plio at the ``plio.cloning.clone_plios`` seam.
+
+``clone_plios`` copies plios along with their videos, items, questions and
+images with one ``INSERT ... SELECT ... RETURNING`` per table, within a schema
+(duplicate) or into another one (copy). These specs check that a plio with a
+hundred questions takes a handful of queries, that each question is copied
+under the copy of its own item and image, and what is left out of the copy.
+"""
+
+from django.db import connection
+
+from plio.cloning import clone_plios, duplicate_plios
+from plio.models import Item, Plio, Question
+from tests.builders import in_workspace
+from tests.factories import ImageFactory, ItemFactory, PlioFactory, QuestionFactory
+
+
+def get_questions(plio):
+    return [
+        (question.item.time, question.text, question.image_id)
+        for question in Question.objects.filter(item__plio=plio).order_by("item__time")
+    ]
+
+
+def test_large_plio_takes_a_handful_of_queries(db, django_assert_max_num_queries):
+    plio = PlioFactory()
+    for time in range(100):
+        QuestionFactory(item=ItemFactory(plio=plio, time=time), text=f"Q{time}")
+
+    with django_assert_max_num_queries(10):
+        clone = duplicate_plios([plio])[plio.uuid]
+    assert [question[:2] for question in get_questions(clone)] == [
+        question[:2] for question in get_questions(plio)
+    ]
+
+
+def test_copy_into_another_workspace(creator, org_a):
+    plio = PlioFactory(created_by=creator.user, published=True)
+    shared_image = ImageFactory()
+    for time, text, image in [(30, "last", None), (10, "first", shared_image)]:
+        item = ItemFactory(plio=plio, time=time)
+        QuestionFactory(item=item, text=text, image=image)
+    QuestionFactory(item=ItemFactory(plio=plio, time=20), image=shared_image)
+    ItemFactory(plio=plio, time=40).delete()
+
+    response = creator.post(
+        "/api/v1/plios/{}/copy/".format(plio.uuid),
+        {"workspace": org_a.shortcode},
+        format="json",
+    )
+    connection.set_schema_to_public()
+    assert response.status_code == 200
+    assert [item["time"] for item in response.data["items"]] == [10, 20, 30]
+
+    with in_workspace(org_a):
+        clone = Plio.objects.get(uuid=response.data["uuid"])
+        assert clone.status == "draft"
+        assert Item.objects.filter(plio=clone).count() == 3
+        questions = get_questions(clone)
+
+    # each question is under the copy of its own item, and the image shared by
+    # two questions is copied once
+    assert [text for _, text, _ in questions] == ["first", "Factory question", "last"]
+    assert questions[0][2] == questions[1][2] is not None
+    assert questions[2][2] is None
+
+
+def test_plio_without_video(db, org_a):
+    plio = PlioFactory(video=None)
+    QuestionFactory(item=ItemFactory(plio=plio))
+
+    clone = clone_plios([plio], "public", org_a.schema_name)[plio.uuid]
+    assert clone.video_id is None
+    with in_workspace(org_a):
+        assert Question.objects.filter(item__plio=clone).count() == 1
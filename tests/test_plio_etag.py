@@ -0,0 +1,99 @@
+"""Pin conditional GETs of a plio at the ``plio.cache.get_etag`` seam.
+
+Plio retrieve and play send an ETag built from the versions of the plio's
+content and of everything else in its response, and answer a request whose
+``If-None-Match`` holds the current ETag with an empty 304 -- without building
+or even reading the response. These specs check the 304s, that every kind of
+change moves the ETag, that a stale copy keeps its own ETag, and that the
+gzipped response gets a weak ETag.
+"""
+
+from django.core.cache import cache
+
+from plio.cache import get_cache_key, get_rebuild_lock_key, get_rendered_cache_key
+from tests.factories import ItemFactory, PlioFactory
+
+
+def test_unchanged_plio_is_not_sent_again(creator):
+    plio = PlioFactory(created_by=creator.user, is_public=True)
+    path = "/api/v1/plios/{}/".format(plio.uuid)
+
+    response = creator.get(path)
+    etag = response["ETag"]
+    assert response.status_code == 200
+    assert not etag.startswith("W/")
+
+    # the response is neither built nor read for a 304
+    cache.delete(get_rendered_cache_key(get_cache_key(plio)))
+    not_modified = creator.get(path, HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified["ETag"] == etag
+    assert cache.get(get_rendered_cache_key(get_cache_key(plio))) is None
+
+    # playing the plio sends the same response
+    play_path = "/api/v1/plios/{}/play/".format(plio.uuid)
+    assert creator.get(play_path)["ETag"] == etag
+    assert creator.get(play_path, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+
+def test_any_change_to_the_response_moves_the_etag(creator):
+    plio = PlioFactory(created_by=creator.user)
+    item = ItemFactory(plio=plio)
+    path = "/api/v1/plios/{}/".format(plio.uuid)
+    etags = [creator.get(path)["ETag"]]
+
+    creator.patch(path, {"name": "Renamed"})
+    etags.append(creator.get(path)["ETag"])
+    creator.patch("/api/v1/items/{}/".format(item.id), {"time": 20})
+    etags.append(creator.get(path)["ETag"])
+    creator.patch("/api/v1/videos/{}/".format(plio.video_id), {"title": "Retitled"})
+    etags.append(creator.get(path)["ETag"])
+    creator.patch(
+        "/api/v1/users/{}/".format(creator.user.id), {"first_name": "Renamed"}
+    )
+    etags.append(creator.get(path)["ETag"])
+
+    assert len(set(etags)) == len(etags)
+    response = creator.get(path, HTTP_IF_NONE_MATCH=etags[0])
+    assert response.status_code == 200
+    assert response.data["created_by"]["first_name"] == "Renamed"
+
+
+def test_stale_copy_is_sent_with_its_own_etag(creator):
+    plio = PlioFactory(created_by=creator.user)
+    path = "/api/v1/plios/{}/".format(plio.uuid)
+    old_etag = creator.get(path)["ETag"]
+    creator.patch(path, {"name": "Renamed"})
+
+    # another worker is rebuilding the plio, so the stale copy is served
+    lock_key = get_rebuild_lock_key(get_rendered_cache_key(get_cache_key(plio)))
+    cache.add(lock_key, "other-worker")
+    response = creator.get(path, HTTP_IF_NONE_MATCH=old_etag)
+    assert response.status_code == 200
+    assert response.data["name"] != "Renamed"
+    assert response["ETag"] == old_etag
+
+    # once it is rebuilt, a client holding the stale copy gets the new plio
+    cache.delete(lock_key)
+    response = creator.get(path, HTTP_IF_NONE_MATCH=old_etag)
+    assert response.status_code == 200
+    assert response.data["name"] == "Renamed"
+    assert response["ETag"] != old_etag
+
+
+def test_gzipped_plio_has_a_weak_etag(creator):
+    plio = PlioFactory(created_by=creator.user)
+    ItemFactory.create_batch(20, plio=plio)
+    path = "/api/v1/plios/{}/".format(plio.uuid)
+
+    etag = creator.get(path)["ETag"]
+    gzipped = creator.get(path, HTTP_ACCEPT_ENCODING="gzip")
+    assert gzipped["Content-Encoding"] == "gzip"
+    assert gzipped["ETag"] == "W/" + etag
+
+    # both match either ETag, as If-None-Match uses the weak comparison
+    not_modified = creator.get(
+        path, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=gzipped["ETag"]
+    )
+    assert not_modified.status_code == 304
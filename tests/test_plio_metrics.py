@@ -0,0 +1,159 @@
+"""Pin the per-plio metrics at the ``plio.analytics`` and ``entries.metrics`` seams.
+
+The metrics endpoint reads running totals from ``PlioMetrics``. Writing a
+session or an answer only queues its viewer in ``PendingViewerMetrics``, and the
+queued viewers are applied to the totals on the next read. These specs check
+the per-viewer values and totals computed from hand-written rows, that writes
+never lock the totals of the plio, and that the
+``reconcilepliometrics`` command repairs totals that drifted away from the
+sessions they summarise. Expected values are literals worked out from each
+spec's tiny scenario.
+"""
+
+import pandas as pd
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from entries.metrics import get_plio_metrics
+from entries.models import PendingViewerMetrics, PlioMetrics
+from plio.analytics import (
+    compute_metric_totals,
+    compute_retention_metrics,
+    compute_viewer_metrics,
+)
+from tests.builders import in_workspace
+from tests.factories import (
+    ItemFactory,
+    PlioFactory,
+    QuestionFactory,
+    SessionAnswerFactory,
+    SessionFactory,
+    UserFactory,
+)
+
+
+def test_retention_is_only_used_when_it_covers_the_whole_video():
+    retention = pd.Series(
+        [
+            ",".join(["0"] * 59 + ["1"]),
+            ",".join(["1"] * 59 + ["0"]),
+            # too short, NaN-bearing and empty strings are all invalid
+            "1,1",
+            ",".join(["NaN"] * 60),
+            "",
+        ]
+    )
+    is_valid, is_retained = compute_retention_metrics(retention, 60)
+    assert is_valid.tolist() == [True, True, False, False, False]
+    assert is_retained.tolist() == [True, False, False, False, False]
+
+    # videos under a minute have no one-minute retention at all
+    is_valid, is_retained = compute_retention_metrics(pd.Series(["1,1,1"]), 3)
+    assert is_valid.tolist() == [False]
+    assert is_retained.tolist() == [False]
+
+
+def test_viewer_metrics_from_hand_written_rows():
+    sessions = [(11, 7, 42.5, "0,0,0"), (12, 8, 10.0, "0,0,0")]
+    # answers arrive as jsonb text: viewer 7 got the mcq right, the checkbox
+    # wrong and skipped the subjective question; viewer 8 skipped everything
+    responses = [
+        (7, "0", "mcq", "0"),
+        (7, "[0, 1]", "checkbox", "[0]"),
+        (7, None, "subjective", None),
+        (8, None, "mcq", "0"),
+        (8, None, "checkbox", "[0]"),
+        (8, None, "subjective", None),
+    ]
+    viewers = compute_viewer_metrics(
+        sessions, responses, video_duration=3, num_questions=3
+    )
+
+    assert viewers.to_dict("records") == [
+        {
+            "session_id": 11,
+            "user_id": 7,
+            "watch_time": 42.5,
+            "is_retention_valid": False,
+            "is_retained_one_minute": False,
+            "num_responses": 3,
+            "num_answered": 2,
+            "num_correct": 1,
+            # one of the three questions is unanswered
+            "is_completed": False,
+        },
+        {
+            "session_id": 12,
+            "user_id": 8,
+            "watch_time": 10.0,
+            "is_retention_valid": False,
+            "is_retained_one_minute": False,
+            "num_responses": 3,
+            "num_answered": 0,
+            "num_correct": 0,
+            "is_completed": False,
+        },
+    ]
+
+    totals = compute_metric_totals(viewers)
+    assert totals["num_viewers"] == 2
+    assert totals["watch_time_sum"] == 52.5
+    assert totals["num_responders"] == 2
+    # only viewer 7 answered anything, getting 1 of 2 right
+    assert totals["num_answering"] == 1
+    assert totals["accuracy_sum"] == 0.5
+
+
+def test_reconcile_command_repairs_drifted_totals(db, org_a):
+    with in_workspace(org_a):
+        plio = PlioFactory(video__duration=30)
+        item = ItemFactory(plio=plio, time=5)
+        QuestionFactory(item=item, mcq=True)
+        session = SessionFactory(plio=plio, user=UserFactory(), watch_time=12)
+        SessionAnswerFactory(session=session, item=item, answer=0)
+
+        # totals that no longer match the single viewer above
+        PlioMetrics.objects.update_or_create(
+            plio=plio, defaults={"num_viewers": 5, "watch_time_sum": 1.0}
+        )
+
+    call_command("reconcilepliometrics", schema=[org_a.schema_name])
+
+    with in_workspace(org_a):
+        plio_metrics = PlioMetrics.objects.get(plio=plio)
+    assert plio_metrics.num_viewers == 1
+    assert plio_metrics.watch_time_sum == 12
+    assert plio_metrics.num_answering == 1
+    assert plio_metrics.accuracy_sum == 1
+    assert plio_metrics.num_completed == 1
+
+
+def test_writes_queue_the_viewer_without_locking_the_totals(db, org_a):
+    with in_workspace(org_a):
+        plio = PlioFactory(video__duration=30)
+        item = ItemFactory(plio=plio, time=5)
+        QuestionFactory(item=item, mcq=True)
+        assert get_plio_metrics(plio).num_viewers == 0
+
+        viewer = UserFactory()
+        with CaptureQueriesContext(connection) as queries:
+            session = SessionFactory(plio=plio, user=viewer, watch_time=12)
+            answer = SessionAnswerFactory(session=session, item=item)
+            answer.answer = 0
+            answer.save()
+        assert not [query for query in queries if "FOR UPDATE" in query["sql"]]
+
+        # the three writes are coalesced into one queued viewer
+        assert list(
+            PendingViewerMetrics.objects.filter(plio=plio).values_list(
+                "user_id", flat=True
+            )
+        ) == [viewer.id]
+
+        plio_metrics = get_plio_metrics(plio)
+        assert plio_metrics.num_viewers == 1
+        assert plio_metrics.watch_time_sum == 12
+        assert plio_metrics.num_answering == 1
+        assert plio_metrics.accuracy_sum == 1
+        assert not PendingViewerMetrics.objects.filter(plio=plio).exists()
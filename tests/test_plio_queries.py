@@ -17,7 +17,7 @@ string ``"0"``, a list ``["A", "B"]`` as ``'["A", "B"]'``, and a stored NULL as
 ``None``. The expected literals below use that documented text form.
 
 This module is the shared home for every query-builder test in the plio unit
-fill: the latest-sessions, latest-responses and plio-details builders (#400), the
+fill: the viewer-sessions, viewer-responses and plio-details builders (#400), the
 sessions-dump and events builders (#402), and the responses-dump and
 user-level-metrics "grading" builders (#403). It lives outside
 ``tests/integration/`` so the unit lane collects it.
@@ -29,11 +29,12 @@ from types import SimpleNamespace
 
 from django.db import connection
 
+from entries.retention import decode_retention
 from plio.queries import (
     get_events_query,
     get_plio_details_query,
-    get_plio_latest_responses_query,
-    get_plio_latest_sessions_query,
+    get_plio_viewer_responses_query,
+    get_plio_viewer_sessions_query,
     get_responses_dump_query,
     get_sessions_dump_query,
     get_user_level_metrics_query,
@@ -101,15 +102,15 @@ def _seed_identity_learners(org):
     return learner_email, learner_mobile, learner_unique, learner_authorg
 
 
-def test_latest_sessions_returns_one_row_per_learner_newest_session(db, org_a):
+def test_viewer_sessions_returns_one_row_per_learner_newest_session(db, org_a):
     with in_workspace(org_a):
         plio = PlioFactory()
         learner_a = UserFactory()
         learner_b = UserFactory()
-        # learner A rewatched: two sessions on the same plio. The builder ranks
-        # by descending session id, so only the newer (higher-id) session wins.
-        # The newer session deliberately has the *smaller* watch time, so a
-        # ranking that switched to watch_time DESC would pick the older session
+        # learner A rewatched: two sessions on the same plio. The builder keeps
+        # the highest session id of each viewer, so only the newer session wins.
+        # The newer session deliberately has the *smaller* watch time, so an
+        # ordering that switched to watch_time DESC would pick the older session
         # and fail here.
         SessionFactory(plio=plio, user=learner_a, watch_time=30, retention="early-a")
         newer_a = SessionFactory(
@@ -119,31 +120,35 @@ def test_latest_sessions_returns_one_row_per_learner_newest_session(db, org_a):
         session_b = SessionFactory(
             plio=plio, user=learner_b, watch_time=50, retention="only-b"
         )
-        # decoy plio watched by *learner A* (not a fresh user), created after
-        # A's target sessions so it holds A's globally-highest session id: the
-        # ranking window partitions by (user_id, plio_id), and dropping the
-        # plio_id from the partition would let this decoy session take A's
-        # rank 1 and evict A's target row -- a fresh-user decoy cannot catch
-        # that mutation
+        # decoy plio watched by *learner A*, created after A's target sessions
+        # so it holds A's globally-highest session id: dropping the plio filter
+        # would let this decoy session replace A's target row
         decoy = PlioFactory()
         SessionFactory(plio=decoy, user=learner_a, watch_time=999, retention="decoy")
 
-    rows = _run(get_plio_latest_sessions_query(plio.uuid, org_a.schema_name))
-
-    # exactly one row per learner: A's earlier 30s session is superseded by the
-    # newer 7s one (newest-by-id, not biggest-by-watch-time); learner B's single
-    # session stands; the decoy is absent. No ORDER BY in this builder ->
-    # compare order-insensitively but preserve row multiplicity (a set would
-    # hide join fan-out duplicates).
-    assert Counter(rows) == Counter(
-        [
-            (newer_a.id, 7.0, "late-a"),
-            (session_b.id, 50.0, "only-b"),
+    def run(user_ids=None):
+        rows = _run(
+            get_plio_viewer_sessions_query(plio.id, org_a.schema_name, user_ids)
+        )
+        # retention is stored as compact bytes (the free-form markers above as
+        # tagged utf-8 text), so decode it back into the string that was saved
+        return [
+            (id_, user_id, watch_time, decode_retention(retention))
+            for id_, user_id, watch_time, retention in rows
         ]
-    )
+
+    # exactly one row per learner, ordered by learner: A's earlier 30s session
+    # is superseded by the newer 7s one; the decoy is absent
+    assert run() == [
+        (newer_a.id, learner_a.id, 7.0, "late-a"),
+        (session_b.id, learner_b.id, 50.0, "only-b"),
+    ]
+    # the rows can be narrowed down to some of the viewers
+    assert run((learner_b.id,)) == [(session_b.id, learner_b.id, 50.0, "only-b")]
+    assert run((learner_a.id, learner_b.id)) == run()
 
 
-def test_latest_responses_single_session_uses_equality_branch(db, org_a):
+def test_viewer_responses_come_from_the_newest_session_only(db, org_a):
     with in_workspace(org_a):
         plio = PlioFactory()
         # a question-less item first: it offsets the item/question id sequences
@@ -152,79 +157,38 @@ def test_latest_responses_single_session_uses_equality_branch(db, org_a):
         ItemFactory(plio=plio, time=1)
         item = ItemFactory(plio=plio, time=10)
         QuestionFactory(item=item, type="mcq", options=["A", "B"], correct_answer=0)
-        # a second item so the queried session holds *two* answers: a builder
-        # collapsing to one row per session (e.g. DISTINCT ON) fails here
-        item_2 = ItemFactory(plio=plio, time=20)
-        QuestionFactory(item=item_2, type="mcq", options=["A", "B"], correct_answer=1)
-        learner = UserFactory()
-        session = SessionFactory(plio=plio, user=learner)
-        answer = SessionAnswerFactory(session=session, item=item, answer=0)
-        answer_2 = SessionAnswerFactory(session=session, item=item_2, answer=0)
-        # decoy: another plio's session + answer, whose id is not queried; the
-        # builder filters purely on session id, so passing only this plio's
-        # session must exclude it
-        decoy = PlioFactory()
-        decoy_item = ItemFactory(plio=decoy, time=5)
-        QuestionFactory(item=decoy_item, mcq=True)
-        decoy_session = SessionFactory(plio=decoy, user=UserFactory())
-        SessionAnswerFactory(session=decoy_session, item=decoy_item, answer=1)
-
-    query = get_plio_latest_responses_query(org_a.schema_name, (session.id,))
-    # a single id takes the equality form, not the IN tuple form
-    assert "session.id IN" not in query
-
-    rows = _run(query)
-
-    # *both* of the queried session's answers appear (one row per answer, not
-    # per session); the decoy session's answer is excluded. answers read back
-    # as their jsonb text; the trailing False is question.survey (the factory
-    # default -- these are not survey questions). Multiset comparison preserves
-    # row multiplicity.
-    assert Counter(rows) == Counter(
-        [
-            (answer.id, learner.id, "0", "question", "mcq", "0", False),
-            (answer_2.id, learner.id, "0", "question", "mcq", "1", False),
-        ]
-    )
-
-
-def test_latest_responses_multiple_sessions_use_in_tuple_branch(db, org_a):
-    with in_workspace(org_a):
-        plio = PlioFactory()
-        # question-less item: offsets item/question ids (see the single-session
-        # spec) so question.id = item.id join mutations fail
-        ItemFactory(plio=plio, time=1)
-        item = ItemFactory(plio=plio, time=10)
-        QuestionFactory(item=item, type="mcq", options=["A", "B"], correct_answer=0)
+        # answers to survey questions do not count towards the metrics
+        survey_item = ItemFactory(plio=plio, time=20)
+        QuestionFactory(item=survey_item, mcq=True, survey=True)
         learner_a = UserFactory()
         learner_b = UserFactory()
+        older_a = SessionFactory(plio=plio, user=learner_a)
+        SessionAnswerFactory(session=older_a, item=item, answer=1)
         session_a = SessionFactory(plio=plio, user=learner_a)
-        answer_a = SessionAnswerFactory(session=session_a, item=item, answer=0)  # right
+        SessionAnswerFactory(session=session_a, item=item, answer=0)
+        SessionAnswerFactory(session=session_a, item=survey_item, answer=1)
         session_b = SessionFactory(plio=plio, user=learner_b)
-        answer_b = SessionAnswerFactory(session=session_b, item=item, answer=1)  # wrong
-        # decoy: a third session whose id is not queried
+        SessionAnswerFactory(session=session_b, item=item, answer=1)
+        # decoy: another plio's session + answer
         decoy = PlioFactory()
         decoy_item = ItemFactory(plio=decoy, time=5)
         QuestionFactory(item=decoy_item, mcq=True)
-        decoy_session = SessionFactory(plio=decoy, user=UserFactory())
-        SessionAnswerFactory(session=decoy_session, item=decoy_item, answer=0)
-
-    query = get_plio_latest_responses_query(
-        org_a.schema_name, (session_a.id, session_b.id)
-    )
-    # two ids take the IN tuple form
-    assert "session.id IN" in query
-
-    rows = _run(query)
+        decoy_session = SessionFactory(plio=decoy, user=learner_a)
+        SessionAnswerFactory(session=decoy_session, item=decoy_item, answer=1)
 
-    # one row per queried session; the decoy session's answer is excluded.
-    # answers 0 and 1 read back as their jsonb text; the correct answer is "0".
+    # answers read back as their jsonb text; the correct answer is "0". The
+    # builder has no ORDER BY, so rows are compared as a multiset.
+    rows = _run(get_plio_viewer_responses_query(plio.id, org_a.schema_name))
     assert Counter(rows) == Counter(
         [
-            (answer_a.id, learner_a.id, "0", "question", "mcq", "0", False),
-            (answer_b.id, learner_b.id, "1", "question", "mcq", "0", False),
+            (learner_a.id, "0", "mcq", "0"),
+            (learner_b.id, "1", "mcq", "0"),
         ]
     )
+    rows = _run(
+        get_plio_viewer_responses_query(plio.id, org_a.schema_name, (learner_a.id,))
+    )
+    assert rows == [(learner_a.id, "0", "mcq", "0")]
 
 
 def test_plio_details_returns_item_and_question_rows(db, org_a):
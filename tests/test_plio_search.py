@@ -0,0 +1,74 @@
+"""Pin searching the plio listing at the ``plio.search.PlioSearchFilter`` seam.
+
+``?search=`` matches the plios whose name or uuid contains every search term,
+looked up in trigram indexes instead of scanning every plio, and still matches
+the status and the update time of the plios like ``SearchFilter`` did. These
+specs check what matches, that the results are ranked by how well they match
+unless an ordering is asked for, and that every schema has the indexes.
+"""
+
+from django.db import connection
+
+from plio.models import Plio
+from tests.factories import PlioFactory
+
+
+def search(actor, query):
+    response = actor.get(f"/api/v1/plios/?{query}")
+    assert response.status_code == 200
+    return [plio["name"] for plio in response.data["results"]]
+
+
+def test_every_term_must_match(creator):
+    PlioFactory(created_by=creator.user, name="Algebra basics")
+    PlioFactory(created_by=creator.user, name="Algebra quiz", published=True)
+    PlioFactory(created_by=creator.user, name="Geometry basics", uuid="zxcvbnmlkj")
+
+    assert sorted(search(creator, "search=ALGEBRA")) == [
+        "Algebra basics",
+        "Algebra quiz",
+    ]
+    assert search(creator, "search=algebra basics") == ["Algebra basics"]
+    assert search(creator, "search=algebra publish") == ["Algebra quiz"]
+    assert search(creator, "search=cvbnm") == ["Geometry basics"]
+
+    year = str(Plio.objects.filter(created_by=creator.user).first().updated_at.year)
+    assert len(search(creator, f"search={year}")) == 3
+
+
+def test_results_are_ranked(creator):
+    for name in ["Fractions and decimals", "Fractions", "Adding fractions"]:
+        PlioFactory(created_by=creator.user, name=name)
+
+    assert search(creator, "search=fractions") == [
+        "Fractions",
+        "Adding fractions",
+        "Fractions and decimals",
+    ]
+    # an ordering asked for takes precedence over the rank
+    assert search(creator, "search=fractions&ordering=name") == [
+        "Adding fractions",
+        "Fractions",
+        "Fractions and decimals",
+    ]
+
+    # the ranked results can be paged through by cursor
+    PlioFactory.create_batch(4, created_by=creator.user, name="More fractions")
+    path = "/api/v1/plios/?pagination=cursor&search=fractions"
+    first = creator.get(path).data
+    second = creator.get(first["next"]).data
+    assert first["results"][0]["name"] == "Fractions"
+    assert len(first["results"] + second["results"]) == 7
+    assert second["next"] is None
+
+
+def test_every_schema_has_the_indexes(db, org_a):
+    with connection.cursor() as cursor:
+        for schema in ["public", org_a.schema_name]:
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes WHERE schemaname = %s "
+                "AND indexname LIKE %s ORDER BY indexname",
+                [schema, "plio_%_trgm_idx"],
+            )
+            indexes = [row[0] for row in cursor.fetchall()]
+            assert indexes == ["plio_name_trgm_idx", "plio_uuid_trgm_idx"]
@@ -0,0 +1,37 @@
+"""Pin the cold-read query count of a plio at the ``PlioSerializer`` seam.
+
+A plio's response nests its video, creator, items, questions and the questions'
+images. On a cache miss the whole tree is fetched by ``load_plio_tree`` in a
+fixed number of queries, so these specs count the queries of a cold read for a
+plio with one question and for one with ten, each question with an image.
+"""
+
+import pytest
+
+from plio.models import Plio
+from plio.serializers import PlioSerializer
+from tests.builders import in_workspace
+from tests.factories import ImageFactory, ItemFactory, PlioFactory, QuestionFactory
+
+# video, creator, items and questions with their images, plus the three
+# queries of the creator's own (uncached) response: their organizations for
+# the field, again for the nested organizations, and their roles
+COLD_PLIO_QUERIES = 7
+
+
+@pytest.mark.parametrize("num_questions", [1, 10])
+def test_cold_plio_read_takes_a_fixed_number_of_queries(
+    db, org_a, django_assert_num_queries, num_questions
+):
+    with in_workspace(org_a):
+        plio = PlioFactory()
+        for time in range(num_questions):
+            item = ItemFactory(plio=plio, type="question", time=time)
+            QuestionFactory(item=item, image=ImageFactory())
+
+        plio = Plio.objects.get(id=plio.id)
+        with django_assert_num_queries(COLD_PLIO_QUERIES):
+            data = PlioSerializer(plio).data
+
+    assert [item["time"] for item in data["items"]] == list(range(num_questions))
+    assert all(item["details"]["image"]["id"] for item in data["items"])
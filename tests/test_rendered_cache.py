@@ -0,0 +1,56 @@
+"""Pin the cached JSON of plio and user responses at the ``plio.responses`` seam.
+
+Plio retrieve and play, user retrieve and ``get_by_access_token`` serve the JSON
+rendered when the response was first built, along with a gzipped copy for the
+clients that accept it, instead of unpickling a dict and rendering it again.
+These specs check that the bytes served are the cached ones, that gzip is only
+sent when accepted, and that changing the plio changes what is served.
+"""
+
+import gzip
+import json
+
+from django.core.cache import cache
+
+from plio.cache import get_cache_key, get_rendered_cache_key
+from tests.factories import ItemFactory, PlioFactory, QuestionFactory
+
+
+def test_plio_is_served_from_its_rendered_json(creator):
+    plio = PlioFactory(created_by=creator.user)
+    QuestionFactory.create_batch(20, item__plio=plio)
+    path = "/api/v1/plios/{}/".format(plio.uuid)
+
+    first = creator.get(path)
+    rendered = cache.get(get_rendered_cache_key(get_cache_key(plio)))
+    assert first.content == rendered.content
+    assert len(first.data["items"]) == 20
+
+    # clients accepting gzip get the gzipped copy as is
+    gzipped = creator.get(path, HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert gzipped["Content-Encoding"] == "gzip"
+    assert gzipped["Vary"] == "Accept-Encoding"
+    assert gzipped.content == rendered.gzipped_content
+    assert gzip.decompress(gzipped.content) == first.content
+
+    # a pretty-printed response is rendered again from the cached JSON
+    indented = creator.get(path, HTTP_ACCEPT="application/json; indent=2")
+    assert json.loads(indented.content) == first.data
+    assert indented.content != first.content
+
+
+def test_changed_plio_is_rendered_again(creator):
+    plio = PlioFactory(created_by=creator.user)
+    item = ItemFactory(plio=plio, time=10)
+    path = "/api/v1/plios/{}/".format(plio.uuid)
+    assert creator.get(path).data["items"][0]["time"] == 10
+
+    creator.patch("/api/v1/items/{}/".format(item.id), {"time": 20})
+    assert creator.get(path).data["items"][0]["time"] == 20
+
+
+def test_user_is_served_from_its_rendered_json(creator):
+    response = creator.get("/api/v1/users/{}/".format(creator.user.id))
+    rendered = cache.get(get_rendered_cache_key(get_cache_key(creator.user)))
+    assert response.content == rendered.content
+    assert response.data["id"] == creator.user.id
@@ -19,30 +19,28 @@ Python ``hashlib.md5`` as an oracle independent of Postgres's ``MD5``.
 This module complements -- does not duplicate -- the integration report journey
 (``tests/integration/creator/test_report_contents.py``), which owns the unmasked
 org-admin mcq path end-to-end and watch-time rounding. It lives outside
-``tests/integration/`` so the unit lane collects it. Its zip/CSV readers and
-dump-dir cleanup fixture are kept local on purpose; nothing here belongs in the
-shared harness until a second consumer appears.
-
-Pre-existing bug pinned here: ``download_data`` returns HTTP 500 for *any* plio
-that contains a subjective question, because the interaction-details step
-(``plio/views.py``) runs ``question_correct_answer.apply(json.loads)`` with no
-null guard, while a subjective question stores ``correct_answer`` as SQL NULL
-(``None`` from the raw cursor). The existing status-only download tests never hit
-this -- their plio has no questions. Rather than change product code (out of
-scope for this slice), the subjective AC is encoded as a ``strict`` xfail that
-documents the desired behaviour and turns the build red the moment an upgrade or
-fix changes it.
+``tests/integration/`` so the unit lane collects it. Its zip/CSV readers are
+kept local on purpose; nothing here belongs in the shared harness until a second
+consumer appears.
+
+A subjective question stores ``correct_answer`` as SQL NULL (``None`` from the
+raw cursor), which the interaction-details step (``plio/reports.py``) must pass
+through rather than ``json.loads``; the existing status-only download tests
+never hit this, as their plio has no questions. A report that cannot be built
+at all fails before the response is sent, rather than as a truncated zip.
 """
 
 import csv
 import hashlib
 import io
-import shutil
+import os
 import zipfile
 from types import SimpleNamespace
+from unittest import mock
 
 import pytest
 
+from plio import reports
 from tests.factories import (
     EventFactory,
     ItemFactory,
@@ -71,17 +69,6 @@ def _masked(user):
     return hashlib.md5(str(user.id).encode()).hexdigest()
 
 
-@pytest.fixture
-def report_dump_cleanup():
-    """download_data writes its dump under /tmp/plio-<uuid> and only cleans it
-    on the *next* download of the same plio -- remove what this test generated
-    so repeated local runs don't accumulate archive trees in the container."""
-    uuids = []
-    yield uuids
-    for plio_uuid in uuids:
-        shutil.rmtree("/tmp/plio-{}".format(plio_uuid), ignore_errors=True)
-
-
 def _seed_report_scenario(owner):
     """Build one tiny personal-workspace report timeline plus a decoy plio.
 
@@ -147,20 +134,19 @@ def _seed_report_scenario(owner):
     )
 
 
-def _download_report(owner, plio, report_dump_cleanup):
+def _download_report(owner, plio):
     """Download the report over the HTTP seam (no Organization header -> personal
     workspace) and return the opened zip archive."""
-    report_dump_cleanup.append(plio.uuid)
     response = owner.get("/api/v1/plios/{}/download_data/".format(plio.uuid))
     assert response.status_code == 200
     return zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
 
 
-def test_report_zip_contains_six_csvs_and_readme(authed_client, report_dump_cleanup):
+def test_report_zip_contains_six_csvs_and_readme(authed_client):
     owner = authed_client()
     scenario = _seed_report_scenario(owner)
 
-    archive = _download_report(owner, scenario.plio, report_dump_cleanup)
+    archive = _download_report(owner, scenario.plio)
 
     # exactly the six named CSVs plus the README PDF -- nothing more, nothing less
     assert set(archive.namelist()) == {
@@ -174,11 +160,11 @@ def test_report_zip_contains_six_csvs_and_readme(authed_client, report_dump_clea
     }
 
 
-def test_report_csv_column_sets_are_exact(authed_client, report_dump_cleanup):
+def test_report_csv_column_sets_are_exact(authed_client):
     owner = authed_client()
     scenario = _seed_report_scenario(owner)
 
-    archive = _download_report(owner, scenario.plio, report_dump_cleanup)
+    archive = _download_report(owner, scenario.plio)
 
     assert _columns(archive, "sessions.csv") == [
         "session_id",
@@ -229,11 +215,11 @@ def test_report_csv_column_sets_are_exact(authed_client, report_dump_cleanup):
     assert _columns(archive, "plio-meta-details.csv") == ["id", "name", "video"]
 
 
-def test_checkbox_answers_are_reindexed_one_based(authed_client, report_dump_cleanup):
+def test_checkbox_answers_are_reindexed_one_based(authed_client):
     owner = authed_client()
     scenario = _seed_report_scenario(owner)
 
-    archive = _download_report(owner, scenario.plio, report_dump_cleanup)
+    archive = _download_report(owner, scenario.plio)
 
     # responses.csv: the submitted checkbox answer, stored 0-based as [0, 2],
     # is serialized 1-based as [1, 3]
@@ -254,13 +240,11 @@ def test_checkbox_answers_are_reindexed_one_based(authed_client, report_dump_cle
     assert checkbox_questions[0]["question_correct_answer"] == "[1, 3]"
 
 
-def test_skipped_answer_serialized_empty_and_incorrect(
-    authed_client, report_dump_cleanup
-):
+def test_skipped_answer_serialized_empty_and_incorrect(authed_client):
     owner = authed_client()
     scenario = _seed_report_scenario(owner)
 
-    archive = _download_report(owner, scenario.plio, report_dump_cleanup)
+    archive = _download_report(owner, scenario.plio)
 
     responses = _read_csv(archive, "responses.csv")
     # the skip landed on the mcq question as a null answer
@@ -272,13 +256,11 @@ def test_skipped_answer_serialized_empty_and_incorrect(
     assert skipped_rows[0]["is_answer_correct"] == "false"
 
 
-def test_personal_workspace_download_masks_identifiers(
-    authed_client, report_dump_cleanup
-):
+def test_personal_workspace_download_masks_identifiers(authed_client):
     owner = authed_client()
     scenario = _seed_report_scenario(owner)
 
-    archive = _download_report(owner, scenario.plio, report_dump_cleanup)
+    archive = _download_report(owner, scenario.plio)
 
     # a personal-workspace owner is not an org admin, so every user-carrying CSV
     # masks the identifier to the MD5 of the user id (independent hashlib oracle)
@@ -296,11 +278,11 @@ def test_personal_workspace_download_masks_identifiers(
         assert {row["user_identifier"] for row in rows} == expected, name
 
 
-def test_decoy_plio_rows_absent_from_every_csv(authed_client, report_dump_cleanup):
+def test_decoy_plio_rows_absent_from_every_csv(authed_client):
     owner = authed_client()
     scenario = _seed_report_scenario(owner)
 
-    archive = _download_report(owner, scenario.plio, report_dump_cleanup)
+    archive = _download_report(owner, scenario.plio)
 
     decoy_masked = _masked(scenario.decoy_learner)
     for name in (
@@ -326,21 +308,29 @@ def test_decoy_plio_rows_absent_from_every_csv(authed_client, report_dump_cleanu
     assert meta[0]["name"] == "Report CSV plio"
 
 
-@pytest.mark.xfail(
-    strict=True,
-    reason=(
-        "pre-existing bug: download_data returns HTTP 500 for a plio with a "
-        "subjective question -- the interaction-details step in plio/views.py "
-        "runs question_correct_answer.apply(json.loads) with no null guard, but "
-        "a subjective question stores correct_answer as SQL NULL. Fixing the "
-        "endpoint is out of scope for this test-wall slice; this strict xfail "
-        "encodes the desired behaviour and will fail the build if an upgrade or "
-        "fix changes it."
-    ),
-)
-def test_subjective_answer_verbatim_and_graded_correct(
-    authed_client, report_dump_cleanup
-):
+def test_report_is_streamed_without_staging_files(authed_client, monkeypatch):
+    owner = authed_client()
+    scenario = _seed_report_scenario(owner)
+    # flush the zip every row so that even this tiny report goes out in pieces
+    monkeypatch.setattr("plio.reports.REPORT_FETCH_SIZE", 1)
+
+    response = owner.get("/api/v1/plios/{}/download_data/".format(scenario.plio.uuid))
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"] == "application/zip"
+
+    chunks = [chunk for chunk in response.streaming_content if chunk]
+    # with the default fetch size this tiny report would go out as one chunk per
+    # zip member (7); flushing every row splits the members further
+    assert len(chunks) > 7
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert len(_read_csv(archive, "sessions.csv")) == 2
+
+    # nothing is staged on disk for the download anymore
+    assert not os.path.exists("/tmp/plio-{}".format(scenario.plio.uuid))
+
+
+def test_subjective_answer_verbatim_and_graded_correct(authed_client):
     owner = authed_client()
     plio = PlioFactory(
         created_by=owner.user, name="Subjective report plio", published=True
@@ -359,12 +349,25 @@ def test_subjective_answer_verbatim_and_graded_correct(
         session=session, item=subjective_item, answer="My essay answer"
     )
 
-    archive = _download_report(owner, plio, report_dump_cleanup)
+    archive = _download_report(owner, plio)
 
-    # desired behaviour once the endpoint tolerates subjective questions: a
-    # non-empty subjective answer appears verbatim and is graded correct
+    # a non-empty subjective answer appears verbatim and is graded correct
     responses = _read_csv(archive, "responses.csv")
     subjective_rows = [r for r in responses if r["question_type"] == "subjective"]
     assert len(subjective_rows) == 1
     assert subjective_rows[0]["answer"] == "My essay answer"
     assert subjective_rows[0]["is_answer_correct"] == "true"
+
+
+def test_report_that_cannot_be_built_fails_before_the_response(authed_client):
+    owner = authed_client()
+    plio = PlioFactory(created_by=owner.user, published=True)
+
+    def failing_query(plio_uuid, schema, show_unmasked_user_id):
+        raise RuntimeError("the report cannot be built")
+
+    # the failure surfaces while the view runs, not while the zip is streamed
+    failing_dumps = [("sessions.csv", failing_query, None)]
+    with mock.patch.object(reports, "REPORT_DUMPS", failing_dumps):
+        with pytest.raises(RuntimeError):
+            owner.get("/api/v1/plios/{}/download_data/".format(plio.uuid))
@@ -36,8 +36,6 @@ the observed behaviour, quirks included, is pinned as-is.
 
 from types import SimpleNamespace
 
-import pytest
-
 from entries.serializers import SessionSerializer
 from tests.builders import in_workspace
 from tests.factories import (
@@ -361,18 +359,11 @@ def test_create_carries_over_from_nearest_live_predecessor(db, org_a):
     ``is_first`` is False. The soft-deleted successor's and the oldest live
     session's distinctive values must appear nowhere.
 
-    Experiment carryover is a pinned quirk, and it is why the live predecessor
-    here owns no experiment. The create path copies the predecessor's fields from
-    ``SessionSerializer(last_session).data``, whose ``to_representation`` renders
-    the experiment as a serialized *dict*; assigning that dict back to the
-    ``Session.experiment`` foreign key raises ``ValueError``, so a live
-    predecessor that owns an experiment cannot be carried over at all today
-    (a product fix is out of scope for this test-only fill). The created
-    session's experiment is therefore carried as ``None``. The factory-built
-    experiment instead hangs on the *soft-deleted* successor, where it doubles as
-    a wrong-pick tripwire: were the safedelete manager to stop hiding the deleted
-    successor, the create path would try to copy that experiment dict and raise,
-    turning a silent wrong-predecessor regression into a loud one.
+    The live predecessor here owns no experiment, so the created session's
+    experiment is carried as ``None``. The factory-built experiment instead hangs
+    on the *soft-deleted* successor, where it doubles as a wrong-pick tripwire:
+    were the safedelete manager to stop hiding the deleted successor, the create
+    path would carry that experiment over and fail the ``None`` assertion.
 
     Every expected value is a literal from this timeline -- the live session's own
     field values and item/answer pairs -- never recomputed by re-running the
@@ -438,7 +429,7 @@ def test_create_carries_over_from_nearest_live_predecessor(db, org_a):
         assert created.watch_time == 42.0
         assert created.has_video_played is True
         # experiment carried as None from the live predecessor -- not the deleted
-        # successor's experiment (whose dict copy would have raised)
+        # successor's experiment
         assert created.experiment_id is None
         # a live predecessor exists, so this is not the learner's first session
         assert created.is_first is False
@@ -458,31 +449,27 @@ def test_create_carries_over_from_nearest_live_predecessor(db, org_a):
         assert 8 not in [answer for _item_id, answer in answers]
 
 
-def test_create_with_experiment_bearing_live_predecessor_raises(db, org_a):
-    """Bug #391 pinned at the serializer seam: an experiment-bearing *live*
-    predecessor makes session-create raise.
+def test_create_carries_over_experiment_of_live_predecessor(db, org_a):
+    """Bug #391 at the serializer seam: an experiment-bearing *live*
+    predecessor carries its experiment over to the new session.
 
-    The carryover copies fields from ``SessionSerializer(last_session).data``,
+    The carryover used to copy fields from ``SessionSerializer(last_session).data``,
     where ``to_representation`` renders a non-null experiment as a serialized
-    *dict*; ``Session.objects.create`` then rejects that dict for the
-    ``experiment`` foreign key with ``ValueError``. Today that surfaces as a 500
-    on reopening any plio whose live predecessor carries an experiment --
-    tracked as #391, out of scope for this test-only fill. When #391 is fixed,
-    flip this to assert the carried-over experiment instead.
+    *dict* that the ``experiment`` foreign key rejected with ``ValueError``. The
+    fields are now copied from the predecessor itself, foreign keys by id.
     """
     with in_workspace(org_a):
         creator = UserFactory()
         video = VideoFactory(duration=4)
         plio = PlioFactory(published=True, video=video, created_by=creator)
         learner = UserFactory()
-        SessionFactory(
-            plio=plio,
-            user=learner,
-            experiment=ExperimentFactory(created_by=creator),
-        )
+        experiment = ExperimentFactory(created_by=creator)
+        SessionFactory(plio=plio, user=learner, experiment=experiment)
+
+        created = _create_session_via_serializer(plio, learner)
 
-        with pytest.raises(ValueError, match="experiment"):
-            _create_session_via_serializer(plio, learner)
+        assert created.experiment_id == experiment.id
+        assert created.is_first is False
 
 
 def test_create_starts_fresh_when_all_predecessors_soft_deleted(db, org_a):
@@ -0,0 +1,87 @@
+"""Pin the compact retention storage at the ``entries.retention`` seam.
+
+``Session.retention`` is exchanged by the API as a comma-separated string but
+stored as tagged bytes: one byte or two bytes per second, or runs of values,
+whichever is the smallest, with anything else kept verbatim as utf-8 text. These
+specs check that every shape of retention string reads back exactly as it was
+written -- through the codec and through the model field -- and that the bytes a
+raw query sees are the compact ones. Expected sizes are worked out by hand from
+the format of each spec's string.
+"""
+
+import numpy as np
+from django.db import connection
+
+from entries.models import Session
+from entries.retention import (
+    RETENTION_RUNS,
+    RETENTION_TEXT,
+    RETENTION_UINT8,
+    RETENTION_UINT16,
+    count_retention_values,
+    decode_retention,
+    decode_retention_values,
+    encode_retention,
+    get_retention_format,
+)
+from tests.builders import in_workspace
+from tests.factories import SessionFactory
+
+
+def test_retention_strings_round_trip_in_the_smallest_format():
+    cases = [
+        # empty retention (never watched) is stored as no bytes at all
+        ("", None, 0),
+        # single-digit counters with no long runs: tag + one byte per second
+        ("0,1,0,NaN", RETENTION_UINT8, 5),
+        # a counter above 254 needs two bytes per second
+        ("300,1,0", RETENTION_UINT16, 7),
+        # 2400 seconds in two runs: tag + two (value, length) uint16 pairs
+        (",".join(["1"] * 600 + ["0"] * 1800), RETENTION_RUNS, 9),
+        # strings that the counters cannot reproduce exactly stay as text
+        ("01,1", RETENTION_TEXT, 5),
+        ("1.5,2", RETENTION_TEXT, 6),
+        ("1,,2", RETENTION_TEXT, 5),
+        ("70000,1", RETENTION_TEXT, 8),
+        ("late-a", RETENTION_TEXT, 7),
+    ]
+    for retention, retention_format, size in cases:
+        encoded = encode_retention(retention)
+        assert get_retention_format(encoded) == retention_format, retention
+        assert len(encoded) == size, retention
+        assert decode_retention(encoded) == retention
+
+
+def test_encoded_retentions_are_decoded_together():
+    encoded = [
+        encode_retention(",".join(["2"] * 70)),
+        encode_retention(",".join(["0"] * 60 + ["NaN"] * 10)),
+    ]
+    assert {get_retention_format(value) for value in encoded} == {RETENTION_RUNS}
+    assert count_retention_values(encoded, RETENTION_RUNS).tolist() == [70, 70]
+
+    values = decode_retention_values(encoded, RETENTION_RUNS)
+    assert values.shape == (2, 70)
+    assert values[0].tolist() == [2.0] * 70
+    assert values[1, :60].tolist() == [0.0] * 60
+    # "NaN" comes back as NaN
+    assert np.isnan(values[1, 60:]).all()
+
+
+def test_session_retention_is_stored_compactly(db, org_a):
+    retention = ",".join(["1"] * 100 + ["0"] * 20)
+    with in_workspace(org_a):
+        session = SessionFactory(retention=retention)
+
+        # the model keeps seeing the string the API exchanges
+        assert Session.objects.get(id=session.id).retention == retention
+
+        # while the column holds the two runs of the string
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT retention FROM {org_a.schema_name}.session "
+                f"WHERE id = {session.id}"
+            )
+            (stored,) = cursor.fetchone()
+    assert bytes(stored) == encode_retention(retention)
+    assert len(bytes(stored)) == 9
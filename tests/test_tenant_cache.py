@@ -0,0 +1,97 @@
+"""Pin tenant resolution at the ``organizations.cache`` seam.
+
+Every request resolves its ``ORGANIZATION`` header to a tenant. These specs
+check that the lookup reaches the database once per shortcode -- later lookups
+are served from the process' memory or, in other processes, from Redis --
+that unknown shortcodes are cached too, that a saved organization is resolved
+afresh once its transaction commits (and not at all if it rolls back), and
+that the middleware hands the resolved tenant to the request.
+"""
+
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+from django.test import RequestFactory
+
+from organizations.cache import get_tenant, get_tenant_cache_key, tenant_cache
+from organizations.middleware import OrganizationTenantMiddleware
+from organizations.models import Organization
+
+
+def test_tenant_is_looked_up_in_the_database_once(db, org_a, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert get_tenant("org-a").schema_name == org_a.schema_name
+    with django_assert_num_queries(0):
+        assert get_tenant("org-a").schema_name == org_a.schema_name
+
+    # a process without the tenant in memory finds it in redis
+    tenant_cache.clear()
+    with django_assert_num_queries(0):
+        assert get_tenant("org-a").schema_name == org_a.schema_name
+
+
+def test_unknown_shortcode_is_cached_as_no_tenant(db, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert get_tenant("missing-org") is None
+    with django_assert_num_queries(0):
+        assert get_tenant("missing-org") is None
+
+
+def test_saved_organization_is_resolved_afresh(db, org_a):
+    assert get_tenant("org-a").name == org_a.name
+
+    organization = Organization.objects.get(id=org_a.id)
+    organization.name = "Renamed"
+    organization.save()
+    assert get_tenant("org-a").name == "Renamed"
+
+    organization.shortcode = "org-a-renamed"
+    organization.save()
+    assert get_tenant("org-a") is None
+    assert get_tenant("org-a-renamed").id == org_a.id
+
+
+def test_saved_organization_is_dropped_once_it_commits(
+    db, org_a, settings, django_capture_on_commit_callbacks
+):
+    settings.CACHE_INVALIDATIONS_EAGER = False
+    cache_key = get_tenant_cache_key("org-a")
+    assert get_tenant("org-a").name == org_a.name
+    organization = Organization.objects.get(id=org_a.id)
+
+    # a change that is rolled back leaves the tenant cached
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            organization.name = "Rolled back"
+            organization.save()
+            raise RuntimeError
+    assert tenant_cache.get(cache_key).name == org_a.name
+    assert cache.get(cache_key).name == org_a.name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            organization.name = "Renamed"
+            organization.save()
+            # other requests keep the committed tenant until the change commits,
+            # while this one sees its own change
+            assert cache.get(cache_key).name == org_a.name
+            assert get_tenant("org-a").name == "Renamed"
+
+    assert tenant_cache.get(cache_key) is None
+    assert cache.get(cache_key) is None
+    assert get_tenant("org-a").name == "Renamed"
+
+
+def test_middleware_keeps_the_tenant_on_the_request(
+    db, org_a, django_assert_num_queries
+):
+    middleware = OrganizationTenantMiddleware(get_response=lambda request: None)
+    request = RequestFactory().get("/", HTTP_ORGANIZATION="org-a")
+
+    middleware.process_request(request)
+    assert request.tenant.id == org_a.id
+
+    # views reuse the tenant of the request
+    tenant_cache.clear()
+    with django_assert_num_queries(0):
+        assert middleware.get_tenant(request).id == org_a.id
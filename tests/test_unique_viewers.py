@@ -0,0 +1,77 @@
+"""Pin the stored unique-viewer count of a plio at the ``entries.viewers`` seam.
+
+``Plio.unique_viewers`` replaces counting the distinct users of every listed
+plio's sessions on each plio listing. These specs check that it counts a user
+once however many sessions they have -- even when their first sessions are
+created at once -- follows sessions being deleted and restored, orders the
+listing, and is rebuilt by ``backfilluniqueviewers``.
+"""
+
+from django.core.management import call_command
+
+from entries.models import PlioViewer
+from entries.viewers import add_unique_viewer
+from plio.models import Plio
+from tests.builders import in_workspace
+from tests.factories import PlioFactory, SessionFactory, UserFactory
+
+
+def get_unique_viewers(plio):
+    return Plio.all_objects.get(id=plio.id).unique_viewers
+
+
+def test_each_viewer_is_counted_once(db, org_a):
+    with in_workspace(org_a):
+        plio = PlioFactory(published=True)
+        viewer, other_viewer = UserFactory(), UserFactory()
+        first = SessionFactory(plio=plio, user=viewer)
+        SessionFactory(plio=plio, user=viewer)
+        SessionFactory(plio=plio, user=other_viewer)
+        assert get_unique_viewers(plio) == 2
+
+        # the viewer still has another session
+        first.delete()
+        assert get_unique_viewers(plio) == 2
+
+        other_session = plio.session_set.get(user=other_viewer)
+        other_session.delete()
+        assert get_unique_viewers(plio) == 1
+        other_session.undelete()
+        assert get_unique_viewers(plio) == 2
+
+
+def test_repeated_first_sessions_count_the_viewer_once(db, org_a):
+    with in_workspace(org_a):
+        plio = PlioFactory(published=True)
+        session = SessionFactory(plio=plio)
+        # another first session of the same user that did not see this one
+        # when it was created (e.g. a retried request)
+        add_unique_viewer(session)
+        assert get_unique_viewers(plio) == 1
+        assert PlioViewer.objects.filter(plio=plio).count() == 1
+
+
+def test_plios_are_listed_by_their_viewers(creator):
+    quiet, popular = PlioFactory.create_batch(2, created_by=creator.user)
+    SessionFactory.create_batch(3, plio=popular)
+    SessionFactory(plio=quiet)
+
+    response = creator.get("/api/v1/plios/?ordering=-unique_viewers")
+    assert [plio["unique_viewers"] for plio in response.data["results"]] == [3, 1]
+    assert response.data["results"][0]["uuid"] == popular.uuid
+
+
+def test_backfill_recounts_the_viewers(db, org_a):
+    with in_workspace(org_a):
+        plio = PlioFactory(published=True)
+        SessionFactory.create_batch(2, plio=plio)
+        Plio.objects.filter(id=plio.id).update(unique_viewers=10)
+        PlioViewer.objects.filter(plio=plio).delete()
+        PlioViewer.objects.create(plio=plio, user=UserFactory())
+
+    call_command("backfilluniqueviewers", schemas=[org_a.schema_name])
+    with in_workspace(org_a):
+        assert get_unique_viewers(plio) == 2
+        assert set(
+            PlioViewer.objects.filter(plio=plio).values_list("user_id", flat=True)
+        ) == set(plio.session_set.values_list("user_id", flat=True))
@@ -0,0 +1,85 @@
+"""Pin the per learner-plio resume pointer at the ``UserPlioState`` seam.
+
+Every event that is written moves the ``user_plio_state`` row of its learner and
+plio to itself, unless the row already points to a more recent event, so that
+``Session.last_global_event`` of the latest session is a single lookup. These
+specs build tiny timelines by hand (sessions and events created in id and
+``updated_at`` order, as in ``test_session_carryover``) and check the identity
+of the event the row points to as events are written, re-saved and deleted, and
+that a historical session still resolves to its own timeline.
+"""
+
+from entries.models import Session, UserPlioState
+from tests.builders import in_workspace
+from tests.factories import EventFactory, PlioFactory, SessionFactory, UserFactory
+
+
+def get_state(session):
+    return UserPlioState.objects.filter(
+        plio_id=session.plio_id, user_id=session.user_id
+    ).first()
+
+
+def test_state_follows_the_latest_event_of_the_pair(
+    db, org_a, django_assert_num_queries
+):
+    with in_workspace(org_a):
+        learner = UserFactory()
+        plio = PlioFactory()
+        first = SessionFactory(plio=plio, user=learner)
+        assert get_state(first) is None
+
+        EventFactory(session=first, player_time=5)
+        latest_event = EventFactory(session=first, player_time=12)
+        state = get_state(first)
+        assert state.last_event_id == latest_event.id
+        assert state.last_event_session_id == first.id
+        assert state.last_event_player_time == 12
+
+        # a new session resumes from the pair's last event in a single lookup
+        second = SessionFactory(plio=plio, user=learner)
+        second = Session.objects.get(id=second.id)
+        with django_assert_num_queries(1):
+            assert second.last_global_event.id == latest_event.id
+
+
+def test_resaved_event_of_an_earlier_session_does_not_move_the_state(db, org_a):
+    with in_workspace(org_a):
+        learner = UserFactory()
+        plio = PlioFactory()
+        first = SessionFactory(plio=plio, user=learner)
+        old_event = EventFactory(session=first)
+        second = SessionFactory(plio=plio, user=learner)
+        new_event = EventFactory(session=second)
+
+        old_event.player_time = 30
+        old_event.save()
+        assert get_state(second).last_event_id == new_event.id
+
+        # the earlier session still resumes from its own timeline
+        assert Session.objects.get(id=first.id).last_global_event.id == old_event.id
+
+
+def test_deleting_the_last_event_or_its_session_rebuilds_the_state(db, org_a):
+    with in_workspace(org_a):
+        learner = UserFactory()
+        plio = PlioFactory()
+        first = SessionFactory(plio=plio, user=learner)
+        first_event = EventFactory(session=first)
+        second = SessionFactory(plio=plio, user=learner)
+        second_event = EventFactory(session=second)
+        later_event = EventFactory(session=second)
+
+        later_event.delete()
+        assert get_state(second).last_event_id == second_event.id
+
+        second.delete()
+        assert get_state(first).last_event_id == first_event.id
+
+        # restoring the session makes its events the most recent ones again
+        Session.all_objects.get(id=second.id).undelete()
+        assert get_state(first).last_event_id == second_event.id
+
+        first.delete()
+        Session.objects.get(id=second.id).delete()
+        assert get_state(first) is None
@@ -1,3 +1,6 @@
 user_status_choices = [("waitlist", "Added to Waitlist"), ("approved", "Approved")]
 required_third_party_auth_keys = ["unique_id", "api_key"]
 org_admin_roles = ["org-admin", "super-admin"]
+
+# how long, in seconds, the roles of a user in their organizations are cached
+organization_roles_cache_timeout = 60
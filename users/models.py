@@ -1,9 +1,16 @@
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from organizations.cache import get_tenant
 from organizations.models import Organization
+from plio.cache import get_organization_roles_cache_key, is_invalidation_pending
 from safedelete.models import SafeDeleteModel, SafeDeleteManager, SOFT_DELETE
-from .config import user_status_choices, org_admin_roles
+from .config import (
+    user_status_choices,
+    org_admin_roles,
+    organization_roles_cache_timeout,
+)
 
 
 class UserManager(SafeDeleteManager):
@@ -124,15 +131,55 @@ class User(SafeDeleteModel, AbstractUser):
     def __str__(self):
         return "%d: %s" % (self.id, self.name)
 
+    def get_organization_roles(self):
+        """
+        Returns the user's role within each organization they are a part of,
+        keyed by the organization id.
+
+        The roles are loaded once per user instance, so `request.user` needs
+        at most one query for all the membership checks of a request, and are
+        cached for a short while across requests as well.
+        """
+        if hasattr(self, "_organization_roles"):
+            return self._organization_roles
+
+        cache_key = get_organization_roles_cache_key(self.id)
+        # the roles are neither read from nor written to the cache while a
+        # change to them is not flushed yet
+        is_pending = is_invalidation_pending(cache_key)
+        organization_roles = None if is_pending else cache.get(cache_key)
+        if organization_roles is None:
+            organization_roles = {}
+            organization_users = (
+                OrganizationUser.objects.filter(user_id=self.id)
+                .select_related("role")
+                .order_by("id")
+            )
+            for organization_user in organization_users:
+                organization_roles.setdefault(
+                    organization_user.organization_id, organization_user.role
+                )
+            if not is_pending:
+                cache.set(
+                    cache_key, organization_roles, organization_roles_cache_timeout
+                )
+
+        self._organization_roles = organization_roles
+        return organization_roles
+
     def get_role_for_organization(self, organization_id: int):
         """Returns the user's role within the organization provided (None if the user is not a part)"""
-        organization_user = OrganizationUser.objects.filter(
-            organization_id=organization_id, user_id=self.id
-        ).first()
-        if not organization_user:
+        if organization_id is None:
             return None
-
-        return organization_user.role
+        return self.get_organization_roles().get(int(organization_id))
+
+    def belongs_to_organization(self, organization_shortcode: str):
+        """Whether the user is a part of the organization with the given shortcode"""
+        organization = get_tenant(organization_shortcode)
+        return (
+            organization is not None
+            and self.get_role_for_organization(organization.id) is not None
+        )
 
     def is_org_admin(self, organization_id: int, return_role: bool = False):
         """Whether the user has the privileges of an organisation's admin"""
@@ -1,8 +1,7 @@
 from rest_framework import serializers
 from users.models import User, OneTimePassword, Role, OrganizationUser
 from organizations.serializers import OrganizationSerializer
-from django.core.cache import cache
-from plio.cache import get_cache_key
+from plio.cache import get_cache_key, get_or_build
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -33,27 +32,30 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ["is_superuser", "is_staff"]
 
     def to_representation(self, instance):
-        # check if a cached version exists and if it does, return it as the response
-        cache_key = get_cache_key(instance)
-        cached_response = cache.get(cache_key)
-        if cached_response:
-            return cached_response
+        # return the cached version if it exists, otherwise build it, with a
+        # single worker building it when many requests miss it at once
+        return get_or_build(
+            get_cache_key(instance), lambda: self.build_representation(instance)
+        )
 
+    def build_representation(self, instance):
         response = super().to_representation(instance)
         # add organizations the user is a part of
         response["organizations"] = OrganizationSerializer(
             instance.organizations, many=True
         ).data
         # for each organization the user is part of, add the user's role in
-        # that organization
+        # that organization, fetching the roles for all organizations at once
+        organization_roles = (
+            OrganizationUser.objects.filter(user=instance)
+            .order_by("id")
+            .values_list("organization_id", "role__name")
+        )
+        role_names = {}
+        for organization_id, role_name in organization_roles:
+            role_names.setdefault(organization_id, role_name)
         for org in response["organizations"]:
-            org_user = OrganizationUser.objects.filter(
-                user=instance, organization_id=org["id"]
-            ).first()
-            role_name = Role.objects.filter(id=org_user.role.id).first().name
-            org.update({"role": role_name})
-
-        cache.set(cache_key, response)  # set a cached version
+            org.update({"role": role_names[org["id"]]})
         return response
 
     def validate_config(self, config):
@@ -3,12 +3,16 @@ from django.db.models.signals import post_save, post_delete, pre_save
 from oauth2_provider.models import Application
 
 from plio.settings import API_APPLICATION_NAME, DEFAULT_OAUTH2_CLIENT_ID
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
-
 from users.models import User, OrganizationUser
 from users.serializers import UserSerializer
-from plio.cache import invalidate_cache_for_instance, invalidate_cache_for_instances
+from plio.cache import (
+    bump_version,
+    get_organization_roles_cache_key,
+    get_user_version_key,
+    invalidate_cache_for_instance,
+    invalidate_cache_keys,
+    send_to_group,
+)
 
 # the cache invalidate receivers must be defined before any other receiver,
 # so that the instance data in other receivers is always up to date.
@@ -18,26 +22,26 @@ from plio.cache import invalidate_cache_for_instance, invalidate_cache_for_insta
 def user_update_cache(sender, instance, **kwargs):
     invalidate_cache_for_instance(instance)
 
-    # invalidate cache for plios created by user
-    from plio.models import Plio
-
-    plios = Plio.objects.filter(created_by_id=instance.id)
-    invalidate_cache_for_instances(plios)
+    # the cache keys of the plios created by the user include their version
+    bump_version(get_user_version_key(instance.id))
 
 
 @receiver([post_save, post_delete], sender=OrganizationUser)
 def organization_user_update_cache(sender, instance, **kwargs):
     invalidate_cache_for_instance(instance.user)
+    invalidate_cache_keys([get_organization_roles_cache_key(instance.user_id)])
+    # the plios created by the user embed their organizations too
+    bump_version(get_user_version_key(instance.user_id))
 
 
 @receiver([post_save, post_delete], sender=OrganizationUser)
 def update_organization_user(sender, instance: OrganizationUser, **kwargs):
-    # execute this if a user is added to/removed from an organization
-    user_data = UserSerializer(instance.user).data
-    channel_layer = get_channel_layer()
-    user_group_name = f"user_{user_data['id']}"
-    async_to_sync(channel_layer.group_send)(
-        user_group_name, {"type": "send_user", "data": user_data}
+    # execute this if a user is added to/removed from an organization. the user
+    # is serialized once the change is committed, so that it is up to date
+    user = instance.user
+    send_to_group(
+        f"user_{user.id}",
+        lambda: {"type": "send_user", "data": UserSerializer(user).data},
     )
 
 
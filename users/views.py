@@ -19,6 +19,7 @@ from plio.settings import (
     SMS_DRIVER,
 )
 from users.models import User, OneTimePassword, OrganizationUser, Role
+from users.config import org_admin_roles
 from users.serializers import (
     UserSerializer,
     OtpSerializer,
@@ -26,7 +27,9 @@ from users.serializers import (
     RoleSerializer,
 )
 from users.permissions import UserPermission, OrganizationUserPermission
+from organizations.cache import get_tenant
 from organizations.models import Organization
+from plio.responses import get_cached_json_response
 from .services import SnsService
 from .config import required_third_party_auth_keys
 
@@ -78,6 +81,10 @@ class UserViewSet(viewsets.ModelViewSet):
 
         return qs
 
+    def retrieve(self, request, *args, **kwargs):
+        # serve the cached JSON of the user without rendering it again
+        return get_cached_json_response(self.get_serializer(self.get_object()))
+
     @action(
         detail=True,
         permission_classes=[IsAuthenticated, UserPermission],
@@ -168,10 +175,11 @@ class OrganizationUserViewSet(viewsets.ModelViewSet):
             return base_qs
 
         # Non-superuser: compute accessible orgs (where user is super-admin or org-admin)
-        user_organizations = OrganizationUser.objects.filter(
-            user=request.user, role__name__in=["super-admin", "org-admin"]
-        ).all()
-        organization_ids = [uo.organization_id for uo in user_organizations]
+        organization_ids = [
+            organization_id
+            for organization_id, role in request.user.get_organization_roles().items()
+            if role.name in org_admin_roles
+        ]
 
         if requested_org is not None:
             try:
@@ -184,13 +192,10 @@ class OrganizationUserViewSet(viewsets.ModelViewSet):
 
         organization_shortcode = request.META.get("HTTP_ORGANIZATION", "")
         if organization_shortcode:
-            try:
-                org = Organization.objects.get(shortcode=organization_shortcode)
-                if org.id in organization_ids:
-                    return base_qs.filter(organization=org)
-                return OrganizationUser.objects.none()
-            except Organization.DoesNotExist:
-                return OrganizationUser.objects.none()
+            org = get_tenant(organization_shortcode)
+            if org is not None and org.id in organization_ids:
+                return base_qs.filter(organization=org)
+            return OrganizationUser.objects.none()
 
         return base_qs.filter(organization__in=organization_ids)
 
@@ -217,24 +222,20 @@ class RoleViewSet(viewsets.ModelViewSet):
         if not organization_shortcode:
             return Role.objects.none()
 
-        try:
-            organization = Organization.objects.get(shortcode=organization_shortcode)
-            user_org = OrganizationUser.objects.filter(
-                user=self.request.user, organization=organization
-            ).first()
-
-            if not user_org:
-                return Role.objects.none()
+        organization = get_tenant(organization_shortcode)
+        if organization is None:
+            return Role.objects.none()
 
-            # Super-admins can see org-admin and org-view roles
-            if user_org.role.name == "super-admin":
-                return Role.objects.filter(name__in=["org-admin", "org-view"])
-            # Org-admins can only see org-view role
-            elif user_org.role.name == "org-admin":
-                return Role.objects.filter(name="org-view")
+        user_role = self.request.user.get_role_for_organization(organization.id)
+        if not user_role:
+            return Role.objects.none()
 
-        except Organization.DoesNotExist:
-            pass
+        # Super-admins can see org-admin and org-view roles
+        if user_role.name == "super-admin":
+            return Role.objects.filter(name__in=["org-admin", "org-view"])
+        # Org-admins can only see org-view role
+        elif user_role.name == "org-admin":
+            return Role.objects.filter(name="org-view")
 
         return Role.objects.none()
 
@@ -352,7 +353,7 @@ def get_by_access_token(request):
     access_token = AccessToken.objects.filter(token=token).first()
     if access_token:
         user = User.objects.filter(id=access_token.user_id).first()
-        return Response(UserSerializer(user).data)
+        return get_cached_json_response(UserSerializer(user))
 
     return Response({"detail": "User not found."}, status=status.HTTP_404_NOT_FOUND)
 